@@ -48,6 +48,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # goście: publiczne strony oprogramowania z plików (EQUIPMENT_PUBLIC_PAGES_SERVE)
+    'educational_software.middleware.PrerenderedPagesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -67,6 +69,8 @@ TEMPLATES = [
             'context_processors': [
                 
                 'equipment.context_processors.version_info',
+                'equipment.context_processors.fragment_cache',
+                'equipment.context_processors.guest_mode',
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -156,4 +160,79 @@ STATICFILES_DIRS = [
 ]
 
 # (Opcjonalnie, na przyszłość – dla collectstatic na serwerze produkcyjnym)
-STATIC_ROOT = BASE_DIR / "staticfiles"
\ No newline at end of file
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# --- Import kart sprzętu: podglądy zmian (dry-run) zapisane pod tokenem ---
+EQUIPMENT_IMPORT_PREVIEW_DIR = BASE_DIR / "var" / "import_previews"
+
+# --- Eksport kart sprzętu: gotowe pliki XLSX trzymane na dysku ---
+# Nowy plik po zmianach buduje cron (bez niego wysyłany jest ostatni gotowy plik):
+#   */10 * * * * cd /srv/baza && python manage.py build_equipment_export
+EQUIPMENT_EXPORT_CACHE_DIR = BASE_DIR / "var" / "exports"
+EQUIPMENT_EXPORT_CACHE_MAX_AGE_DAYS = 7
+EQUIPMENT_EXPORT_CACHE_MAX_MB = 200
+
+# --- Raport gwarancji (komenda warranty_report): data poprzedniego uruchomienia ---
+EQUIPMENT_WARRANTY_REPORT_STATE = BASE_DIR / "var" / "warranty_report.json"
+
+# --- Raporty przestawne: czas życia wyniku w cache (sekundy) ---
+EQUIPMENT_REPORT_CACHE_SECONDS = 600
+
+# --- Migawki stanu (komenda inventory_snapshot): co ile migawek zapisać pełną ---
+EQUIPMENT_SNAPSHOT_FULL_EVERY = 30
+
+# --- Budynki laboratoriów (educational_software/buildings.py) ---
+# Trzymane w pamięci procesu: wersję we wspólnym cache sprawdzamy co tyle sekund
+BUILDINGS_CHECK_SECONDS = 5
+
+# --- Cache fragmentów szablonów (equipment/data_version.py) ---
+# Fragmenty są unieważniane przez licznik wersji danych; czas to tylko sprzątanie.
+FRAGMENT_CACHE_SECONDS = 6 * 3600
+
+# --- Cache (wspólny dla wszystkich workerów gunicorna) ---
+# Domyślnie pliki w var/cache. Z BAZA_REDIS_URL (np. redis://127.0.0.1:6379/1)
+# i zainstalowanym pakietem `redis` – Redis albo zgodny zamiennik (Valkey, KeyDB).
+# Agregaty liczone w widokach: equipment/tiered_cache.py (L1 w procesie + ten cache).
+import importlib.util
+
+BAZA_REDIS_URL = os.environ.get("BAZA_REDIS_URL", "")
+
+if BAZA_REDIS_URL and importlib.util.find_spec("redis") is not None:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": BAZA_REDIS_URL,
+            "KEY_PREFIX": "baza",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": BASE_DIR / "var" / "cache",
+            "OPTIONS": {"MAX_ENTRIES": 20000},
+        }
+    }
+
+TIERED_CACHE_L1_SECONDS = 5
+TIERED_CACHE_L1_MAX_ENTRIES = 500
+TIERED_CACHE_DEFAULT_SECONDS = 3600
+# Blokady przeliczania, gdy cache to nie Redis (pliki O_EXCL, equipment/tiered_cache.py)
+TIERED_CACHE_LOCK_DIR = BASE_DIR / "var" / "locks"
+
+# --- Strony publiczne dla gości: statyczne kopie (komenda prerender_public_pages) ---
+# Po zmianach w panelu kopie są nieaktualne (goście dostają zwykły widok) aż do
+# kolejnego renderowania – komendę warto uruchamiać z crona.
+EQUIPMENT_PUBLIC_PAGES_DIR = BASE_DIR / "var" / "public_pages"
+EQUIPMENT_PUBLIC_PAGES_SERVE = True
+
+# --- Sesje ---
+# Goście nie mają sesji (podpisane ciasteczko, equipment/guest.py); sesje
+# zalogowanych: cached_db – odczyt z cache, zapis do bazy (przeżywa restart cache).
+# Alternatywy: "django.contrib.sessions.backends.db" albo
+# "django.contrib.sessions.backends.signed_cookies" (bez tabeli sesji).
+# Wygasłe sesje: komenda cleanup_sessions (partiami, z crona).
+SESSION_ENGINE = os.environ.get("BAZA_SESSION_ENGINE", "django.contrib.sessions.backends.cached_db")
+
+# --- Panel administracyjny: lista kart w trybie wydajności (equipment/admin_performance.py) ---
+EQUIPMENT_ADMIN_PERFORMANCE_MODE = True
@@ -1,3 +1,66 @@
 from django.contrib import admin
+from django.db import transaction
 
-# Register your models here.
+from .licences import refresh_pools
+from .linking import rebuild_laboratory_rooms
+from .models import Building, Laboratory, LicencePool, Software
+
+
+class RebuildRoomsMixin:
+    """
+    Zmiana budynku laboratorium / numeru budynku zmienia powiązania z salami.
+    """
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        transaction.on_commit(rebuild_laboratory_rooms)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        transaction.on_commit(rebuild_laboratory_rooms)
+
+
+@admin.register(Building)
+class BuildingAdmin(RebuildRoomsMixin, admin.ModelAdmin):
+    list_display = ("name", "key", "number", "sort_order")
+    list_editable = ("sort_order",)
+    prepopulated_fields = {"key": ("name",)}
+
+
+@admin.register(Laboratory)
+class LaboratoryAdmin(RebuildRoomsMixin, admin.ModelAdmin):
+    list_display = ("number", "building", "has_space_mouse", "machine_count")
+    list_editable = ("building", "has_space_mouse")
+    list_filter = ("building",)
+    list_select_related = ("building",)
+    search_fields = ("number",)
+
+
+@admin.register(LicencePool)
+class LicencePoolAdmin(admin.ModelAdmin):
+    list_display = ("name", "seats", "seats_used", "over_by", "valid_until")
+    readonly_fields = ("seats_used", "over_by")
+    search_fields = ("name",)
+
+
+@admin.register(Software)
+class SoftwareAdmin(admin.ModelAdmin):
+    list_display = ("name", "version", "licence_pool", "lab_count", "seats_used")
+    list_editable = ("version", "licence_pool")
+    list_filter = ("licence_pool",)
+    list_select_related = ("licence_pool",)
+    readonly_fields = ("lab_count", "seats_used")
+    search_fields = ("name",)
+
+    def save_model(self, request, obj, form, change):
+        # przeniesienie programu do innej puli zmienia wykorzystanie obu pul
+        previous = form.initial.get("licence_pool") if change else None
+        super().save_model(request, obj, form, change)
+        if "licence_pool" in form.changed_data:
+            pools = {previous, obj.licence_pool_id}
+            transaction.on_commit(lambda: refresh_pools(pools))
+
+    def delete_model(self, request, obj):
+        pool_id = obj.licence_pool_id
+        super().delete_model(request, obj)
+        transaction.on_commit(lambda: refresh_pools({pool_id}))
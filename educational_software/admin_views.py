@@ -1,10 +1,17 @@
+import logging
+
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
-from django.utils import timezone
 
 from openpyxl import load_workbook
 
-from .models import Laboratory, Software, SoftwareInstallation
+from .licences import sync_installations
+from .linking import rebuild_laboratory_rooms
+from .models import Laboratory, Software
+from .prerender import prerender_public_pages
+
+
+logger = logging.getLogger(__name__)
 
 
 def _is_installed_cell(cell) -> bool:
@@ -56,8 +63,11 @@ def software_excel_import_view(request):
     - Kolumny B–S = laboratoria (numery)
     - Zielone / żółte pole = oprogramowanie zainstalowane w danym laboratorium
     - KAŻDY import:
-        • usuwa poprzednie instalacje
-        • odtwarza stan dokładnie z Excela
+        • odtwarza stan instalacji dokładnie z Excela – zapisuje tylko różnicę
+          (nowe instalacje dodaje, nieobecne w arkuszu usuwa)
+        • przebudowuje powiązania laboratoriów z salami (LaboratoryRoom)
+        • przelicza liczniki stanowisk / licencji zmienionych programów
+        • renderuje statyczne kopie stron publicznych dla gości (prerender.py)
     """
     context = {}
 
@@ -92,13 +102,9 @@ def software_excel_import_view(request):
             else:
                 laboratories.append(None)
 
-        # 2) Nadpisujemy całość: czyścimy instalacje
-        SoftwareInstallation.objects.all().delete()
-
+        # 2) Wiersze z oprogramowaniem -> docelowy zestaw instalacji
         software_created = 0
-        installations_created = 0
-
-        # 3) Wiersze z oprogramowaniem
+        pairs = set()
         for row in rows[1:]:
             software_name = row[0].value
             if not software_name:
@@ -115,19 +121,30 @@ def software_excel_import_view(request):
                     continue
 
                 if _is_installed_cell(cell):
-                    SoftwareInstallation.objects.create(
-                        software=software,
-                        laboratory=lab,
-                        status="installed",
-                        updated_at=timezone.now(),
-                    )
-                    installations_created += 1
+                    pairs.add((software.pk, lab.pk))
+
+        # 3) Powiązania laboratoriów z salami z kart sprzętu
+        #    (odświeża też liczby stanowisk w laboratoriach)
+        rooms_linked = rebuild_laboratory_rooms()
+
+        # 4) Tylko różnica względem bazy + liczniki licencji zmienionych programów
+        installations_created, installations_removed, _ = sync_installations(pairs)
+
+        # 5) Statyczne kopie stron dla gości (błąd renderowania nie cofa importu)
+        try:
+            pages_rendered = prerender_public_pages()
+        except Exception:
+            logger.exception("Nie udało się wyrenderować stron publicznych")
+            pages_rendered = None
 
         context.update(
             {
                 "import_done": True,
                 "software_created": software_created,
                 "installations_created": installations_created,
+                "installations_removed": installations_removed,
+                "rooms_linked": rooms_linked,
+                "pages_rendered": pages_rendered,
             }
         )
 
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class EducationalSoftwareConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'educational_software'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from equipment.data_version import track_model
+
+        from .models import Building, Laboratory, Software, SoftwareInstallation
+
+        for model in (Building, Laboratory, Software, SoftwareInstallation):
+            track_model(model)
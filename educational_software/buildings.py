@@ -1,78 +1,112 @@
-# /var/www/baza/educational_software/buildings.py
+"""
+Budynki laboratoriów – dane z tabeli Building, trzymane w pamięci procesu.
+
+Budynków jest kilka i zmieniają się rzadko, więc ładujemy je raz
+i trzymamy w zmiennej modułu. Zmiana / usunięcie budynku (sygnały
+w signals.py) podbija wersję we wspólnym cache Django – każdy proces
+przy następnym sprawdzeniu widzi inną wersję i ładuje budynki od nowa.
+
+Wersję we wspólnym cache (w cache plikowym: otwarcie pliku i unpickle)
+sprawdzamy najwyżej raz na BUILDINGS_CHECK_SECONDS; pomiędzy – sam słownik
+w pamięci. Proces, który zmienił budynek, widzi zmianę od razu, pozostałe
+najpóźniej po tym czasie.
+"""
 
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+import time
+from typing import Dict, List
 
+from django.conf import settings
+from django.core.cache import cache
 
-# ============================================================
-# STAŁA MAPA BUDYNKÓW (nie pochodzi z Excela)
-# - Jeśli w przyszłości dojdzie nowe laboratorium w Excelu,
-#   a nie będzie na listach poniżej -> trafi do "INNE".
-# ============================================================
+from .models import Building
 
-# Uzupełnij listy numerami laboratoriów (takimi jak w Excelu, np. "033", "708", "k5", itp.)
-BUILDING_30: List[str] = [
-    # TODO: wpisz numery laboratoriów z Budynku 30
-]
 
-BUILDING_40: List[str] = [
-    # TODO: wpisz numery laboratoriów z Budynku 40
-]
+VERSION_KEY = "educational_software:buildings_version"
 
-# Laboratoria bez budynku / specjalne (np. "Lab Maszynowe 11")
-# Jeśli w Excelu to jest samo "11" -> wpisz "11"
-# Jeśli w Excelu jest tekst -> wpisz dokładnie ten tekst.
-SPECIAL_OTHER: List[str] = [
-    "Lab Maszynowe 11",
-    "11",
-]
+# Grupa dla laboratoriów bez przypisanego budynku
+OTHER_KEY = "Inne"
+OTHER_NAME = "Inne"
 
+_loaded = {"version": None, "buildings": None, "checked_until": 0.0}
+
+
+def _check_seconds() -> float:
+    return getattr(settings, "BUILDINGS_CHECK_SECONDS", 5)
 
-def normalize_lab_number(value: str) -> str:
-    """
-    Normalizacja numeru laboratorium (bez zmian semantycznych):
-    - trim
-    """
-    return (value or "").strip()
 
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # klucz mógł wypaść ze wspólnego cache – nowa, niepowtarzalna wersja
+        version = time.time_ns()
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY, version)
+    return version
 
-def lab_building_group(lab_number: str) -> str:
+
+def get_buildings() -> Dict[int, Building]:
     """
-    Zwraca nazwę grupy budynku:
-    - "BUDYNEK 30"
-    - "BUDYNEK 40"
-    - "INNE"
+    {id: Building} w kolejności sort_order (z pamięci procesu).
     """
-    n = normalize_lab_number(lab_number)
+    now = time.monotonic()
+    if _loaded["buildings"] is not None and now < _loaded["checked_until"]:
+        return _loaded["buildings"]
+
+    version = _current_version()
+    if _loaded["buildings"] is None or _loaded["version"] != version:
+        _loaded["buildings"] = {b.pk: b for b in Building.objects.order_by("sort_order", "name")}
+        _loaded["version"] = version
+    _loaded["checked_until"] = now + _check_seconds()
+    return _loaded["buildings"]
 
-    if n in SPECIAL_OTHER:
-        return "INNE"
 
-    if n in BUILDING_30:
-        return "BUDYNEK 30"
+def invalidate_buildings():
+    # świeża wartość zamiast cache.incr() (nieatomowy w cache plikowym)
+    _loaded["buildings"] = None
+    previous = cache.get(VERSION_KEY) or 0
+    cache.set(VERSION_KEY, max(time.time_ns(), previous + 1), None)
 
-    if n in BUILDING_40:
-        return "BUDYNEK 40"
 
-    return "INNE"
+def building_name(building_id) -> str:
+    building = get_buildings().get(building_id)
+    return building.name if building else OTHER_NAME
 
 
-def group_labs(labs: List[str]) -> Dict[str, List[str]]:
+def group_labs(labs) -> List[dict]:
     """
-    Grupuje listę laboratoriów do 3 sekcji.
-    Zwraca dict z kluczami: "BUDYNEK 30", "BUDYNEK 40", "INNE"
+    [(numer, building_id), ...] -> niepuste grupy w kolejności budynków,
+    „Inne” (bez budynku) na końcu:
+    [{"key", "name", "css_class", "labs": [...]}, ...]
     """
-    out: Dict[str, List[str]] = {"BUDYNEK 30": [], "BUDYNEK 40": [], "INNE": []}
-
-    for lab in labs:
-        n = normalize_lab_number(lab)
-        if not n:
+    buildings = get_buildings()
+    by_building: Dict[object, set] = {}
+    for number, building_id in labs:
+        if not number:
             continue
-        out[lab_building_group(n)].append(n)
-
-    # unikalne + sort
-    for k in out:
-        out[k] = sorted(set(out[k]))
-
-    return out
+        if building_id not in buildings:
+            building_id = None
+        by_building.setdefault(building_id, set()).add(number)
+
+    groups = []
+    for pk, building in buildings.items():
+        if pk in by_building:
+            groups.append(
+                {
+                    "key": building.key,
+                    "name": building.name,
+                    "css_class": building.css_class,
+                    "labs": sorted(by_building[pk]),
+                }
+            )
+    if None in by_building:
+        groups.append(
+            {
+                "key": OTHER_KEY,
+                "name": OTHER_NAME,
+                "css_class": "inne",
+                "labs": sorted(by_building[None]),
+            }
+        )
+    return groups
@@ -0,0 +1,238 @@
+"""
+Licencje na stanowisko – liczniki wykorzystania.
+
+Stanowisko = komputer (karta sprzętu) w sali laboratorium, w którym
+program jest zainstalowany. Liczniki są zdenormalizowane i odświeżane
+przyrostowo, tylko dla tego, co się zmieniło:
+
+    Laboratory.machine_count         <- LaboratoryRoom + Equipment (building, room)
+    SoftwareInstallation.seats       <- machine_count laboratorium
+    Software.lab_count / seats_used  <- suma instalacji programu
+    SoftwareBuildingUsage            <- to samo w podziale na budynki
+    LicencePool.seats_used / over_by <- suma programów w puli
+
+Dzięki temu raport „ponad licencję” (over_licence) to jedno zapytanie
+po indeksie LicencePool.over_by.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from equipment.models import Equipment
+
+from .models import (
+    Laboratory,
+    LaboratoryRoom,
+    LicencePool,
+    Software,
+    SoftwareBuildingUsage,
+    SoftwareInstallation,
+)
+
+
+def refresh_lab_machine_counts(lab_ids: Optional[Iterable[int]] = None) -> Set[int]:
+    """
+    Przelicza Laboratory.machine_count (None = wszystkich laboratoriów,
+    inaczej tylko `lab_ids`); zwraca id laboratoriów, którym licznik się zmienił.
+
+    Jedno zapytanie GROUP BY (building, room) zawężone do sal z LaboratoryRoom
+    tych laboratoriów.
+    """
+    lab_rooms = LaboratoryRoom.objects.all()
+    labs = Laboratory.objects.all()
+    if lab_ids is not None:
+        lab_ids = set(lab_ids)
+        if not lab_ids:
+            return set()
+        lab_rooms = lab_rooms.filter(laboratory_id__in=lab_ids)
+        labs = labs.filter(pk__in=lab_ids)
+
+    lab_rooms = list(lab_rooms.values_list("laboratory_id", "building", "room"))
+    counts = {}
+    if lab_rooms:
+        rows = (
+            Equipment.objects.filter(
+                building__in={b for _, b, _ in lab_rooms},
+                room__in={r for _, _, r in lab_rooms},
+            )
+            .values_list("building", "room")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        counts = {(building, room): count for building, room, count in rows}
+
+    per_lab = {}
+    for lab_id, building, room in lab_rooms:
+        per_lab[lab_id] = per_lab.get(lab_id, 0) + counts.get((building, room), 0)
+
+    changed = []
+    for lab in labs.only("pk", "machine_count"):
+        count = per_lab.get(lab.pk, 0)
+        if lab.machine_count != count:
+            lab.machine_count = count
+            changed.append(lab)
+    Laboratory.objects.bulk_update(changed, ["machine_count"], batch_size=500)
+    return {lab.pk for lab in changed}
+
+
+def refresh_pools(pool_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Przelicza seats_used / over_by pul (None = wszystkich). Zwraca liczbę pul.
+    """
+    pools = LicencePool.objects.all()
+    if pool_ids is not None:
+        pool_ids = {pk for pk in pool_ids if pk is not None}
+        if not pool_ids:
+            return 0
+        pools = pools.filter(pk__in=pool_ids)
+
+    used = dict(
+        Software.objects.filter(licence_pool__in=pools)
+        .values("licence_pool_id")
+        .annotate(total=Sum("seats_used"))
+        .order_by()
+        .values_list("licence_pool_id", "total")
+    )
+    pools = list(pools)
+    for pool in pools:
+        pool.seats_used = used.get(pool.pk) or 0
+        pool.over_by = pool.seats_used - pool.seats
+    LicencePool.objects.bulk_update(pools, ["seats_used", "over_by"])
+    return len(pools)
+
+
+def refresh_software_usage(software_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Przelicza liczniki programów (None = wszystkich) i ich pul licencji.
+    Zwraca liczbę przeliczonych programów.
+    """
+    software = Software.objects.all()
+    installations = SoftwareInstallation.objects.all()
+    if software_ids is not None:
+        software_ids = set(software_ids)
+        if not software_ids:
+            return 0
+        software = software.filter(pk__in=software_ids)
+        installations = installations.filter(software_id__in=software_ids)
+
+    with transaction.atomic():
+        installations.exclude(status="installed").update(seats=0)
+        installations.filter(status="installed").update(
+            seats=Subquery(
+                Laboratory.objects.filter(pk=OuterRef("laboratory_id")).values("machine_count")[:1]
+            )
+        )
+
+        installed = installations.filter(status="installed")
+        totals = {
+            row["software_id"]: row
+            for row in installed.values("software_id")
+            .annotate(labs=Count("id"), seats=Sum("seats"))
+            .order_by()
+        }
+        software = list(software.only("pk", "licence_pool_id", "lab_count", "seats_used"))
+        for item in software:
+            row = totals.get(item.pk, {})
+            item.lab_count = row.get("labs") or 0
+            item.seats_used = row.get("seats") or 0
+        Software.objects.bulk_update(software, ["lab_count", "seats_used"], batch_size=500)
+
+        usage = [
+            SoftwareBuildingUsage(
+                software_id=row["software_id"],
+                building_id=row["laboratory__building_id"],
+                lab_count=row["labs"],
+                seats=row["seats"] or 0,
+            )
+            for row in installed.values("software_id", "laboratory__building_id")
+            .annotate(labs=Count("id"), seats=Sum("seats"))
+            .order_by()
+        ]
+        stale = SoftwareBuildingUsage.objects.all()
+        if software_ids is not None:
+            stale = stale.filter(software_id__in=software_ids)
+        stale.delete()
+        SoftwareBuildingUsage.objects.bulk_create(usage, batch_size=1000)
+
+        refresh_pools(
+            None if software_ids is None else {item.licence_pool_id for item in software}
+        )
+    return len(software)
+
+
+def refresh_labs(lab_ids: Iterable[int]) -> int:
+    """
+    Po zmianie machine_count laboratoriów – przelicza programy w nich zainstalowane.
+    """
+    lab_ids = set(lab_ids)
+    if not lab_ids:
+        return 0
+    software_ids = set(
+        SoftwareInstallation.objects.filter(laboratory_id__in=lab_ids)
+        .values_list("software_id", flat=True)
+        .distinct()
+    )
+    return refresh_software_usage(software_ids)
+
+
+def sync_installations(pairs: Set[Tuple[int, int]]) -> Tuple[int, int, Set[int]]:
+    """
+    Ustawia stan instalacji dokładnie na `pairs` = {(software_id, laboratory_id)}:
+    dodaje brakujące, usuwa nadmiarowe, poprawia status na "installed".
+    Niezmienione wiersze zostają (razem z updated_at).
+
+    Zwraca (dodane, usunięte, id programów, których to dotyczy) – liczniki
+    tych programów są od razu przeliczane.
+    """
+    existing = {
+        (software_id, lab_id): (pk, status)
+        for pk, software_id, lab_id, status in SoftwareInstallation.objects.values_list(
+            "pk", "software_id", "laboratory_id", "status"
+        )
+    }
+    to_add = pairs - existing.keys()
+    removed = existing.keys() - pairs
+    fixed = {pair for pair in pairs & existing.keys() if existing[pair][1] != "installed"}
+    affected = {software_id for software_id, _ in to_add | removed | fixed}
+
+    to_remove = [existing[pair][0] for pair in removed]
+    to_fix = [existing[pair][0] for pair in fixed]
+
+    now = timezone.now()
+    with transaction.atomic():
+        SoftwareInstallation.objects.filter(pk__in=to_remove).delete()
+        SoftwareInstallation.objects.filter(pk__in=to_fix).update(status="installed", updated_at=now)
+        SoftwareInstallation.objects.bulk_create(
+            [
+                SoftwareInstallation(
+                    software_id=software_id,
+                    laboratory_id=lab_id,
+                    status="installed",
+                    updated_at=now,
+                )
+                for software_id, lab_id in to_add
+            ],
+            batch_size=1000,
+        )
+        refresh_software_usage(affected)
+    return len(to_add), len(to_remove), affected
+
+
+def refresh_all() -> int:
+    """
+    Pełne przeliczenie (komenda refresh_licence_usage).
+    """
+    refresh_lab_machine_counts()
+    return refresh_software_usage()
+
+
+def over_licence():
+    """
+    Pule z przekroczoną liczbą stanowisk – jedno zapytanie po indeksie over_by.
+    """
+    return LicencePool.objects.filter(over_by__gt=0).order_by("-over_by", "name")
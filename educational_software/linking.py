@@ -0,0 +1,195 @@
+"""
+Powiązanie laboratoriów (Laboratory.number, np. "033") z salami z kart
+sprzętu (Equipment.building + Equipment.room).
+
+Mapowanie jest wyliczane w całości po imporcie oprogramowania i po imporcie
+kart sprzętu, a przyrostowo (tylko dotknięte sale) po każdej innej zmianie
+sali kart – i zapisywane w tabeli LaboratoryRoom (razem z liczbą
+komputerów w laboratorium, zob. licences.py). Widoki łączą potem
+tabele po kolumnach z indeksami (building, room), zamiast porównywać
+napisy przy każdym żądaniu.
+"""
+
+from __future__ import annotations
+
+import re
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from equipment.models import Equipment
+
+from .licences import refresh_lab_machine_counts, refresh_labs
+from .models import Laboratory, LaboratoryRoom, Software, SoftwareInstallation
+
+
+_SPACES_RE = re.compile(r"\s+")
+_NON_DIGITS_RE = re.compile(r"\D")
+
+
+def room_key(value) -> str:
+    """
+    "033 " / "K5" / "029 C" -> "033" / "k5" / "029c".
+    """
+    return _SPACES_RE.sub("", str(value or "")).lower()
+
+
+def building_key(value) -> str:
+    """
+    "30" / "Bud. 30" / "B30" -> "30".
+    """
+    return _NON_DIGITS_RE.sub("", str(value or ""))
+
+
+def lab_room_keys(number: str) -> set:
+    """
+    Klucze sal dla numeru laboratorium:
+    "k5/k7" -> {"k5", "k7"}, "Lab Maszynowe 11" -> {"11"}.
+    """
+    keys = set()
+    for part in re.split(r"[/,;]", str(number or "")):
+        part = part.strip()
+        if not part:
+            continue
+        if " " in part:
+            part = part.rsplit(" ", 1)[1]
+        keys.add(room_key(part))
+    return keys
+
+
+def _links(pairs) -> list:
+    """
+    Powiązania LaboratoryRoom dla sal `pairs` = [(building, room), ...].
+
+    Laboratorium z przypisanym budynkiem (Laboratory.building) łączymy tylko
+    z salami w tym budynku; bez budynku („Inne”) – z salą o tym numerze w dowolnym.
+    """
+    rooms_by_key = {}
+    for building, room in pairs:
+        rooms_by_key.setdefault(room_key(room), []).append((building, room))
+
+    links = []
+    for lab in Laboratory.objects.select_related("building"):
+        lab_building = building_key(lab.building.number) if lab.building else ""
+        for key in lab_room_keys(lab.number):
+            for building, room in rooms_by_key.get(key, ()):
+                if lab_building and building_key(building) != lab_building:
+                    continue
+                links.append(LaboratoryRoom(laboratory=lab, building=building, room=room))
+    return links
+
+
+def _rooms_condition(rooms) -> Q:
+    condition = Q()
+    for building, room in rooms:
+        condition |= Q(building=building, room=room)
+    return condition
+
+
+def rebuild_laboratory_rooms() -> int:
+    """
+    Przebudowuje całą tabelę LaboratoryRoom. Zwraca liczbę powiązań.
+
+    Sale z kart: jedno zapytanie DISTINCT (building, room) po indeksie.
+    """
+    pairs = (
+        Equipment.objects.exclude(room="")
+        .values_list("building", "room")
+        .distinct()
+        .order_by()
+    )
+    links = _links(pairs)
+
+    with transaction.atomic():
+        LaboratoryRoom.objects.all().delete()
+        LaboratoryRoom.objects.bulk_create(links, batch_size=1000, ignore_conflicts=True)
+        # inne sale / inne karty w salach -> inne liczby stanowisk
+        refresh_labs(refresh_lab_machine_counts())
+    return len(links)
+
+
+def refresh_laboratory_rooms(rooms) -> int:
+    """
+    Przyrostowa wersja rebuild_laboratory_rooms() dla kilku sal
+    (building, room), w których przybyło lub ubyło kart – po edycji karty,
+    akcji admina czy edycji hurtowej (sygnał equipment_rooms_changed).
+
+    Powiązania tych sal są liczone od nowa (sala mogła się opróżnić albo
+    pojawić), a liczniki stanowisk – tylko dla laboratoriów powiązanych
+    z tymi salami; programy – dla laboratoriów, którym licznik się zmienił.
+    Zwraca liczbę powiązań tych sal.
+    """
+    rooms = {(building, room) for building, room in rooms if room}
+    if not rooms:
+        return 0
+    condition = _rooms_condition(rooms)
+    occupied = (
+        Equipment.objects.filter(condition)
+        .values_list("building", "room")
+        .distinct()
+        .order_by()
+    )
+    links = _links(occupied)
+
+    with transaction.atomic():
+        stale = LaboratoryRoom.objects.filter(condition)
+        lab_ids = set(stale.values_list("laboratory_id", flat=True))
+        lab_ids |= {link.laboratory_id for link in links}
+        stale.delete()
+        LaboratoryRoom.objects.bulk_create(links, batch_size=1000, ignore_conflicts=True)
+        # tylko laboratoria tych sal (przed i po zmianie)
+        refresh_labs(refresh_lab_machine_counts(lab_ids))
+    return len(links)
+
+
+def _equipment_in_rooms(rooms):
+    """
+    Karty w podanych salach: WHERE (building, room) = ... OR ... –
+    po indeksie Equipment(building, room). Sal jest kilka–kilkanaście.
+    """
+    condition = _rooms_condition(set(rooms.values_list("building", "room")))
+    if not condition:
+        return Equipment.objects.none()
+    return Equipment.objects.filter(condition)
+
+
+def equipment_for_software(software: Software):
+    """
+    Karty sprzętu w salach laboratoriów, w których zainstalowano program.
+    """
+    labs = SoftwareInstallation.objects.filter(
+        software=software, status="installed"
+    ).values("laboratory")
+    return _equipment_in_rooms(LaboratoryRoom.objects.filter(laboratory__in=labs))
+
+
+def equipment_for_laboratory(laboratory: Laboratory):
+    return _equipment_in_rooms(LaboratoryRoom.objects.filter(laboratory=laboratory))
+
+
+def software_for_equipment(equipment):
+    """
+    Programy zainstalowane w laboratorium (laboratoriach) sali tej karty.
+    """
+    if not equipment.room:
+        return Software.objects.none()
+    labs = LaboratoryRoom.objects.filter(
+        building=equipment.building, room=equipment.room
+    ).values("laboratory")
+    return Software.objects.filter(
+        Exists(
+            SoftwareInstallation.objects.filter(
+                software=OuterRef("pk"),
+                status="installed",
+                laboratory__in=labs,
+            )
+        )
+    ).order_by("name")
+
+
+def laboratories_for_equipment(equipment):
+    if not equipment.room:
+        return Laboratory.objects.none()
+    return Laboratory.objects.filter(
+        rooms__building=equipment.building, rooms__room=equipment.room
+    ).distinct()
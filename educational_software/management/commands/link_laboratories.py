@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from educational_software.linking import rebuild_laboratory_rooms
+
+
+class Command(BaseCommand):
+    help = (
+        "Przebudowuje powiązania laboratoriów z salami kart sprzętu "
+        "(robione automatycznie po imporcie oprogramowania i kart)."
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_laboratory_rooms()
+        self.stdout.write(self.style.SUCCESS(f"Powiązań laboratorium -> sala: {count}"))
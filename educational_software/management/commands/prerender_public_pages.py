@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from educational_software.prerender import brotli, pages_dir, prerender_public_pages
+
+
+class Command(BaseCommand):
+    help = (
+        "Renderuje publiczne strony oprogramowania (lista, programy, laboratoria) "
+        "do plików HTML/gzip/brotli dla gości (robione automatycznie po imporcie oprogramowania)."
+    )
+
+    def handle(self, *args, **options):
+        count = prerender_public_pages()
+        variants = "html, gz" + (", br" if brotli is not None else "")
+        self.stdout.write(self.style.SUCCESS(f"Strony: {count} ({variants}) -> {pages_dir()}"))
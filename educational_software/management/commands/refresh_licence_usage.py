@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from educational_software.licences import over_licence, refresh_all
+
+
+class Command(BaseCommand):
+    help = (
+        "Pełne przeliczenie liczników stanowisk i pul licencji "
+        "(normalnie odświeżane przyrostowo po imporcie oprogramowania i kart)."
+    )
+
+    def handle(self, *args, **options):
+        count = refresh_all()
+        over = list(over_licence())
+        self.stdout.write(self.style.SUCCESS(f"Przeliczone programy: {count}"))
+        for pool in over:
+            self.stdout.write(
+                self.style.WARNING(f"Ponad licencję: {pool.name} – {pool.seats_used}/{pool.seats}")
+            )
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+
+from equipment.guest import is_guest
+
+from .prerender import ENCODINGS, URL_PREFIX, page_file, pages_current
+
+
+class PrerenderedPagesMiddleware:
+    """
+    Gość (podpisane ciasteczko z equipment.guest) dostaje publiczne strony
+    oprogramowania z plików prerender_public_pages – bez sesji i bez ORM.
+    Brak pliku (nowy program przed kolejnym renderowaniem), kopie
+    nieaktualne po zmianach w panelu (prerender.pages_current), zapytanie
+    z parametrami (?q=...) albo zwykły użytkownik -> zwykły widok.
+
+    Włączane ustawieniem EQUIPMENT_PUBLIC_PAGES_SERVE; stoi przed
+    SessionMiddleware, więc obsłużone żądanie nie dotyka sesji.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "EQUIPMENT_PUBLIC_PAGES_SERVE", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            request.method in ("GET", "HEAD")
+            and not request.META.get("QUERY_STRING")
+            and request.path_info.startswith(URL_PREFIX)
+            and is_guest(request)
+            and pages_current()
+        ):
+            response = self._serve(request)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def _serve(self, request):
+        target = page_file(request.path_info)
+        accepted = {
+            part.split(";", 1)[0].strip().lower()
+            for part in request.META.get("HTTP_ACCEPT_ENCODING", "").split(",")
+        }
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted:
+                try:
+                    data = target.with_name(target.name + suffix).read_bytes()
+                except OSError:
+                    continue
+                return self._response(data, encoding)
+        try:
+            return self._response(target.read_bytes(), None)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _response(data, encoding):
+        response = HttpResponse(data, content_type="text/html; charset=utf-8")
+        if encoding:
+            response["Content-Encoding"] = encoding
+        response["Vary"] = "Accept-Encoding, Cookie"
+        response["Cache-Control"] = "private, no-cache"
+        response["X-Frame-Options"] = "DENY"
+        return response
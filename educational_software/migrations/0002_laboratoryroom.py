@@ -0,0 +1,27 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('educational_software', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LaboratoryRoom',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('building', models.CharField(max_length=100)),
+                ('room', models.CharField(max_length=100)),
+                ('laboratory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rooms', to='educational_software.laboratory')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['building', 'room'], name='educational_buildin_74572d_idx')],
+                'unique_together': {('laboratory', 'building', 'room')},
+            },
+        ),
+    ]
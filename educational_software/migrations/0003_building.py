@@ -0,0 +1,32 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('educational_software', '0002_laboratoryroom'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Building',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.SlugField(max_length=32, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('number', models.CharField(blank=True, default='', max_length=32)),
+                ('sort_order', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['sort_order', 'name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='laboratory',
+            name='building',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='laboratories', to='educational_software.building'),
+        ),
+    ]
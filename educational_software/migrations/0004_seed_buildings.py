@@ -0,0 +1,98 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:16
+
+import re
+from urllib.parse import unquote
+
+from django.db import migrations
+
+
+# Dotychczasowa stała mapa z educational_software/views.py
+BUILDINGS = [
+    ("Budynek_30", "Budynek 30", "30", 1, [
+        "159", "163", "416", "500", "501", "521", "701A", "708", "k5/k7",
+    ]),
+    ("Budynek_40", "Budynek 40", "40", 2, [
+        "029C", "033", "136", "303", "321", "511", "514", "505",
+    ]),
+]
+
+
+def _normalize_lab_number(value):
+    value = unquote(str(value or "")).strip()
+    if "(" in value:
+        value = value.split("(", 1)[0].strip()
+    return value
+
+
+# Kopie educational_software.linking.room_key / building_key / lab_room_keys –
+# migracja nie importuje kodu aplikacji (może się zmienić po jej zastosowaniu).
+def _room_key(value):
+    return re.sub(r"\s+", "", str(value or "")).lower()
+
+
+def _building_key(value):
+    return re.sub(r"\D", "", str(value or ""))
+
+
+def _lab_room_keys(number):
+    keys = set()
+    for part in re.split(r"[/,;]", str(number or "")):
+        part = part.strip()
+        if not part:
+            continue
+        if " " in part:
+            part = part.rsplit(" ", 1)[1]
+        keys.add(_room_key(part))
+    return keys
+
+
+def seed_buildings(apps, schema_editor):
+    Building = apps.get_model("educational_software", "Building")
+    Laboratory = apps.get_model("educational_software", "Laboratory")
+    Equipment = apps.get_model("equipment", "Equipment")
+
+    # sale z kart (klucz budynku, klucz sali) – jak w rebuild_laboratory_rooms
+    rooms = {
+        (_building_key(building), _room_key(room))
+        for building, room in Equipment.objects.exclude(room="")
+        .values_list("building", "room")
+        .distinct()
+        .order_by()
+    }
+
+    lab_to_building = {}
+    for key, name, number, order, labs in BUILDINGS:
+        building, _ = Building.objects.get_or_create(
+            key=key,
+            defaults={"name": name, "number": number, "sort_order": order},
+        )
+        for lab in labs:
+            lab_to_building[lab] = building
+            # laboratoria, których jeszcze nie ma (import ich nie utworzył),
+            # zakładamy tylko wtedy, gdy w tym budynku są karty w tej sali –
+            # czyli gdy przebudowa LaboratoryRoom i tak by je powiązała
+            if any((_building_key(number), room) in rooms for room in _lab_room_keys(lab)):
+                Laboratory.objects.get_or_create(number=lab)
+
+    for lab in Laboratory.objects.all():
+        building = lab_to_building.get(_normalize_lab_number(lab.number))
+        if building is not None and lab.building_id != building.pk:
+            lab.building = building
+            lab.save(update_fields=["building"])
+
+
+def unseed_buildings(apps, schema_editor):
+    Building = apps.get_model("educational_software", "Building")
+    Building.objects.filter(key__in=[b[0] for b in BUILDINGS]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('educational_software', '0003_building'),
+        ('equipment', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_buildings, unseed_buildings),
+    ]
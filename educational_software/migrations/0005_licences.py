@@ -0,0 +1,72 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('educational_software', '0004_seed_buildings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LicencePool',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('seats', models.PositiveIntegerField(verbose_name='Liczba stanowisk')),
+                ('valid_until', models.DateField(blank=True, null=True, verbose_name='Ważna do')),
+                ('notes', models.TextField(blank=True, default='')),
+                ('seats_used', models.PositiveIntegerField(default=0, editable=False, verbose_name='Wykorzystane')),
+                ('over_by', models.IntegerField(db_index=True, default=0, editable=False, verbose_name='Przekroczenie')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='laboratory',
+            name='machine_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='software',
+            name='lab_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='software',
+            name='seats_used',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='software',
+            name='version',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='softwareinstallation',
+            name='seats',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='software',
+            name='licence_pool',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='software', to='educational_software.licencepool'),
+        ),
+        migrations.CreateModel(
+            name='SoftwareBuildingUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lab_count', models.PositiveIntegerField(default=0)),
+                ('seats', models.PositiveIntegerField(default=0)),
+                ('building', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='educational_software.building')),
+                ('software', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='building_usage', to='educational_software.software')),
+            ],
+            options={
+                'unique_together': {('software', 'building')},
+            },
+        ),
+    ]
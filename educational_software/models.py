@@ -1,5 +1,32 @@
 from django.db import models
 
+from equipment.data_version import VersionedQuerySet
+
+
+class Building(models.Model):
+    """
+    Budynek, do którego przypisujemy laboratoria (grupy na listach oprogramowania).
+    Laboratorium bez budynku trafia do grupy „Inne”.
+    """
+    key = models.SlugField(max_length=32, unique=True)  # np. "Budynek_30"
+    name = models.CharField(max_length=100)              # np. "Budynek 30"
+    # numer budynku jak w kartach sprzętu (Equipment.building) – do łączenia sal
+    number = models.CharField(max_length=32, blank=True, default="")
+    sort_order = models.PositiveIntegerField(default=0)
+
+    objects = VersionedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["sort_order", "name"]
+
+    def __str__(self) -> str:
+        return self.name
+
+    @property
+    def css_class(self) -> str:
+        # "Budynek_30" -> "b30" (klasy b30 / b40 w szablonach list)
+        return self.key.lower().replace("budynek_", "b")
+
 
 class Laboratory(models.Model):
     """
@@ -8,6 +35,18 @@ class Laboratory(models.Model):
     """
     number = models.CharField(max_length=32, unique=True)
     has_space_mouse = models.BooleanField(default=False)
+    building = models.ForeignKey(
+        Building,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="laboratories",
+    )
+    # liczba komputerów w salach laboratorium (LaboratoryRoom) – licznik
+    # odświeżany przez licences.refresh_lab_machine_counts()
+    machine_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = VersionedQuerySet.as_manager()
 
     class Meta:
         ordering = ["number"]
@@ -21,11 +60,55 @@ class Laboratory(models.Model):
         return f"{self.number} (SpaceMouse)" if self.has_space_mouse else self.number
 
 
+class LicencePool(models.Model):
+    """
+    Pula licencji (płatne za stanowisko) – może obejmować kilka pozycji
+    oprogramowania (np. kolejne wersje tego samego programu).
+    seats_used / over_by są liczone przez licences.refresh_pools().
+    """
+    name = models.CharField(max_length=255, unique=True)
+    seats = models.PositiveIntegerField("Liczba stanowisk")
+    valid_until = models.DateField("Ważna do", null=True, blank=True)
+    notes = models.TextField(blank=True, default="")
+
+    seats_used = models.PositiveIntegerField("Wykorzystane", default=0, editable=False)
+    # seats_used - seats; > 0 = przekroczenie (raport "ponad licencję")
+    over_by = models.IntegerField("Przekroczenie", default=0, editable=False, db_index=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self) -> str:
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.over_by = self.seats_used - self.seats
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and ("seats" in update_fields or "seats_used" in update_fields):
+            kwargs["update_fields"] = set(update_fields) | {"over_by"}
+        super().save(*args, **kwargs)
+
+
 class Software(models.Model):
     """
     Oprogramowanie z kolumny A.
     """
     name = models.CharField(max_length=255, unique=True)
+    version = models.CharField(max_length=64, blank=True, default="")
+    licence_pool = models.ForeignKey(
+        LicencePool,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="software",
+    )
+
+    # liczniki (licences.refresh_software_usage)
+    lab_count = models.PositiveIntegerField(default=0, editable=False)
+    seats_used = models.PositiveIntegerField(default=0, editable=False)
+
+    # zbiorcze zapisy podbijają wersję danych (cache fragmentów list)
+    objects = VersionedQuerySet.as_manager()
 
     class Meta:
         ordering = ["name"]
@@ -49,6 +132,10 @@ class SoftwareInstallation(models.Model):
     laboratory = models.ForeignKey(Laboratory, on_delete=models.CASCADE)
     status = models.CharField(max_length=32, choices=STATUS_CHOICES, default="installed")
     updated_at = models.DateTimeField(auto_now=True)
+    # = laboratory.machine_count w chwili ostatniego przeliczenia
+    seats = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = VersionedQuerySet.as_manager()
 
     class Meta:
         unique_together = ("software", "laboratory")
@@ -58,4 +145,41 @@ class SoftwareInstallation(models.Model):
         ]
 
     def __str__(self) -> str:
-        return f"{self.software} @ {self.laboratory}"
\ No newline at end of file
+        return f"{self.software} @ {self.laboratory}"
+
+class LaboratoryRoom(models.Model):
+    """
+    Powiązanie laboratorium z salą z kart sprzętu (Equipment.building + room).
+    Tabela wyliczana – przebudowywana po imporcie oprogramowania
+    i po imporcie kart sprzętu (linking.rebuild_laboratory_rooms), a dla
+    pojedynczych sal po innych zmianach kart (linking.refresh_laboratory_rooms).
+    """
+    laboratory = models.ForeignKey(Laboratory, on_delete=models.CASCADE, related_name="rooms")
+    building = models.CharField(max_length=100)
+    room = models.CharField(max_length=100)
+
+    class Meta:
+        unique_together = ("laboratory", "building", "room")
+        indexes = [
+            models.Index(fields=["building", "room"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.laboratory} -> {self.building}/{self.room}"
+
+
+class SoftwareBuildingUsage(models.Model):
+    """
+    Zestawienie per program i budynek: liczba laboratoriów i stanowisk.
+    building = NULL -> laboratoria bez budynku („Inne”).
+    """
+    software = models.ForeignKey(Software, on_delete=models.CASCADE, related_name="building_usage")
+    building = models.ForeignKey(Building, on_delete=models.CASCADE, null=True, blank=True)
+    lab_count = models.PositiveIntegerField(default=0)
+    seats = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("software", "building")
+
+    def __str__(self) -> str:
+        return f"{self.software} @ {self.building or 'Inne'}: {self.seats}"
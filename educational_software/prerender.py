@@ -0,0 +1,207 @@
+"""
+Statyczne kopie publicznych stron oprogramowania dla gości.
+
+prerender_public_pages() renderuje listę programów, strony programów
+i strony laboratoriów tak, jak widzi je gość (bez kart sprzętu), i zapisuje
+je w EQUIPMENT_PUBLIC_PAGES_DIR jako <sha1(ścieżki)>.html (+ .html.gz,
++ .html.br gdy jest zainstalowany pakiet `brotli`).
+
+Middleware PrerenderedPagesMiddleware (włączane EQUIPMENT_PUBLIC_PAGES_SERVE)
+odpowiada gościom z tych plików – bez sesji i bez zapytań do bazy.
+Strony są odświeżane po każdym imporcie oprogramowania i komendą
+prerender_public_pages (cron).
+
+Nieaktualne kopie: zapis / usunięcie budynku, laboratorium, programu albo
+instalacji (np. w panelu administracyjnym) podbija wersję stron
+(invalidate_public_pages(), sygnały w signals.py). Renderowanie zapisuje
+w VERSION_FILE wersję, dla której powstały pliki; gdy różni się od bieżącej,
+middleware podaje zwykły widok aż do kolejnego renderowania.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.base import SessionBase
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.urls import resolve, reverse
+
+from equipment.guest import GUEST_COOKIE, guest_cookie_value
+
+from .models import Laboratory, Software
+
+try:
+    import brotli
+except ImportError:  # brotli jest opcjonalne
+    brotli = None
+
+
+# Przedrostek ścieżek obsługiwanych przez middleware
+URL_PREFIX = "/baza/oprogramowanie/"
+
+# Wersja danych stron publicznych (wspólny cache) i plik z wersją wyrenderowanych kopii
+VERSION_KEY = "educational_software:public_pages_version"
+VERSION_FILE = "version.txt"
+
+ENCODINGS = (
+    # (Content-Encoding, rozszerzenie pliku)
+    ("br", ".br"),
+    ("gzip", ".gz"),
+)
+
+
+def pages_dir() -> Path:
+    return Path(
+        getattr(
+            settings,
+            "EQUIPMENT_PUBLIC_PAGES_DIR",
+            Path(settings.BASE_DIR) / "var" / "public_pages",
+        )
+    )
+
+
+def page_file(path: str) -> Path:
+    """
+    Plik strony dla ścieżki URL (po zdekodowaniu, jak request.path_info).
+    """
+    return pages_dir() / (hashlib.sha1(path.encode("utf-8")).hexdigest() + ".html")
+
+
+def pages_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # klucz mógł wypaść ze wspólnego cache – nowa wersja, kopie są nieaktualne
+        version = time.time_ns()
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def invalidate_public_pages():
+    previous = cache.get(VERSION_KEY) or 0
+    cache.set(VERSION_KEY, max(time.time_ns(), previous + 1), None)
+
+
+def rendered_version():
+    try:
+        return int((pages_dir() / VERSION_FILE).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def pages_current() -> bool:
+    """
+    Czy pliki stron powstały dla bieżącej wersji danych.
+    """
+    return rendered_version() == pages_version()
+
+
+def public_paths():
+    """
+    Ścieżki publicznych stron: lista, programy, laboratoria.
+    """
+    yield reverse("educational_software:software_list")
+    for pk in Software.objects.order_by("pk").values_list("pk", flat=True):
+        yield reverse("educational_software:software_detail", args=[pk])
+    for number in Laboratory.objects.order_by("number").values_list("number", flat=True):
+        if str(number).strip():
+            yield unquote(reverse("educational_software:laboratory_detail", args=[number]))
+
+
+class _MemorySession(SessionBase):
+    """
+    Pusta sesja tylko w pamięci – nic nie jest zapisywane.
+    """
+
+    def exists(self, session_key):
+        return False
+
+    def create(self):
+        pass
+
+    def save(self, must_create=False):
+        pass
+
+    def delete(self, session_key=None):
+        pass
+
+    def load(self):
+        return {}
+
+
+def _guest_request(path: str) -> HttpRequest:
+    request = HttpRequest()
+    request.method = "GET"
+    request.path = request.path_info = path
+    request.META = {
+        "SERVER_NAME": getattr(settings, "EQUIPMENT_PUBLIC_PAGES_HOST", "localhost"),
+        "SERVER_PORT": "80",
+        "REQUEST_METHOD": "GET",
+    }
+    request.COOKIES = {GUEST_COOKIE: guest_cookie_value()}
+    request.user = AnonymousUser()
+    request.session = _MemorySession()
+    request.resolver_match = resolve(path)
+    # strony publiczne nie mają formularzy POST – token CSRF nie jest potrzebny
+    request._dont_enforce_csrf_checks = True
+    return request
+
+
+def render_page(path: str) -> bytes:
+    request = _guest_request(path)
+    match = request.resolver_match
+    response = match.func(request, *match.args, **match.kwargs)
+    if response.status_code != 200:
+        raise ValueError(f"{path}: HTTP {response.status_code}")
+    return response.content
+
+
+def _write(target: Path, data: bytes):
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    tmp.replace(target)
+
+
+def write_page(path: str, content: bytes) -> Path:
+    target = page_file(path)
+    _write(target, content)
+    _write(target.with_name(target.name + ".gz"), gzip.compress(content, compresslevel=9))
+    br = target.with_name(target.name + ".br")
+    if brotli is not None:
+        _write(br, brotli.compress(content))
+    else:
+        br.unlink(missing_ok=True)
+    return target
+
+
+def prerender_public_pages() -> int:
+    """
+    Renderuje wszystkie publiczne strony; usuwa pliki stron, których już nie ma.
+    Zwraca liczbę zapisanych stron.
+
+    Wersja jest odczytywana przed renderowaniem – zmiana w trakcie zostawia
+    kopie oznaczone jako nieaktualne.
+    """
+    pages_dir().mkdir(parents=True, exist_ok=True)
+    version = pages_version()
+
+    written = set()
+    for path in public_paths():
+        target = write_page(path, render_page(path))
+        written.add(target.name)
+
+    for p in pages_dir().glob("*.html*"):
+        base = p.name.split(".html", 1)[0] + ".html"
+        if base not in written:
+            p.unlink(missing_ok=True)
+    _write(pages_dir() / VERSION_FILE, str(version).encode("ascii"))
+    return len(written)
@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from equipment.signals import equipment_imported, equipment_rooms_changed
+
+from .buildings import invalidate_buildings
+from .linking import rebuild_laboratory_rooms, refresh_laboratory_rooms
+from .models import Building, Laboratory, Software, SoftwareInstallation
+from .prerender import invalidate_public_pages
+
+
+@receiver(equipment_imported, dispatch_uid="educational_software_rebuild_laboratory_rooms")
+def rebuild_rooms_after_equipment_import(sender, **kwargs):
+    # nowe / przeniesione karty mogą zmienić zestaw sal (building, room)
+    rebuild_laboratory_rooms()
+
+
+@receiver(equipment_rooms_changed, dispatch_uid="educational_software_refresh_laboratory_rooms")
+def refresh_rooms_after_equipment_change(sender, rooms, **kwargs):
+    # karty przeniesione / dodane / usunięte poza importem – tylko te sale
+    refresh_laboratory_rooms(rooms)
+
+
+@receiver(post_save, sender=Building, dispatch_uid="educational_software_building_saved")
+@receiver(post_delete, sender=Building, dispatch_uid="educational_software_building_deleted")
+def building_changed(sender, **kwargs):
+    invalidate_buildings()
+
+
+def _public_data_changed(sender, **kwargs):
+    # po COMMIT – renderowanie w trakcie transakcji widziałoby stare dane
+    transaction.on_commit(invalidate_public_pages)
+
+
+for _model in (Building, Laboratory, Software, SoftwareInstallation):
+    post_save.connect(
+        _public_data_changed, sender=_model,
+        dispatch_uid=f"educational_software_public_pages:{_model.__name__}:save",
+    )
+    post_delete.connect(
+        _public_data_changed, sender=_model,
+        dispatch_uid=f"educational_software_public_pages:{_model.__name__}:delete",
+    )
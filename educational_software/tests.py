@@ -1,3 +1,60 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from equipment.history import update_with_history
+from equipment.models import Equipment
+
+from .buildings import get_buildings
+from .models import Building, Laboratory, LaboratoryRoom
+
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BuildingsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_shared_version_checked_once_per_interval(self):
+        get_buildings()
+        with mock.patch("educational_software.buildings.cache") as shared:
+            for _ in range(10):
+                get_buildings()
+        shared.get.assert_not_called()
+
+    def test_change_in_this_process_is_visible_at_once(self):
+        get_buildings()
+        building = Building.objects.create(key="Budynek_50", name="Budynek 50", number="50")
+        self.assertIn(building.pk, get_buildings())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RefreshLaboratoryRoomsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        building = Building.objects.get(key="Budynek_40")
+        self.lab = Laboratory.objects.create(number="033", building=building)
+        # licznik innego laboratorium celowo nieaktualny – przyrostowe
+        # odświeżenie nie może go ruszyć
+        self.other = Laboratory.objects.create(number="321", building=building, machine_count=99)
+        self.card = Equipment.objects.create(inventory_number="T-1", building="40", room="100")
+
+    def _move(self, room):
+        with self.captureOnCommitCallbacks(execute=True):
+            update_with_history(Equipment.objects.filter(pk=self.card.pk), {"room": room})
+        self.lab.refresh_from_db()
+        self.other.refresh_from_db()
+
+    def test_move_into_and_out_of_lab_room(self):
+        self._move("033")
+        self.assertEqual(self.lab.machine_count, 1)
+        self.assertTrue(LaboratoryRoom.objects.filter(laboratory=self.lab, building="40", room="033").exists())
+        self.assertEqual(self.other.machine_count, 99)
+
+        self._move("100")
+        self.assertEqual(self.lab.machine_count, 0)
+        self.assertFalse(LaboratoryRoom.objects.filter(laboratory=self.lab).exists())
+        self.assertEqual(self.other.machine_count, 99)
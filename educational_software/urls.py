@@ -5,6 +5,7 @@ from .views import (
     software_detail_view,
     laboratory_detail_view,
     software_suggest_view,
+    licence_report_view,
 )
 from .admin_views import software_excel_import_view
 
@@ -17,6 +18,9 @@ urlpatterns = [
     # /baza/oprogramowanie/suggest/
     path("suggest/", software_suggest_view, name="software_suggest"),
 
+    # /baza/oprogramowanie/licencje/
+    path("licencje/", licence_report_view, name="licence_report"),
+
     # /baza/oprogramowanie/<id>/
     path("<int:software_id>/", software_detail_view, name="software_detail"),
 
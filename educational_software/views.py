@@ -3,133 +3,99 @@ from urllib.parse import unquote
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, render
 
-from .models import Laboratory, Software, SoftwareInstallation
+from equipment.data_version import lazy
+from equipment.decorators import login_required_no_next
+from equipment.guest import is_guest
 
+from .buildings import OTHER_NAME, building_name, get_buildings, group_labs
+from .licences import over_licence
+from .linking import equipment_for_laboratory, equipment_for_software
+from .models import LicencePool, Laboratory, Software, SoftwareBuildingUsage, SoftwareInstallation
 
-# =========================
-# STAŁA MAPA BUDYNKÓW
-# =========================
 
-BUILDING_40 = {
-    "029C",
-    "033",
-    "136",
-    "303",
-    "321",
-    "511",
-    "514",
-    "505",  # 505 -> Budynek 40
-}
-
-BUILDING_30 = {
-    "159",
-    "163",
-    "416",
-    "500",
-    "501",
-    "521",
-    "701A",
-    "708",
-    "k5/k7",
-}
-
-OTHER_LABS = {
-    "Lab Maszynowe 11",
-}
-
-
-def _normalize_lab_number(value: str) -> str:
-    if not value:
-        return ""
-    value = unquote(str(value)).strip()
-    if "(" in value:
-        value = value.split("(", 1)[0].strip()
-    return value
-
-
-def get_building(lab_number: str) -> str:
+MACHINE_FIELDS = (
+    "pk",
+    "inventory_number",
+    "equipment_name",
+    "building",
+    "room",
+    "hostname",
+    "ip_address",
+)
+
+
+def _machines(request, queryset):
     """
-    Zwraca klucz grupy: Budynek_30 / Budynek_40 / Inne
-    (bez spacji — zgodne z szablonem g.Budynek_30, g.Budynek_40)
+    Karty sprzętu – tylko dla zalogowanych (nie gości); inaczej nic nie liczymy.
     """
-    raw = unquote(str(lab_number)).strip()
-    norm = _normalize_lab_number(raw)
-
-    if raw in OTHER_LABS or norm in OTHER_LABS:
-        return "Inne"
-    if norm in BUILDING_40:
-        return "Budynek_40"
-    if norm in BUILDING_30:
-        return "Budynek_30"
+    if not request.user.is_authenticated or is_guest(request):
+        return []
+    return list(queryset.order_by("building", "room", "inventory_number").only(*MACHINE_FIELDS))
 
-    # nowe / nieznane laboratoria -> Inne
-    return "Inne"
 
+# =========================
+# LABORATORIA -> BUDYNKI
+# (budynek z Laboratory.building, nazwy z buildings.get_buildings())
+# =========================
 
-def _labs_for_software(software: Software) -> list[str]:
-    qs = (
-        SoftwareInstallation.objects.filter(software=software, status="installed")
-        .select_related("laboratory")
+def _installed_labs(software_ids):
+    """
+    {software_id: [(numer_lab, building_id), ...]} – jedno zapytanie z JOIN
+    do laboratoriów dla wszystkich podanych programów.
+    """
+    rows = (
+        SoftwareInstallation.objects.filter(software_id__in=software_ids, status="installed")
+        .values_list("software_id", "laboratory__number", "laboratory__building_id")
     )
-    labs = []
-    for x in qs:
-        if x.laboratory and x.laboratory.number:
-            labs.append(str(x.laboratory.number).strip())
-    return sorted(set(labs))
+    labs = {}
+    for software_id, number, building_id in rows:
+        labs.setdefault(software_id, []).append((str(number).strip(), building_id))
+    return labs
 
 
-def _group_labs_by_building(labs: list[str]) -> dict:
-    grouped = {
-        "Budynek_30": [],
-        "Budynek_40": [],
-        "Inne": [],
-    }
-    for lab in labs:
-        grouped[get_building(lab)].append(lab)
-
-    for k in grouped:
-        grouped[k] = sorted(grouped[k])
-
-    return grouped
-
-
-def software_list_view(request):
-    q = request.GET.get("q", "").strip()
-
+def _software_items(q):
     qs = Software.objects.all().order_by("name")
     if q:
         qs = qs.filter(name__icontains=q)
 
+    softwares = list(qs.only("id", "name"))
+    labs = _installed_labs([s.id for s in softwares])
+
     items = []
-    for s in qs:
-        labs = _labs_for_software(s)
-        grouped = _group_labs_by_building(labs)
+    for s in softwares:
         items.append(
             {
                 "id": s.id,
                 "name": s.name,
-                "grouped_labs": grouped,
+                "lab_groups": group_labs(labs.get(s.id, ())),
             }
         )
+    return items
+
+
+def software_list_view(request):
+    q = request.GET.get("q", "").strip()
 
     return render(
         request,
         "educational_software/software_list.html",
-        {"items": items, "q": q},
+        # lista liczona dopiero w szablonie (poza cache fragmentu)
+        {"items": lazy(lambda: _software_items(q)), "q": q},
     )
 
 
 def software_detail_view(request, software_id: int):
     software = get_object_or_404(Software, pk=software_id)
-    labs = _labs_for_software(software)
-    grouped = _group_labs_by_building(labs)
+    lab_groups = group_labs(_installed_labs([software.id]).get(software.id, ()))
 
     return render(
         request,
         "educational_software/software_detail.html",
         {
             "software": software,
-            "grouped_labs": grouped,
+            "lab_groups": lab_groups,
+            # komputery w salach tych laboratoriów (LaboratoryRoom)
+            "machines": _machines(request, equipment_for_software(software)),
         },
     )
 
@@ -150,8 +116,56 @@ def laboratory_detail_view(request, number: str):
         "educational_software/laboratory_detail.html",
         {
             "laboratory": lab,
-            "building": get_building(raw_number),
+            "building": building_name(lab.building_id),
             "softwares": softwares,
+            "machines": _machines(request, equipment_for_laboratory(lab)),
+        },
+    )
+
+
+# =========================
+# LICENCJE (stanowiska)
+# =========================
+
+@login_required_no_next(login_url="/baza/")
+def licence_report_view(request):
+    """
+    Licencje – /baza/oprogramowanie/licencje/
+
+    Wszystko z liczników (licences.py), bez przeliczania instalacji:
+    - pule ponad limit – jedno zapytanie po indeksie over_by,
+    - wszystkie pule,
+    - programy z pulą: laboratoria / stanowiska w podziale na budynki.
+    """
+    buildings = get_buildings()
+    usage = (
+        SoftwareBuildingUsage.objects.filter(software__licence_pool__isnull=False)
+        .values_list("software_id", "building_id", "seats")
+    )
+    seats = {(software_id, building_id): count for software_id, building_id, count in usage}
+    columns = list(buildings) + [None]
+
+    rows = []
+    for software in (
+        Software.objects.filter(licence_pool__isnull=False)
+        .select_related("licence_pool")
+        .order_by("licence_pool__name", "name")
+    ):
+        rows.append(
+            {
+                "software": software,
+                "cells": [seats.get((software.pk, pk), 0) for pk in columns],
+            }
+        )
+
+    return render(
+        request,
+        "educational_software/licence_report.html",
+        {
+            "over": list(over_licence()),
+            "pools": list(LicencePool.objects.order_by("name")),
+            "columns": [buildings[pk].name for pk in columns if pk is not None] + [OTHER_NAME],
+            "rows": rows,
         },
     )
 
@@ -1,9 +1,82 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.db import transaction
+from django.http import HttpResponseRedirect
 from django.template.response import TemplateResponse
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from .models import Equipment, EquipmentAttachment, ROOM_CATEGORY_CHOICES
+from .admin_performance import (
+    CachedValuesFieldListFilter,
+    EstimatedCountPaginator,
+    performance_mode,
+)
+from .concurrency import EditConflict, save_changed_fields
+from .forms import BulkEditForm, EquipmentAdminForm
+from .history import UPDATE_CHUNK_SIZE, form_changes, save_changes, update_with_history
+from .models import (
+    Equipment,
+    EquipmentAttachment,
+    EquipmentChange,
+    NetworkMismatch,
+    ROOM_CATEGORY_CHOICES,
+)
+from .signals import ROOM_FIELDS, send_rooms_changed
+
+
+# Ile kart pokazujemy na stronie potwierdzenia akcji hurtowej
+CONFIRM_SAMPLE_SIZE = 20
+
+
+def _selection_context(request, queryset) -> dict:
+    """
+    Zaznaczenie na stronie potwierdzenia: liczba + próbka kart zamiast
+    pełnej listy. Przy „zaznacz wszystkie” (select_across) przekazujemy
+    dalej tylko tę flagę – formularz wraca na ten sam adres (z filtrami
+    i wyszukiwaniem), więc admin odtworzy cały queryset sam.
+    """
+    select_across = request.POST.get("select_across") == "1"
+    sample = list(
+        queryset.select_related(None)
+        .order_by("inventory_number")
+        .only("pk", "inventory_number", "equipment_name", "building", "room")[:CONFIRM_SAMPLE_SIZE]
+    )
+    if select_across:
+        # admin uruchamia akcję tylko z niepustym _selected_action;
+        # przy select_across sama wartość jest ignorowana
+        selected_ids = [obj.pk for obj in sample[:1]]
+    else:
+        selected_ids = request.POST.getlist(helpers.ACTION_CHECKBOX_NAME)
+    return {
+        "selected_count": queryset.count(),
+        "sample": sample,
+        "select_across": select_across,
+        "selected_ids": selected_ids,
+    }
+
+
+def _update_with_progress(request, queryset, values, source) -> int:
+    """
+    update_with_history() dla akcji admina; postęp partii (progress=...)
+    trafia do komunikatu, np. „Zapisano partie: 3/3 (4500/4500 kart)”.
+    """
+    state = {"batches": 0, "done": 0, "total": 0}
+
+    def progress(done, total):
+        state["batches"] += 1
+        state["done"], state["total"] = done, total
+
+    updated_count = update_with_history(
+        queryset, values, user=request.user, source=source, progress=progress
+    )
+    if state["total"]:
+        batches = -(-state["total"] // UPDATE_CHUNK_SIZE)
+        messages.info(
+            request,
+            f"Zapisano partie: {state['batches']}/{batches} "
+            f"({state['done']}/{state['total']} kart).",
+        )
+    return updated_count
 
 
 def _confirm_move_action(request, queryset, action_name, action_verbose, target_label, target_value):
@@ -11,14 +84,16 @@ def _confirm_move_action(request, queryset, action_name, action_verbose, target_
     Helper do prostych akcji zmiany room_category (np. Move to Magazyn).
     """
     if request.POST.get("confirm") == "yes":
-        updated_count = queryset.update(room_category=target_value)
+        updated_count = _update_with_progress(
+            request, queryset, {"room_category": target_value}, action_name
+        )
         return updated_count
     else:
         context = {
             "title": f"Potwierdź akcję: {action_verbose}",
-            "queryset": queryset,
             "action_name": action_name,
             "target_label": target_label,
+            **_selection_context(request, queryset),
         }
         return context
 
@@ -34,8 +109,10 @@ class EquipmentAdmin(admin.ModelAdmin):
         "user_full_name",
         "status",
         "warranty_status",
+        "last_modified_by",
     )
     list_filter = ("building", "room_category", "status")
+    list_select_related = ("last_modified_by",)
     search_fields = (
         "inventory_number",
         "equipment_name",
@@ -49,22 +126,80 @@ class EquipmentAdmin(admin.ModelAdmin):
         "action_move_to_rooms",
         "action_move_to_magazyn",
         "action_assign_user",
+        "action_bulk_edit",
         "delete_selected",
     ]
 
+    # Formularz z ukrytą wersją karty (optimistic locking – equipment.concurrency)
+    form = EquipmentAdminForm
+
     # Pola tylko do odczytu w adminie – nieedytowalne ręcznie
-    readonly_fields = ("last_modified_by", "last_modified_at")
+    readonly_fields = ("last_modified_by", "last_modified_at", "version", "last_seen_at", "last_seen_ip")
+
+    def get_queryset(self, request):
+        # Status gwarancji liczony w bazie (CASE WHEN), nie per obiekt w Pythonie
+        return super().get_queryset(request).with_warranty_bucket()
+
+    # -------------------------------
+    # Tryb wydajności (admin_performance.py, EQUIPMENT_ADMIN_PERFORMANCE_MODE)
+    # -------------------------------
+
+    @property
+    def show_full_result_count(self):
+        # bez drugiego COUNT(*) po całej tabeli ("z N wszystkich")
+        return not performance_mode()
+
+    def get_list_filter(self, request):
+        if not performance_mode():
+            return self.list_filter
+        return (
+            ("building", CachedValuesFieldListFilter),
+            "room_category",  # pole z choices – bez zapytania
+            ("status", CachedValuesFieldListFilter),
+        )
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        paginator_class = EstimatedCountPaginator if performance_mode() else self.paginator
+        return paginator_class(queryset, per_page, orphans, allow_empty_first_page)
 
     def save_model(self, request, obj, form, change):
         """
         Przy każdym zapisie w adminie:
         - last_modified_by = aktualnie zalogowany użytkownik
         - last_modified_at = aktualny czas
+        - przy edycji zapisywane są tylko zmienione pola, warunkowo
+          (wersja karty – equipment.concurrency),
+        - różnice pól trafiają do historii zmian (EquipmentChange),
+        - nowa karta w sali zmienia powiązania laboratoriów (equipment_rooms_changed)
         """
         if request.user.is_authenticated:
             obj.last_modified_by = request.user
         obj.last_modified_at = timezone.now()
-        super().save_model(request, obj, form, change)
+        with transaction.atomic():
+            if not change:
+                super().save_model(request, obj, form, change)
+                send_rooms_changed(Equipment, {(obj.building, obj.room)})
+            elif save_changed_fields(obj, form.cleaned_data["expected_version"], form.changed_data):
+                save_changes(form_changes(obj, form, request.user, source="admin"))
+
+    def delete_model(self, request, obj):
+        room = (obj.building, obj.room)
+        super().delete_model(request, obj)
+        send_rooms_changed(Equipment, {room})
+
+    def delete_queryset(self, request, queryset):
+        rooms = set(queryset.values_list(*ROOM_FIELDS).distinct().order_by())
+        super().delete_queryset(request, queryset)
+        send_rooms_changed(Equipment, rooms)
+
+    def changeform_view(self, request, object_id=None, form_url="", extra_context=None):
+        # Konflikt wersji między walidacją formularza a zapisem (zwykle łapie
+        # go już VersionCheckedForm.clean) – wracamy do aktualnej karty.
+        try:
+            return super().changeform_view(request, object_id, form_url, extra_context)
+        except EditConflict as exc:
+            self.message_user(request, str(exc), messages.ERROR)
+            return HttpResponseRedirect(request.get_full_path())
 
     # -------------------------------
     # Akcja: Move to Pomieszczenia / Sale (kategoria + budynek + pomieszczenie)
@@ -100,7 +235,7 @@ class EquipmentAdmin(admin.ModelAdmin):
                 choices = [(c, l) for c, l in ROOM_CATEGORY_CHOICES if c != "MAGAZYN"]
                 context = {
                     "title": "Przenieś zaznaczone karty do kategorii Pomieszczenia / Sale",
-                    "queryset": queryset,
+                    **_selection_context(request, queryset),
                     "opts": self.model._meta,
                     "action": "action_move_to_rooms",
                     "room_category_choices": choices,
@@ -114,10 +249,15 @@ class EquipmentAdmin(admin.ModelAdmin):
                     context,
                 )
 
-            updated_count = queryset.update(
-                room_category=selected_category,
-                building=building,
-                room=room,
+            updated_count = _update_with_progress(
+                request,
+                queryset,
+                {
+                    "room_category": selected_category,
+                    "building": building,
+                    "room": room,
+                },
+                "action_move_to_rooms",
             )
 
             label_dict = dict(ROOM_CATEGORY_CHOICES)
@@ -134,7 +274,7 @@ class EquipmentAdmin(admin.ModelAdmin):
 
         context = {
             "title": "Przenieś zaznaczone karty do kategorii Pomieszczenia / Sale",
-            "queryset": queryset,
+            **_selection_context(request, queryset),
             "opts": self.model._meta,
             "action": "action_move_to_rooms",
             "room_category_choices": choices,
@@ -201,7 +341,7 @@ class EquipmentAdmin(admin.ModelAdmin):
             if not new_user:
                 context = {
                     "title": "Przypisz do użytkownika – podaj nazwę użytkownika",
-                    "queryset": queryset,
+                    **_selection_context(request, queryset),
                     "opts": self.model._meta,
                     "action": "action_assign_user",
                     "error": "Musisz podać nazwę użytkownika.",
@@ -212,7 +352,9 @@ class EquipmentAdmin(admin.ModelAdmin):
                     context,
                 )
 
-            updated_count = queryset.update(user_full_name=new_user)
+            updated_count = _update_with_progress(
+                request, queryset, {"user_full_name": new_user}, "action_assign_user"
+            )
             self.message_user(
                 request,
                 f"Zmieniono użytkownika dla {updated_count} kart na: {new_user}."
@@ -221,7 +363,7 @@ class EquipmentAdmin(admin.ModelAdmin):
 
         context = {
             "title": "Przypisz zaznaczone karty do użytkownika",
-            "queryset": queryset,
+            **_selection_context(request, queryset),
             "opts": self.model._meta,
             "action": "action_assign_user",
         }
@@ -233,8 +375,113 @@ class EquipmentAdmin(admin.ModelAdmin):
 
     action_assign_user.short_description = "Przypisz do użytkownika..."
 
+    # -------------------------------
+    # Akcja: Hurtowa edycja pola
+    # -------------------------------
+
+    def action_bulk_edit(self, request, queryset):
+        """
+        Ustawia jedną wartość wybranego pola (z EDITABLE_FIELDS) dla
+        zaznaczonych kart – wartość sprawdzana raz polem modelu,
+        zapis partiami przez update_with_history (z historią zmian).
+        """
+        if request.POST.get("apply") == "yes":
+            form = BulkEditForm(request.POST)
+            if form.is_valid():
+                model_field = form.model_field()
+                updated_count = _update_with_progress(
+                    request,
+                    queryset,
+                    {model_field.name: form.cleaned_data["value"]},
+                    "action_bulk_edit",
+                )
+                self.message_user(
+                    request,
+                    f"Zmieniono pole „{model_field.verbose_name}” dla {updated_count} kart.",
+                )
+                return None
+        else:
+            form = BulkEditForm()
+
+        context = {
+            "title": "Hurtowa edycja pola zaznaczonych kart",
+            **_selection_context(request, queryset),
+            "opts": self.model._meta,
+            "action": "action_bulk_edit",
+            "form": form,
+        }
+        return TemplateResponse(
+            request,
+            "admin/equipment/equipment/confirm_bulk_edit.html",
+            context,
+        )
+
+    action_bulk_edit.short_description = "Hurtowa edycja pola..."
+
 
 @admin.register(EquipmentAttachment)
 class EquipmentAttachmentAdmin(admin.ModelAdmin):
     list_display = ("file", "equipment", "uploaded_at")
-    search_fields = ("file", "equipment__inventory_number", "equipment__equipment_name")
\ No newline at end of file
+    search_fields = ("file", "equipment__inventory_number", "equipment__equipment_name")
+
+
+@admin.register(EquipmentChange)
+class EquipmentChangeAdmin(admin.ModelAdmin):
+    """
+    Historia zmian – tylko do odczytu (tabela append-only).
+    """
+
+    list_display = (
+        "changed_at",
+        "inventory_number",
+        "field_name",
+        "old_value",
+        "new_value",
+        "source",
+        "changed_by",
+    )
+    list_filter = ("source", "field_name")
+    search_fields = ("inventory_number", "old_value", "new_value")
+    date_hierarchy = "changed_at"
+    list_select_related = ("changed_by",)
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(NetworkMismatch)
+class NetworkMismatchAdmin(admin.ModelAdmin):
+    """
+    Niezgodności ze skanowania sieci – tworzone przez komendę network_sweep.
+    """
+
+    list_display = (
+        "seen_at",
+        "kind",
+        "equipment",
+        "expected",
+        "observed",
+        "ip",
+        "mac",
+        "hostname",
+        "source",
+    )
+    list_filter = ("kind", "source")
+    search_fields = ("equipment__inventory_number", "expected", "observed", "hostname", "mac")
+    date_hierarchy = "seen_at"
+    list_select_related = ("equipment",)
+    raw_id_fields = ("equipment",)
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,131 @@
+"""
+Tryb wydajności listy kart w panelu administracyjnym
+(EQUIPMENT_ADMIN_PERFORMANCE_MODE, domyślnie włączony).
+
+- CachedValuesFieldListFilter – wartości filtra (SELECT DISTINCT po całej
+  tabeli) trzymane w cache do następnej zmiany danych,
+- EstimatedCountPaginator – liczba wyników bez COUNT(*) po całej tabeli:
+  bez filtrów na PostgreSQL szacunek z pg_class.reltuples, w pozostałych
+  przypadkach dokładny COUNT zapamiętany w cache do zmiany danych.
+  Szacunek służy tylko do etykiety „N wyników” i pierwszego zestawu linków
+  stron – sama strona pobiera per_page + 1 wierszy i na tej podstawie
+  poprawia liczbę stron (szacunek bywa nieaktualny po imporcie / usunięciu).
+"""
+
+from __future__ import annotations
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from .data_version import cached_until_change
+
+
+# Poniżej tylu wierszy szacunek jest mało dokładny – liczymy dokładnie
+ESTIMATE_MIN_ROWS = 10000
+
+
+def performance_mode() -> bool:
+    return getattr(settings, "EQUIPMENT_ADMIN_PERFORMANCE_MODE", True)
+
+
+class CachedValuesFieldListFilter(admin.AllValuesFieldListFilter):
+    """
+    Jak AllValuesFieldListFilter, ale lista wartości pochodzi z cache.
+    Zapytanie (SELECT DISTINCT) buduje Django; jego SQL jest kluczem cache,
+    wykonywane jest tylko po zmianie danych.
+    """
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        values = self.lookup_choices
+        try:
+            sql, sql_params = values.query.sql_with_params()
+        except EmptyResultSet:
+            self.lookup_choices = []
+            return
+        self.lookup_choices = cached_until_change(
+            "admin_filter", [values.db, sql, sql_params], lambda: list(values)
+        )
+
+
+def _estimated_rows(queryset):
+    """
+    Szacowana liczba wierszy tabeli (PostgreSQL, po ANALYZE / autovacuum); None gdy brak.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = _estimated_rows(queryset)
+            if estimate is not None and estimate >= ESTIMATE_MIN_ROWS:
+                self.estimated = True
+                return estimate
+        return self._exact_count()
+
+    def _exact_count(self):
+        queryset = self.object_list
+
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        return cached_until_change(
+            "admin_count",
+            [queryset.db, sql, params],
+            queryset.count,
+        )
+
+    def _set_count(self, count):
+        self.__dict__["count"] = count
+        self.__dict__.pop("num_pages", None)
+
+    def page(self, number):
+        """
+        Przy szacowanej liczbie wyników nie ufamy num_pages: strona pobiera
+        per_page + 1 wierszy. Jest kolejny wiersz – liczba wyników rośnie co
+        najmniej do następnej strony; mniej wierszy – to ostatnia strona
+        i liczba jest dokładna; pusta strona za końcem – dokładny COUNT
+        i ostatnia istniejąca strona (zamiast InvalidPage i ?e=1).
+        """
+        if not (self.count and self.estimated):
+            return super().page(number)
+
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("Numer strony nie jest liczbą całkowitą.")
+        if number < 1:
+            raise EmptyPage("Numer strony jest mniejszy niż 1.")
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            self.estimated = False
+            self._set_count(self._exact_count())
+            return super().page(min(number, self.num_pages))
+
+        if len(rows) > self.per_page:
+            self._set_count(max(self.count, bottom + self.per_page + 1))
+        else:
+            self._set_count(bottom + len(rows))
+        return Page(rows[:self.per_page], number, self)
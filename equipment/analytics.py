@@ -0,0 +1,163 @@
+"""
+Wiek sprzętu na podstawie purchase_date.
+
+- rozkład wieku: liczba kart wg roku zakupu (TruncYear -> date_trunc('year'))
+  per budynek albo per kategoria pomieszczenia – jedno zapytanie GROUP BY,
+- prognoza wymiany: ile kart osiągnie N lat w kolejnych kwartałach
+  (TruncQuarter po zakresie purchase_date – kolumna z indeksem).
+
+Wyniki są w cache do następnej zmiany kart (data_version.cached_until_change).
+"""
+
+from __future__ import annotations
+
+from datetime import date
+
+from django.db.models import Count
+from django.db.models.functions import TruncQuarter, TruncYear
+from django.utils import timezone
+
+from .data_version import cached_until_change
+from .models import Equipment, ROOM_CATEGORY_CHOICES
+
+
+# Po ilu latach sprzęt kwalifikuje się do wymiany (domyślnie)
+DEFAULT_REPLACEMENT_YEARS = 5
+FORECAST_QUARTERS = 8
+
+GROUP_FIELDS = {
+    "building": "Budynek",
+    "room_category": "Kategoria pomieszczenia",
+}
+
+NO_DATE_LABEL = "brak daty"
+EMPTY_LABEL = "(brak)"
+
+_ROOM_CATEGORY_LABELS = dict(ROOM_CATEGORY_CHOICES)
+
+# dłużej niż doba nie trzymamy – nawet bez zmian w kartach zmienia się "dziś"
+CACHE_SECONDS = 24 * 3600
+
+
+def _add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _quarter_start(day: date) -> date:
+    return date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+
+
+def _quarter_label(day: date) -> str:
+    return f"{day.year} Q{(day.month - 1) // 3 + 1}"
+
+
+def _group_label(group_field, value) -> str:
+    if group_field == "room_category":
+        return _ROOM_CATEGORY_LABELS.get(value, value) or EMPTY_LABEL
+    return value or EMPTY_LABEL
+
+
+def build_age_distribution(group_field: str, today: date) -> dict:
+    """
+    Tabela: wiersze = rok zakupu (z wiekiem w latach), kolumny = grupy.
+    Karty bez daty zakupu trafiają do osobnego wiersza.
+    """
+    groups = (
+        Equipment.objects.annotate(year=TruncYear("purchase_date"))
+        .values_list("year", group_field)
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+
+    cells = {}
+    for year, group, count in groups:
+        key = (year.year if year else None, _group_label(group_field, group))
+        cells[key] = cells.get(key, 0) + count
+
+    years = sorted({y for y, _ in cells if y is not None}, reverse=True)
+    columns = sorted({g for _, g in cells}, key=lambda v: (v == EMPTY_LABEL, v))
+
+    rows = []
+    for year in years + [None]:
+        line = [cells.get((year, g), 0) for g in columns]
+        if year is None and not any(line):
+            continue
+        rows.append(
+            {
+                "year": year,
+                "label": str(year) if year else NO_DATE_LABEL,
+                "age": today.year - year if year else None,
+                "counts": line,
+                "total": sum(line),
+            }
+        )
+
+    return {
+        "group_field": group_field,
+        "columns": columns,
+        "rows": rows,
+        "column_totals": [sum(r["counts"][i] for r in rows) for i in range(len(columns))],
+        "total": sum(cells.values()),
+    }
+
+
+def build_replacement_forecast(years: int, quarters: int, today: date) -> dict:
+    """
+    Ile kart osiągnie `years` lat w każdym z `quarters` kolejnych kwartałów
+    (od bieżącego). Karta kupiona w kwartale K osiąga N lat w kwartale K + N lat,
+    więc liczymy zakupy z okna przesuniętego o N lat wstecz.
+    """
+    start = _quarter_start(today)
+    window_start = _add_months(start, -12 * years)
+    window_end = _add_months(window_start, 3 * quarters)
+
+    counts = dict(
+        Equipment.objects.filter(purchase_date__gte=window_start, purchase_date__lt=window_end)
+        .annotate(quarter=TruncQuarter("purchase_date"))
+        .values("quarter")
+        .annotate(count=Count("id"))
+        .order_by()
+        .values_list("quarter", "count")
+    )
+    overdue = Equipment.objects.filter(purchase_date__lt=window_start).count()
+
+    forecast = []
+    for i in range(quarters):
+        bought = _add_months(window_start, 3 * i)
+        forecast.append(
+            {
+                "quarter": _quarter_label(_add_months(start, 3 * i)),
+                "purchased_in": _quarter_label(bought),
+                "count": counts.get(bought, 0),
+            }
+        )
+
+    return {
+        "years": years,
+        "overdue": overdue,
+        "forecast": forecast,
+        "total": overdue + sum(item["count"] for item in forecast),
+    }
+
+
+def age_distribution(group_field="building") -> dict:
+    if group_field not in GROUP_FIELDS:
+        group_field = "building"
+    today = timezone.localdate()
+    return cached_until_change(
+        "age",
+        [group_field, today],
+        lambda: build_age_distribution(group_field, today),
+        CACHE_SECONDS,
+    )
+
+
+def replacement_forecast(years=DEFAULT_REPLACEMENT_YEARS, quarters=FORECAST_QUARTERS) -> dict:
+    today = timezone.localdate()
+    return cached_until_change(
+        "replacement",
+        [years, quarters, _quarter_start(today)],
+        lambda: build_replacement_forecast(years, quarters, today),
+        CACHE_SECONDS,
+    )
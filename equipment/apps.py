@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class EquipmentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'equipment'
+
+    def ready(self):
+        from .data_version import track_model
+        from .models import Equipment
+
+        track_model(Equipment)
@@ -0,0 +1,116 @@
+"""
+Rejestr kolumn pliku XLSX z kartami sprzętu – wspólny dla eksportu i importu.
+
+Eksport zapisuje kolumny w kolejności EQUIPMENT_COLUMNS (pierwsze 15 to
+dotychczasowy układ "naszego" Excela, kolejne to pozostałe pola karty),
+a import rozpoznaje te same nagłówki. Dzięki temu plik z eksportu można
+od razu zaimportować z powrotem bez utraty danych.
+"""
+
+from __future__ import annotations
+
+from io import BytesIO
+
+from openpyxl import Workbook
+
+
+def _date_to_cell(value):
+    return value.isoformat() if value else ""
+
+
+class Column:
+    """
+    Kolumna pliku: nagłówek, pole modelu i (opcjonalnie) konwersja
+    wartości z bazy do komórki Excela.
+    """
+
+    __slots__ = ("header", "field", "to_cell")
+
+    def __init__(self, header, field, to_cell=None):
+        self.header = header
+        self.field = field
+        self.to_cell = to_cell
+
+    def __repr__(self):
+        return f"Column({self.header!r}, {self.field!r})"
+
+
+EQUIPMENT_COLUMNS = (
+    # --- dotychczasowy układ Excela ---
+    Column("NR_INWENTARZOWY", "inventory_number"),
+    Column("BUDYNEK", "building"),
+    Column("POMIESZCZENIE", "room"),
+    Column("TYP_SPRZETU", "equipment_type"),
+    Column("NAZWA", "equipment_name"),
+    Column("NAZWISKO", "user_full_name"),
+    Column("NR_FABR", "unit_serial_number"),
+    Column("NR_SERYJNY_MONITORA", "monitor_serial_number"),
+    Column("DATA_ZAKUP", "purchase_date", _date_to_cell),
+    Column("UWAGI", "notes"),
+    Column("KLUCZ_WINDOWS", "os_serial_key"),
+    Column("KLUCZ_OFFICE", "office_serial_key"),
+    Column("MAC_JEDNOSTKI", "mac_address"),
+    Column("NAZWA_DOMENOWA", "hostname"),
+    Column("ADRES_IP", "ip_address"),
+    # --- pozostałe pola karty (potrzebne do pełnego eksport -> import) ---
+    Column("KATEGORIA_POMIESZCZENIA", "room_category"),
+    Column("STATUS", "status"),
+    Column("SYSTEM", "os_name"),
+    Column("WERSJA_SYSTEMU", "os_version"),
+    Column("PAKIET_OFFICE", "office_name"),
+    Column("WERSJA_OFFICE", "office_version"),
+    Column("WYPOZYCZONO_DO", "borrowed_to"),
+    Column("DOSTAWCA", "supplier"),
+    Column("GWARANCJA_DO", "warranty_until", _date_to_cell),
+)
+
+EXPORT_HEADERS = [c.header for c in EQUIPMENT_COLUMNS]
+EXPORT_FIELDS = [c.field for c in EQUIPMENT_COLUMNS]
+
+# Nagłówek (po normalizacji) -> pole modelu; używane przez import
+HEADER_ALIASES = {c.header: c.field for c in EQUIPMENT_COLUMNS}
+
+
+def _compile_row_converter(columns):
+    """
+    Zwraca funkcję zamieniającą krotkę z values_list() na wiersz Excela.
+    Konwersje są wyznaczane raz – dla kolumn tekstowych nie wołamy
+    niczego per komórka.
+    """
+    converters = [(i, c.to_cell) for i, c in enumerate(columns) if c.to_cell]
+    if not converters:
+        return tuple
+
+    def convert(values):
+        row = list(values)
+        for i, to_cell in converters:
+            row[i] = to_cell(row[i])
+        return row
+
+    return convert
+
+
+export_row = _compile_row_converter(EQUIPMENT_COLUMNS)
+
+
+def iter_export_rows(queryset, chunk_size=2000):
+    """
+    Wiersze eksportu prosto z bazy (values_list, bez tworzenia obiektów modelu).
+    """
+    values = queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    return map(export_row, values)
+
+
+def write_workbook(rows, title="Sprzet") -> bytes:
+    """
+    Zapisuje wiersze (już po konwersji) do pliku XLSX w trybie write_only.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    ws.append(EXPORT_HEADERS)
+    for row in rows:
+        ws.append(row)
+
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
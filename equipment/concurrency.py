@@ -0,0 +1,115 @@
+"""
+Optimistic locking kart sprzętu (kolumna Equipment.version).
+
+Formularz edycji niesie w ukrytym polu (expected_version) wersję karty,
+którą widział użytkownik (VersionCheckedForm). Zapis (save_changed_fields)
+to jeden warunkowy UPDATE tylko zmienionych pól:
+
+    UPDATE ... SET <zmienione pola>, version = version + 1
+    WHERE id = %s AND version = %s
+
+0 zmienionych wierszy = ktoś zapisał kartę w międzyczasie (EditConflict).
+Bez SELECT ... FOR UPDATE i bez nadpisywania całego wiersza.
+
+Ścieżki hurtowe (update_with_history, import, edycja tabelaryczna sali)
+podbijają wersję tym samym F("version") + 1.
+"""
+
+from __future__ import annotations
+
+from django import forms
+from django.db.models import F
+
+from .normalize import NETWORK_SHADOW_FIELDS
+from .signals import ROOM_FIELDS, send_rooms_changed
+
+
+VERSION_BUMP = F("version") + 1
+
+
+class EditConflict(Exception):
+    """
+    Karta została zmieniona przez kogoś innego od otwarcia formularza.
+    """
+
+    def __init__(self, obj):
+        self.obj = obj
+        super().__init__(conflict_message(obj))
+
+
+def conflict_message(obj) -> str:
+    current = (
+        type(obj)._default_manager.filter(pk=obj.pk)
+        .select_related("last_modified_by")
+        .only("last_modified_at", "last_modified_by__username")
+        .first()
+    )
+    who = ""
+    if current is not None and current.last_modified_by is not None:
+        who = f" (użytkownik {current.last_modified_by.username}"
+        if current.last_modified_at:
+            who += f", {current.last_modified_at:%Y-%m-%d %H:%M}"
+        who += ")"
+    return (
+        f"Karta {obj.inventory_number} została w międzyczasie zmieniona{who}. "
+        "Twoje zmiany nie zostały zapisane – otwórz kartę ponownie i wprowadź je jeszcze raz."
+    )
+
+
+class VersionCheckedForm(forms.ModelForm):
+    """
+    ModelForm karty z ukrytym polem `expected_version` (wersja z chwili
+    otwarcia formularza; inna nazwa niż pole modelu, bo Equipment.version
+    jest editable=False). Niezgodność z bieżącą wersją karty jest zgłaszana
+    już w walidacji – wyścig między walidacją a zapisem łapie
+    save_changed_fields().
+    """
+
+    expected_version = forms.IntegerField(widget=forms.HiddenInput, required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields["expected_version"].required = True
+            self.fields["expected_version"].initial = self.instance.version
+
+    def clean(self):
+        cleaned_data = super().clean()
+        version = cleaned_data.get("expected_version")
+        if self.instance.pk and version is not None and version != self.instance.version:
+            raise forms.ValidationError(conflict_message(self.instance), code="conflict")
+        return cleaned_data
+
+
+def save_changed_fields(obj, expected_version: int, fields) -> bool:
+    """
+    Zapisuje tylko `fields` (+ kopie pól sieciowych i last_modified_*)
+    warunkowym UPDATE ... WHERE version = expected_version.
+
+    Zwraca False, gdy nie było czego zapisać; rzuca EditConflict, gdy wersja
+    karty w bazie jest inna niż oczekiwana. Po zapisie obj.version jest aktualne.
+    Przeniesienie karty do innej sali zgłasza equipment_rooms_changed.
+    """
+    fields = set(fields) - {"version", "expected_version"}
+    if not fields:
+        return False
+
+    obj.refresh_network_fields()
+    fields |= {NETWORK_SHADOW_FIELDS[name] for name in fields if name in NETWORK_SHADOW_FIELDS}
+    fields |= {"last_modified_by", "last_modified_at"}
+
+    manager = type(obj)._default_manager
+    old_room = None
+    if fields & set(ROOM_FIELDS):
+        old_room = manager.filter(pk=obj.pk).values_list(*ROOM_FIELDS).first()
+
+    rows = (
+        manager.filter(pk=obj.pk, version=expected_version)
+        .update(**{name: getattr(obj, name) for name in sorted(fields)}, version=VERSION_BUMP)
+    )
+    if not rows:
+        raise EditConflict(obj)
+    obj.version = expected_version + 1
+    if old_room is not None:
+        send_rooms_changed(type(obj), {old_room, (obj.building, obj.room)})
+    return True
@@ -0,0 +1,172 @@
+"""
+Wykrywanie konfliktów: kilka kart z tym samym adresem IP, adresem MAC
+albo numerem seryjnym jednostki.
+
+Porównujemy wartości znormalizowane (ip_normalized, mac_normalized),
+więc "10.0.3.5" i "10.0.3. 5" albo "aa-bb-.." i "AA:BB:.." to ten sam
+adres. Numer seryjny grupujemy po UPPER(TRIM(...)) – " abc123" i "ABC123"
+to ta sama jednostka. Każde pole to jedno zapytanie
+GROUP BY <klucz> HAVING COUNT(*) > 1 po kolumnie / wyrażeniu z indeksem.
+"""
+
+from __future__ import annotations
+
+from django.db.models import Count, F, Q
+from django.db.models.functions import Trim, Upper
+
+from .models import Equipment
+
+
+# pole (znormalizowane) -> etykieta
+CONFLICT_FIELDS = [
+    ("ip_normalized", "Adres IP"),
+    ("mac_normalized", "Adres MAC"),
+    ("unit_serial_number", "Nr seryjny jednostki"),
+]
+
+# pole -> wyrażenie SQL klucza porównania (domyślnie sama kolumna);
+# wyrażenie musi mieć indeks funkcyjny (Equipment.Meta.indexes)
+CONFLICT_KEYS = {
+    "unit_serial_number": Upper(Trim("unit_serial_number")),
+}
+
+MEMBER_FIELDS = ("pk", "inventory_number", "equipment_name", "building", "room")
+
+# Maksymalna liczba wartości w jednym IN (...) przy sprawdzaniu przyrostowym
+IN_CHUNK_SIZE = 1000
+
+
+def _key(field):
+    return CONFLICT_KEYS.get(field, F(field))
+
+
+def conflict_key(field, value):
+    """
+    Klucz porównania wartości po stronie Pythona – to samo co _key() w SQL
+    (TRIM w SQL obcina tylko spacje).
+    """
+    if field in CONFLICT_KEYS and isinstance(value, str):
+        return value.strip(" ").upper()
+    return value
+
+
+def _non_empty(field):
+    # Pola z NULL (ip_normalized – typ inet) filtrujemy tylko po IS NULL,
+    # pola tekstowe po pustym kluczu (numer seryjny z samych spacji też).
+    qs = Equipment.objects.annotate(key=_key(field))
+    if Equipment._meta.get_field(field).null:
+        return qs.exclude(key__isnull=True)
+    return qs.exclude(key="")
+
+
+def duplicate_values(field, values=None):
+    """
+    Zapytanie GROUP BY <klucz pola> HAVING COUNT(*) > 1.
+    Jeśli podano `values` (klucze, zob. conflict_key), sprawdzamy tylko
+    te wartości (tryb przyrostowy).
+    """
+    qs = _non_empty(field)
+    if values is not None:
+        qs = qs.filter(key__in=values)
+    return (
+        qs.values("key")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .order_by("key")
+    )
+
+
+def find_conflicts(values_by_field=None, with_members=True) -> list:
+    """
+    Lista sekcji raportu:
+    [{"field", "label", "groups": [{"value", "count", "members": [...]}, ...]}, ...]
+
+    values_by_field – {pole: zbiór wartości} dla sprawdzania przyrostowego
+    (np. tylko wartości dotknięte ostatnim importem) albo {pole: None}, żeby
+    sprawdzić całą tabelę, ale tylko dla tego pola. Pola spoza słownika są
+    pomijane; bez values_by_field sprawdzamy wszystkie pola w całej tabeli.
+    """
+    report = []
+    for field, label in CONFLICT_FIELDS:
+        if values_by_field is not None and field not in values_by_field:
+            continue
+        values = None if values_by_field is None else values_by_field[field]
+        if values is None:
+            groups = list(duplicate_values(field))
+        else:
+            values = sorted({conflict_key(field, v) for v in values if v})
+            groups = []
+            for start in range(0, len(values), IN_CHUNK_SIZE):
+                groups.extend(duplicate_values(field, values[start:start + IN_CHUNK_SIZE]))
+
+        sections = [{"value": g["key"], "count": g["count"], "members": []} for g in groups]
+
+        if with_members and sections:
+            by_value = {s["value"]: s for s in sections}
+            keys = list(by_value)
+            for start in range(0, len(keys), IN_CHUNK_SIZE):
+                members = (
+                    Equipment.objects.annotate(key=_key(field))
+                    .filter(key__in=keys[start:start + IN_CHUNK_SIZE])
+                    .order_by("key", "inventory_number")
+                    .values("key", *MEMBER_FIELDS)
+                )
+                for member in members:
+                    by_value[member.pop("key")]["members"].append(member)
+
+        report.append({"field": field, "label": label, "groups": sections})
+    return report
+
+
+def conflicts_for_inventory_numbers(inventory_numbers, with_members=True) -> list:
+    """
+    Konflikty dotyczące podanych kart (np. po imporcie) – sprawdzamy tylko
+    ich wartości, a nie całą tabelę.
+    """
+    numbers = list(inventory_numbers)
+    fields = [field for field, _ in CONFLICT_FIELDS]
+    values_by_field = {field: set() for field in fields}
+    for start in range(0, len(numbers), IN_CHUNK_SIZE):
+        rows = Equipment.objects.filter(
+            inventory_number__in=numbers[start:start + IN_CHUNK_SIZE]
+        ).values_list(*fields)
+        for row in rows:
+            for field, value in zip(fields, row):
+                if value:
+                    values_by_field[field].add(value)
+    return find_conflicts(values_by_field, with_members=with_members)
+
+
+def conflict_count(report) -> int:
+    return sum(len(section["groups"]) for section in report)
+
+
+def conflicts_for_equipment(equipment) -> list:
+    """
+    Inne karty, które mają ten sam IP / MAC / numer seryjny co `equipment`
+    (jedno zapytanie z OR po kluczach z indeksami).
+    Zwraca listę (etykieta, wartość, karta).
+    """
+    condition = Q()
+    checks = []
+    for field, label in CONFLICT_FIELDS:
+        value = conflict_key(field, getattr(equipment, field))
+        if value:
+            condition |= Q(**{f"{field}_key": value})
+            checks.append((field, label, value))
+    if not checks:
+        return []
+
+    others = (
+        Equipment.objects.alias(**{f"{field}_key": _key(field) for field, _, _ in checks})
+        .filter(condition)
+        .exclude(pk=equipment.pk)
+        .order_by("inventory_number")
+        .only(*MEMBER_FIELDS[1:], *(field for field, _, _ in checks))
+    )
+    result = []
+    for other in others:
+        for field, label, value in checks:
+            if conflict_key(field, getattr(other, field)) == value:
+                result.append((label, value, other))
+    return result
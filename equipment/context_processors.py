@@ -5,6 +5,11 @@ import platform
 from pathlib import Path
 
 import django
+from django.utils import translation
+from django.utils.functional import SimpleLazyObject
+
+from .data_version import data_version, fragment_cache_seconds
+from .guest import is_guest
 
 
 def _load_version_status() -> dict:
@@ -41,3 +46,30 @@ def version_info(request):
         "APP_UPDATE_LABEL": update_label,
         "APP_UPDATE_CHECKED_AT": checked_at,
     }
+
+
+def _session_kind(request) -> str:
+    if is_guest(request):
+        return "guest"
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return "staff" if user.is_staff else "user"
+    return "anon"
+
+
+def fragment_cache(request):
+    """
+    Klucz dla {% cache %}: wersja danych + język + rodzaj sesji (gość / zalogowany),
+    liczony leniwie – tylko na stronach, które z niego korzystają.
+    """
+    return {
+        "FRAGMENT_CACHE_SECONDS": fragment_cache_seconds(),
+        "FRAGMENT_CACHE_KEY": SimpleLazyObject(
+            lambda: f"{data_version()}:{translation.get_language()}:{_session_kind(request)}"
+        ),
+    }
+
+
+def guest_mode(request):
+    # tryb gościa z podpisanego ciasteczka (equipment/guest.py) – bez odczytu sesji
+    return {"IS_GUEST": is_guest(request)}
@@ -0,0 +1,152 @@
+"""
+Globalny licznik wersji danych – klucz cache'owanych fragmentów szablonów.
+
+Licznik leży we wspólnym cache Django i jest podbijany przy każdym zapisie
+śledzonych modeli (karty sprzętu, oprogramowanie, instalacje, laboratoria):
+- zapis / usunięcie pojedynczego obiektu – sygnały post_save / post_delete
+  (track_model()),
+- ścieżki zbiorcze (update(), delete(), bulk_create(), bulk_update()) –
+  VersionedQuerySet, bo te nie wysyłają post_save.
+
+W transakcji licznik jest podbijany raz, po COMMIT (transaction.on_commit) –
+fragment zbudowany przed zatwierdzeniem nie przeżyje zmiany.
+
+„Podbicie” to zapis nowej, świeżej wartości (czas w ns, nie mniejszy niż
+poprzednia wersja + 1), a nie cache.incr() – incr nie jest atomowy
+w FileBasedCache / LocMemCache między procesami. Dwa równoległe podbicia
+mogą zapisać różne wartości, ale każda z nich jest nowa, więc stare
+fragmenty i tak przestają pasować.
+
+Wyniki raportów i statystyk: cached_until_change() (klucz z licznika,
+bez zapytania do bazy).
+
+Szablony:  {% cache FRAGMENT_CACHE_SECONDS nazwa FRAGMENT_CACHE_KEY ... %}
+(FRAGMENT_CACHE_KEY z context_processors.fragment_cache: wersja danych,
+język i rodzaj sesji – gość / zalogowany).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.functional import SimpleLazyObject
+
+from .tiered_cache import get_or_compute
+
+
+DATA_VERSION_KEY = "baza:data_version"
+
+
+def fragment_cache_seconds() -> int:
+    return getattr(settings, "FRAGMENT_CACHE_SECONDS", 6 * 3600)
+
+
+def _new_version(previous=None) -> int:
+    # Bieżący czas, a nie 1 / licznik – po zniknięciu klucza (restart Redisa,
+    # sprzątanie cache plikowego) nie trafimy w stare fragmenty. Nigdy wstecz,
+    # nawet gdy zegar systemowy się cofnie.
+    version = time.time_ns()
+    if previous is not None and version <= previous:
+        version = previous + 1
+    return version
+
+
+def data_version() -> int:
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        version = _new_version()
+        if not cache.add(DATA_VERSION_KEY, version, None):
+            version = cache.get(DATA_VERSION_KEY, version)
+    return version
+
+
+def _bump():
+    cache.set(DATA_VERSION_KEY, _new_version(cache.get(DATA_VERSION_KEY)), None)
+
+
+def bump_data_version(using=None):
+    """
+    Podbija wersję po zatwierdzeniu bieżącej transakcji (poza transakcją – od razu).
+    Wiele zapisów w jednej transakcji = jedno podbicie.
+    """
+    connection = transaction.get_connection(using)
+    if connection.in_atomic_block and any(
+        entry[1] is _bump for entry in connection.run_on_commit
+    ):
+        return
+    transaction.on_commit(_bump, using=using)
+
+
+class VersionedQuerySet(models.QuerySet):
+    """
+    QuerySet, którego zbiorcze zapisy podbijają wersję danych.
+    """
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows:
+            bump_data_version(self.db)
+        return rows
+
+    update.alters_data = True
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            result = super().delete()
+            if result[0]:
+                bump_data_version(self.db)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs:
+            bump_data_version(self.db)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if rows:
+            bump_data_version(self.db)
+        return rows
+
+
+def _instance_changed(sender, using=None, **kwargs):
+    bump_data_version(using)
+
+
+def track_model(model):
+    """
+    Zapis / usunięcie pojedynczego obiektu modelu podbija wersję danych
+    (wywoływane w AppConfig.ready()).
+    """
+    uid = f"data_version:{model._meta.label_lower}"
+    post_save.connect(_instance_changed, sender=model, dispatch_uid=f"{uid}:save")
+    post_delete.connect(_instance_changed, sender=model, dispatch_uid=f"{uid}:delete")
+
+
+def lazy(func):
+    """
+    Wartość kontekstu liczona dopiero przy pierwszym użyciu w szablonie –
+    jeżeli fragment pochodzi z cache, zapytania w ogóle się nie wykonują.
+    """
+    return SimpleLazyObject(func)
+
+
+def cached_until_change(prefix: str, key_parts, build, timeout=None):
+    """
+    Wynik build() trzymany w cache do następnej zmiany danych
+    (klucz zawiera data_version()); `timeout` tylko sprząta stare klucze.
+    Dwupoziomowo, z ochroną przed równoległym liczeniem (tiered_cache).
+    """
+    key_data = json.dumps([list(key_parts), data_version()], default=str)
+    key = f"equipment:{prefix}:" + hashlib.sha1(key_data.encode("utf-8")).hexdigest()
+    return get_or_compute(key, build, timeout)
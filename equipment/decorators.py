@@ -1,23 +1,28 @@
 from functools import wraps
-from django.contrib.auth.decorators import user_passes_test
+
+from django.http import HttpResponseRedirect
+from django.shortcuts import resolve_url
 
 
 def login_required_no_next(view_func=None, login_url="/baza/"):
     """
-    Jak login_required, ale bez parametru ?next=...
-    (redirect_field_name=None => Django nie doklei querystringa).
+    Jak login_required, ale bez parametru ?next=... (przekierowanie
+    zawsze na sam `login_url`).
+
+    Widok jest opakowywany raz – przy dekorowaniu; na żądanie przypada
+    tylko sprawdzenie request.user.is_authenticated (użytkownik jest
+    wczytywany raz na żądanie i zapamiętywany przez AuthenticationMiddleware).
     """
-    decorator = user_passes_test(
-        lambda u: u.is_authenticated,
-        login_url=login_url,
-        redirect_field_name=None,
-    )
 
-    if view_func is None:
-        return decorator
+    def decorator(view):
+        @wraps(view)
+        def _wrapped(request, *args, **kwargs):
+            if request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            return HttpResponseRedirect(resolve_url(login_url))
 
-    @wraps(view_func)
-    def _wrapped(request, *args, **kwargs):
-        return decorator(view_func)(request, *args, **kwargs)
+        return _wrapped
 
-    return _wrapped
+    if view_func is None:
+        return decorator
+    return decorator(view_func)
@@ -0,0 +1,329 @@
+"""
+Skanowanie sieci: uzgadnianie tego, co widać w sieci, z kartami sprzętu.
+
+Źródła (pliki zrzucone wcześniej na dysk, czytane strumieniowo):
+- tablica ARP: `arp -a`, `ip neigh`, /proc/net/arp,
+- dzierżawy DHCP: dhcpd.leases (ISC) albo plik dzierżaw dnsmasq,
+- wynik nmap w XML (`nmap -sn -oX ...`) – czytany przez iterparse.
+
+Każde źródło zwraca obserwacje (ip, mac, hostname). Dopasowanie do kart
+idzie po znormalizowanych kolumnach z indeksami: najpierw mac_normalized,
+potem ip_normalized. Zapisy są zbiorcze: last_seen_* przez bulk_update,
+niezgodności przez bulk_create.
+"""
+
+from __future__ import annotations
+
+import re
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+
+from .models import Equipment, NetworkMismatch
+from .normalize import hostname_key, ip_or_none, mac_hex
+
+
+Observation = namedtuple("Observation", "ip mac hostname source seen_at")
+
+# Maksymalna liczba wartości w jednym IN (...)
+IN_CHUNK_SIZE = 1000
+WRITE_BATCH_SIZE = 1000
+
+_IPV4_RE = re.compile(r"\b(\d{1,3}(?:\.\d{1,3}){3})\b")
+_MAC_RE = re.compile(r"\b([0-9A-Fa-f]{2}(?:[:\-][0-9A-Fa-f]{2}){5})\b")
+# "pc-033-01.wimio.local (10.0.3.5) at ..." – nazwa przed adresem w `arp -a`
+_ARP_HOST_RE = re.compile(r"^\s*(\S+)\s+\(")
+
+_LEASE_START_RE = re.compile(r"^\s*lease\s+(\S+)\s*\{")
+_LEASE_MAC_RE = re.compile(r"^\s*hardware\s+ethernet\s+([0-9A-Fa-f:]+)\s*;")
+_LEASE_HOST_RE = re.compile(r'^\s*client-hostname\s+"([^"]*)"\s*;')
+_LEASE_BINDING_RE = re.compile(r"^\s*binding\s+state\s+(\w+)\s*;")
+
+# MAC "00:00:00:00:00:00" / wpisy niekompletne w ARP
+_EMPTY_MAC = "000000000000"
+
+
+def _observation(ip, mac, hostname, source, seen_at):
+    ip = ip_or_none(ip)
+    mac = mac_hex(mac)
+    if mac == _EMPTY_MAC:
+        mac = ""
+    if not ip and not mac:
+        return None
+    return Observation(ip, mac, hostname_key(hostname), source, seen_at)
+
+
+# ============================================================
+# PARSERY
+# ============================================================
+
+def parse_arp(lines, seen_at):
+    """
+    Linie tablicy ARP w dowolnym z typowych formatów – w każdej szukamy
+    adresu IPv4 i adresu MAC.
+    """
+    for line in lines:
+        ip_match = _IPV4_RE.search(line)
+        mac_match = _MAC_RE.search(line)
+        if not ip_match or not mac_match:
+            continue
+        hostname = ""
+        host_match = _ARP_HOST_RE.match(line)
+        if host_match and host_match.group(1) != "?":
+            hostname = host_match.group(1)
+        obs = _observation(ip_match.group(1), mac_match.group(1), hostname, "arp", seen_at)
+        if obs:
+            yield obs
+
+
+def parse_dhcp_leases(lines, seen_at):
+    """
+    dhcpd.leases (bloki "lease ... { ... }") albo dnsmasq
+    ("<wygasa> <mac> <ip> <nazwa> <client-id>" w jednej linii).
+    Z ISC bierzemy tylko dzierżawy w stanie active.
+    """
+    lease = None
+    for line in lines:
+        if lease is None:
+            start = _LEASE_START_RE.match(line)
+            if start:
+                lease = {"ip": start.group(1), "mac": "", "hostname": "", "state": "active"}
+                continue
+            parts = line.split()
+            if len(parts) >= 4 and parts[0].isdigit():
+                hostname = "" if parts[3] == "*" else parts[3]
+                obs = _observation(parts[2], parts[1], hostname, "dhcp", seen_at)
+                if obs:
+                    yield obs
+            continue
+
+        if line.strip().startswith("}"):
+            if lease["state"] == "active":
+                obs = _observation(lease["ip"], lease["mac"], lease["hostname"], "dhcp", seen_at)
+                if obs:
+                    yield obs
+            lease = None
+            continue
+
+        for regex, key in (
+            (_LEASE_MAC_RE, "mac"),
+            (_LEASE_HOST_RE, "hostname"),
+            (_LEASE_BINDING_RE, "state"),
+        ):
+            match = regex.match(line)
+            if match:
+                lease[key] = match.group(1)
+                break
+
+
+def parse_nmap_xml(file_obj, seen_at):
+    """
+    Wynik nmap -oX: tylko hosty ze statusem "up". Elementy <host> są
+    czyszczone po przetworzeniu, więc pamięć nie rośnie z rozmiarem pliku.
+    Czas skanu bierzemy z atrybutu endtime hosta (jeśli jest).
+    """
+    for _, elem in ET.iterparse(file_obj, events=("end",)):
+        if elem.tag != "host":
+            continue
+        status = elem.find("status")
+        if status is None or status.get("state") == "up":
+            ip = mac = ""
+            for address in elem.iter("address"):
+                if address.get("addrtype") in ("ipv4", "ipv6") and not ip:
+                    ip = address.get("addr", "")
+                elif address.get("addrtype") == "mac":
+                    mac = address.get("addr", "")
+            hostname_elem = elem.find("hostnames/hostname")
+            hostname = hostname_elem.get("name", "") if hostname_elem is not None else ""
+
+            host_seen_at = seen_at
+            endtime = elem.get("endtime")
+            if endtime and endtime.isdigit():
+                host_seen_at = datetime.fromtimestamp(int(endtime), tz=dt_timezone.utc)
+
+            obs = _observation(ip, mac, hostname, "nmap", host_seen_at)
+            if obs:
+                yield obs
+        elem.clear()
+
+
+# ============================================================
+# UZGADNIANIE Z KARTAMI
+# ============================================================
+
+def _merge_observations(observations):
+    """
+    Jedna obserwacja na adres MAC (albo IP, gdy MAC nieznany) – najnowsza.
+    Brakujące pola uzupełniamy z innych źródeł (np. nazwa z DHCP, IP z ARP).
+    """
+    merged = {}
+    for obs in observations:
+        key = obs.mac or obs.ip
+        current = merged.get(key)
+        if current is None:
+            merged[key] = obs
+            continue
+        newer, older = (obs, current) if obs.seen_at >= current.seen_at else (current, obs)
+        merged[key] = newer._replace(
+            ip=newer.ip or older.ip,
+            hostname=newer.hostname or older.hostname,
+        )
+    return list(merged.values())
+
+
+def _load_candidates(observations):
+    """
+    Karty pasujące po MAC albo IP – zapytania IN (...) po kolumnach z indeksami.
+    Zwraca (po_mac, po_ip): {wartość: karta}.
+    """
+    macs = sorted({o.mac for o in observations if o.mac})
+    ips = sorted({o.ip for o in observations if o.ip})
+    fields = (
+        "pk", "inventory_number", "ip_address", "mac_address", "hostname",
+        "ip_normalized", "mac_normalized", "hostname_normalized",
+        "last_seen_at", "last_seen_ip",
+    )
+
+    by_mac, by_ip = {}, {}
+    for field, values, index in (("mac_normalized", macs, by_mac), ("ip_normalized", ips, by_ip)):
+        for start in range(0, len(values), IN_CHUNK_SIZE):
+            rows = Equipment.objects.filter(
+                **{f"{field}__in": values[start:start + IN_CHUNK_SIZE]}
+            ).only(*fields[1:])
+            for equipment in rows:
+                # przy zdublowanych adresach (konflikt) wygrywa najniższy numer
+                value = getattr(equipment, field)
+                current = index.get(value)
+                if current is None or equipment.inventory_number < current.inventory_number:
+                    index[value] = equipment
+    return by_mac, by_ip
+
+
+def _short_name(hostname):
+    return hostname.split(".", 1)[0]
+
+
+def reconcile(observations, dry_run=False) -> dict:
+    """
+    Uzgadnia obserwacje z kartami:
+    - dopasowanie po MAC, a gdy karta nie ma MAC – po IP,
+    - last_seen_at / last_seen_ip dla dopasowanych kart,
+    - niezgodności: inny IP, inny MAC, inna nazwa hosta, urządzenie spoza bazy.
+
+    Niezgodności kart (i adresów MAC spoza bazy) widzianych w tym skanie są
+    zastępowane nowymi; pozostałe zostają bez zmian (skan może obejmować
+    tylko część sieci).
+    """
+    observations = _merge_observations(observations)
+    by_mac, by_ip = _load_candidates(observations)
+
+    seen = {}
+    mismatches = []
+    unknown_macs = set()
+    unknown_ips = set()
+
+    for obs in observations:
+        equipment = by_mac.get(obs.mac) if obs.mac else None
+        matched_by_mac = equipment is not None
+        if equipment is None and obs.ip:
+            candidate = by_ip.get(obs.ip)
+            # po IP dopasowujemy tylko wtedy, gdy MAC nie przeczy karcie
+            if candidate is not None and (
+                not obs.mac or not candidate.mac_normalized or candidate.mac_normalized == obs.mac
+            ):
+                equipment = candidate
+
+        def mismatch(kind, expected, observed, eq=equipment):
+            mismatches.append(
+                NetworkMismatch(
+                    equipment=eq,
+                    kind=kind,
+                    expected=expected or "",
+                    observed=observed or "",
+                    ip=obs.ip,
+                    mac=obs.mac,
+                    hostname=obs.hostname,
+                    source=obs.source,
+                    seen_at=obs.seen_at,
+                )
+            )
+
+        if equipment is None:
+            other = by_ip.get(obs.ip) if obs.ip else None
+            if other is not None:
+                # IP należy do karty z innym adresem MAC
+                mismatch("mac", other.mac_address, obs.mac, eq=other)
+                seen.setdefault(other.pk, None)
+            else:
+                mismatch("unknown", "", obs.ip or obs.mac)
+                if obs.mac:
+                    unknown_macs.add(obs.mac)
+                else:
+                    unknown_ips.add(obs.ip)
+            continue
+
+        previous = seen.get(equipment.pk)
+        if previous is None or obs.seen_at > previous.seen_at:
+            seen[equipment.pk] = obs
+
+        if matched_by_mac and obs.ip and equipment.ip_normalized and obs.ip != equipment.ip_normalized:
+            mismatch("ip", equipment.ip_address, obs.ip)
+        if not matched_by_mac and obs.mac and not equipment.mac_normalized:
+            mismatch("mac", "", obs.mac)
+        if (
+            obs.hostname
+            and equipment.hostname_normalized
+            and _short_name(obs.hostname) != _short_name(equipment.hostname_normalized)
+        ):
+            mismatch("hostname", equipment.hostname, obs.hostname)
+
+    # karty do aktualizacji last_seen_* (tylko gdy obserwacja jest nowsza)
+    to_update = []
+    candidates = {e.pk: e for e in list(by_mac.values()) + list(by_ip.values())}
+    for pk, obs in seen.items():
+        if obs is None:
+            continue
+        equipment = candidates[pk]
+        if equipment.last_seen_at is None or obs.seen_at > equipment.last_seen_at:
+            equipment.last_seen_at = obs.seen_at
+            equipment.last_seen_ip = obs.ip
+            to_update.append(equipment)
+
+    summary = {
+        "observations": len(observations),
+        "matched": sum(1 for obs in seen.values() if obs is not None),
+        "updated": len(to_update),
+        "mismatches": len(mismatches),
+        "unknown": sum(1 for m in mismatches if m.kind == "unknown"),
+    }
+    if dry_run:
+        summary["mismatch_objects"] = mismatches
+        return summary
+
+    with transaction.atomic():
+        # bulk_update nie rusza last_modified_at – skan nie jest edycją karty.
+        # _base_manager (zwykły QuerySet) – bez podbicia wersji danych:
+        # last_seen_* nie ma w cache'owanych fragmentach ani raportach.
+        Equipment._base_manager.bulk_update(
+            to_update, ["last_seen_at", "last_seen_ip"], batch_size=WRITE_BATCH_SIZE
+        )
+
+        pks = sorted(seen)
+        for start in range(0, len(pks), IN_CHUNK_SIZE):
+            NetworkMismatch.objects.filter(equipment_id__in=pks[start:start + IN_CHUNK_SIZE]).delete()
+        macs = sorted(unknown_macs)
+        for start in range(0, len(macs), IN_CHUNK_SIZE):
+            NetworkMismatch.objects.filter(
+                equipment=None, mac__in=macs[start:start + IN_CHUNK_SIZE]
+            ).delete()
+        ips = sorted(unknown_ips)
+        for start in range(0, len(ips), IN_CHUNK_SIZE):
+            NetworkMismatch.objects.filter(
+                equipment=None, mac="", ip__in=ips[start:start + IN_CHUNK_SIZE]
+            ).delete()
+
+        NetworkMismatch.objects.bulk_create(mismatches, batch_size=WRITE_BATCH_SIZE)
+
+    return summary
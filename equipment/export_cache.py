@@ -0,0 +1,226 @@
+"""
+Cache plików eksportu kart sprzętu (XLSX) na dysku.
+
+Klucz pliku = liczba kart + najnowsze last_modified_at. Jeżeli od ostatniego
+eksportu nic się nie zmieniło, plik jest wysyłany z dysku bez przebudowy.
+Jeżeli plik jest nieaktualny:
+- wysyłamy ostatni istniejący plik; nazwa pobieranego pliku zawiera datę
+  jego zbudowania, a strona z linkiem do eksportu (import w panelu) pokazuje
+  ostrzeżenie i link ?fresh=1 (export_status()),
+- nowy buduje komenda build_equipment_export z crona – nie wątek w workerze
+  gunicorna, który ginąłby po cichu przy restarcie workera; jedna budowa
+  naraz (plik blokady). Wpis crontab (co 10 minut; bez zmian nic nie robi):
+
+      */10 * * * * cd /srv/baza && python manage.py build_equipment_export
+
+Plik jest otwierany przed zwróceniem do widoku – równoległe sprzątanie
+w innym workerze może go już usunąć z katalogu, ale otwarty da się doczytać.
+Stare pliki są sprzątane wg wieku i łącznego rozmiaru.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .columns import iter_export_rows, write_workbook
+from .models import Equipment
+
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_PREFIX = "karty_sprzetu_"
+LOCK_NAME = "export.lock"
+
+# Blokada starsza niż to (np. po restarcie procesu w trakcie budowy) jest ignorowana
+LOCK_TIMEOUT_SECONDS = 10 * 60
+
+
+def _cache_dir() -> Path:
+    path = Path(
+        getattr(
+            settings,
+            "EQUIPMENT_EXPORT_CACHE_DIR",
+            Path(settings.BASE_DIR) / "var" / "exports",
+        )
+    )
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def export_stamp() -> str:
+    """
+    Klucz aktualnego stanu tabeli Equipment (jedno zapytanie agregujące).
+    """
+    data = Equipment.objects.aggregate(
+        count=Count("id"),
+        last=Max("last_modified_at"),
+    )
+    last = data["last"].strftime("%Y%m%d%H%M%S%f") if data["last"] else "0"
+    return f"{data['count']}_{last}"
+
+
+def artifact_path(stamp: str) -> Path:
+    return _cache_dir() / f"{ARTIFACT_PREFIX}{stamp}.xlsx"
+
+
+def _artifacts():
+    """
+    Istniejące pliki eksportu, od najnowszego.
+    """
+    files = []
+    for p in _cache_dir().glob(f"{ARTIFACT_PREFIX}*.xlsx"):
+        try:
+            files.append((p.stat().st_mtime, p))
+        except OSError:
+            continue
+    return [p for _, p in sorted(files, reverse=True)]
+
+
+def build_artifact(stamp: str) -> Path:
+    """
+    Buduje plik eksportu dla podanego klucza (zapis do pliku tymczasowego
+    i atomowa zamiana nazwy – czytelnicy nigdy nie widzą połowy pliku).
+    """
+    target = artifact_path(stamp)
+    tmp = target.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+
+    queryset = Equipment.objects.all().order_by("inventory_number")
+    tmp.write_bytes(write_workbook(iter_export_rows(queryset)))
+    tmp.replace(target)
+
+    cleanup_artifacts(keep=target)
+    return target
+
+
+def cleanup_artifacts(keep=None):
+    """
+    Usuwa pliki starsze niż EQUIPMENT_EXPORT_CACHE_MAX_AGE_DAYS oraz
+    najstarsze pliki ponad limit EQUIPMENT_EXPORT_CACHE_MAX_MB.
+    Najnowszy plik (i `keep`) zostaje zawsze.
+    """
+    max_age = getattr(settings, "EQUIPMENT_EXPORT_CACHE_MAX_AGE_DAYS", 7) * 86400
+    max_bytes = getattr(settings, "EQUIPMENT_EXPORT_CACHE_MAX_MB", 200) * 1024 * 1024
+
+    files = _artifacts()
+    protected = {files[0]} if files else set()
+    if keep is not None:
+        protected.add(keep)
+
+    now = time.time()
+    total = 0
+    for p in files:
+        try:
+            stat = p.stat()
+        except OSError:
+            continue
+        expired = now - stat.st_mtime > max_age
+        if p not in protected and (expired or total + stat.st_size > max_bytes):
+            p.unlink(missing_ok=True)
+            continue
+        total += stat.st_size
+
+
+def _acquire_file_lock() -> bool:
+    """
+    Blokada między procesami (kilku workerów gunicorna): plik tworzony z O_EXCL.
+    """
+    lock = _cache_dir() / LOCK_NAME
+    try:
+        if time.time() - lock.stat().st_mtime > LOCK_TIMEOUT_SECONDS:
+            lock.unlink(missing_ok=True)
+    except OSError:
+        pass
+    try:
+        fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    os.close(fd)
+    return True
+
+
+def _release_file_lock():
+    (_cache_dir() / LOCK_NAME).unlink(missing_ok=True)
+
+
+def refresh_export_artifact():
+    """
+    Buduje plik dla bieżącego stanu kart, jeżeli go jeszcze nie ma
+    (komenda build_equipment_export). Zwraca (ścieżka, czy_zbudowano);
+    ścieżka None – budowa trwa już w innym procesie.
+    """
+    stamp = export_stamp()
+    target = artifact_path(stamp)
+    if target.exists():
+        return target, False
+    if not _acquire_file_lock():
+        return None, False
+    try:
+        return build_artifact(stamp), True
+    finally:
+        _release_file_lock()
+
+
+def _open(path: Path):
+    try:
+        return open(path, "rb")
+    except FileNotFoundError:
+        return None
+
+
+def get_export_artifact(force=False):
+    """
+    Zwraca (otwarty plik, czy_aktualny).
+
+    - aktualny plik istnieje              -> (plik, True)
+    - jest tylko starszy plik             -> (starszy plik, False); nowy zbuduje
+                                             build_equipment_export
+    - brak plików (albo zniknęły w międzyczasie) lub force=True
+                                          -> budowa teraz, (nowy plik, True)
+    """
+    stamp = export_stamp()
+    if not force:
+        current = _open(artifact_path(stamp))
+        if current is not None:
+            return current, True
+        for path in _artifacts():
+            previous = _open(path)
+            if previous is not None:
+                logger.info("Eksport kart sprzętu nieaktualny – wysłano %s", path.name)
+                return previous, False
+
+    return open(build_artifact(stamp), "rb"), True
+
+
+def built_at(export_file) -> datetime:
+    """
+    Czas zbudowania otwartego pliku eksportu (mtime) – do nazwy pobieranego pliku.
+    """
+    return datetime.fromtimestamp(os.fstat(export_file.fileno()).st_mtime, tz=timezone.get_current_timezone())
+
+
+def export_status() -> dict:
+    """
+    Stan eksportu dla strony z linkiem do niego:
+    {"current": czy jest plik dla bieżących danych, "built_at": data pliku,
+    który zostanie wysłany (None – brak plików, zostanie zbudowany przy pobraniu)}.
+    """
+    current = artifact_path(export_stamp())
+    for path in [current, *_artifacts()]:
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            continue
+        return {
+            "current": path == current,
+            "built_at": datetime.fromtimestamp(mtime, tz=timezone.get_current_timezone()),
+        }
+    return {"current": False, "built_at": None}
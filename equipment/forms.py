@@ -1,5 +1,8 @@
 from django import forms
-from .models import Equipment
+from django.core.exceptions import ValidationError
+
+from .concurrency import VersionCheckedForm
+from .models import EDITABLE_FIELDS, Equipment
 
 
 class EquipmentForm(forms.ModelForm):
@@ -49,3 +52,80 @@ class EquipmentForm(forms.ModelForm):
             self.fields["last_modified_by"].widget.attrs["style"] = (
                 "background-color: #eee;"
             )
+
+
+class EquipmentEditForm(VersionCheckedForm):
+    """
+    Formularz EquipmentUpdateView: pola EDITABLE_FIELDS + ukryta wersja karty.
+    """
+
+    class Meta:
+        model = Equipment
+        fields = EDITABLE_FIELDS
+
+
+class EquipmentAdminForm(VersionCheckedForm):
+    """
+    Formularz karty w adminie (wszystkie pola) + ukryta wersja karty.
+    """
+
+    class Meta:
+        model = Equipment
+        fields = "__all__"
+
+
+def clean_model_value(model_field, raw):
+    """
+    Wartość wpisana przez użytkownika -> wartość pola modelu:
+    pole formularza pola modelu (parsowanie dat, choices, max_length)
+    i model_field.clean(). Rzuca ValidationError.
+    """
+    return model_field.clean(model_field.formfield().clean(raw), None)
+
+
+def bulk_editable_fields():
+    """
+    Pola dostępne w hurtowej edycji: EDITABLE_FIELDS bez pól unikalnych
+    (jedna wartość dla wielu kart złamałaby unikalność).
+    """
+    fields = (Equipment._meta.get_field(name) for name in EDITABLE_FIELDS)
+    return [field for field in fields if not field.unique]
+
+
+class BulkEditForm(forms.Form):
+    """
+    Hurtowa edycja jednego pola (akcja EquipmentAdmin.action_bulk_edit).
+
+    Wartość jest sprawdzana raz (clean_model_value), a potem zapisywana
+    jednym UPDATE dla całego zaznaczenia.
+    """
+
+    field = forms.ChoiceField(label="Pole")
+    value = forms.CharField(
+        label="Nowa wartość",
+        required=False,
+        strip=False,
+        help_text="Daty w formacie RRRR-MM-DD; puste pole czyści wartość (jeżeli pole na to pozwala).",
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["field"].choices = [
+            (field.name, field.verbose_name) for field in bulk_editable_fields()
+        ]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        name = cleaned_data.get("field")
+        if not name:
+            return cleaned_data
+
+        model_field = Equipment._meta.get_field(name)
+        try:
+            cleaned_data["value"] = clean_model_value(model_field, cleaned_data.get("value", ""))
+        except ValidationError as exc:
+            self.add_error("value", exc)
+        return cleaned_data
+
+    def model_field(self):
+        return Equipment._meta.get_field(self.cleaned_data["field"])
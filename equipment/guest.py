@@ -0,0 +1,48 @@
+"""
+Tryb gościa – znacznik w podpisanym ciasteczku, nie w sesji.
+
+Logowanie jako gość nie tworzy wiersza sesji; gość przegląda strony
+bez żadnego zapisu sesji (i bez jej odczytu – PrerenderedPagesMiddleware).
+W szablonach: IS_GUEST (context_processors.guest_mode).
+"""
+
+from django.conf import settings
+from django.core import signing
+
+
+GUEST_COOKIE = "baza_guest"
+GUEST_COOKIE_SALT = "baza.guest"
+
+
+def is_guest(request) -> bool:
+    cached = getattr(request, "_is_guest", None)
+    if cached is None:
+        value = request.get_signed_cookie(GUEST_COOKIE, default="", salt=GUEST_COOKIE_SALT)
+        cached = request._is_guest = value == "1"
+    return cached
+
+
+def guest_cookie_value() -> str:
+    """
+    Podpisana wartość ciasteczka (jak w set_signed_cookie) – dla żądań
+    budowanych w kodzie (prerender.py).
+    """
+    return signing.get_cookie_signer(salt=GUEST_COOKIE + GUEST_COOKIE_SALT).sign("1")
+
+
+def set_guest_cookie(response):
+    response.set_signed_cookie(
+        GUEST_COOKIE,
+        "1",
+        salt=GUEST_COOKIE_SALT,
+        max_age=settings.SESSION_COOKIE_AGE,
+        secure=settings.SESSION_COOKIE_SECURE,
+        httponly=True,
+        samesite="Lax",
+    )
+    return response
+
+
+def clear_guest_cookie(response):
+    response.delete_cookie(GUEST_COOKIE, samesite="Lax")
+    return response
@@ -0,0 +1,224 @@
+"""
+Historia zmian kart sprzętu (EquipmentChange).
+
+Wszystkie ścieżki hurtowe (akcje admina, import) zapisują historię tutaj:
+- partiami po kilka tysięcy kart: odczyt aktualnych wartości zmienianych
+  pól, UPDATE partii, bulk_create wpisów historii,
+- wszystkie partie w jednej transakcji.
+
+Nie używamy sygnałów post_save – queryset.update() ich i tak nie wywołuje,
+a zapis wiersz po wierszu przy 10 000 kart byłby zbyt wolny.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .concurrency import VERSION_BUMP
+from .models import EquipmentChange
+from .normalize import network_shadow_values
+from .signals import ROOM_FIELDS, send_rooms_changed
+
+
+HISTORY_BATCH_SIZE = 1000
+# Partia kart w hurtowych zmianach (update_with_history)
+UPDATE_CHUNK_SIZE = 2000
+
+logger = logging.getLogger(__name__)
+
+
+def value_to_text(value) -> str:
+    """
+    Zamiana wartości pola na tekst zapisywany w historii.
+    None -> "", daty w formacie ISO.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def make_change(equipment_id, inventory_number, field_name, old, new, source, user=None, changed_at=None):
+    """
+    Buduje (niezapisany) wpis historii.
+    """
+    return EquipmentChange(
+        equipment_id=equipment_id,
+        inventory_number=inventory_number or "",
+        field_name=field_name,
+        old_value=value_to_text(old),
+        new_value=value_to_text(new),
+        source=source,
+        changed_by=user if user is not None and user.is_authenticated else None,
+        changed_at=changed_at or timezone.now(),
+    )
+
+
+def save_changes(changes) -> int:
+    """
+    Hurtowy zapis wpisów historii (bulk_create partiami).
+    """
+    changes = list(changes)
+    if changes:
+        EquipmentChange.objects.bulk_create(changes, batch_size=HISTORY_BATCH_SIZE)
+    return len(changes)
+
+
+def update_with_history(
+    queryset,
+    values: dict,
+    user=None,
+    source="admin",
+    chunk_size=UPDATE_CHUNK_SIZE,
+    progress=None,
+) -> int:
+    """
+    Odpowiednik queryset.update(**values), który dodatkowo:
+    - ustawia last_modified_by / last_modified_at,
+    - utrzymuje znormalizowane kopie pól sieciowych (ip/mac/hostname),
+    - podbija wersję kart (optimistic locking – equipment.concurrency),
+    - zapisuje różnice pól do EquipmentChange (bulk_create),
+    - po zmianie budynku / sali zgłasza dotknięte sale
+      (equipment_rooms_changed – powiązania laboratoriów, liczniki licencji).
+
+    Karty są przetwarzane partiami po `chunk_size` (wg pk) w jednej
+    transakcji – w pamięci jest tylko lista pk i jedna partia historii.
+    `progress(zrobione, wszystkie)` jest wołane po każdej partii;
+    bez niego postęp dużych operacji trafia do logu.
+
+    Zwraca liczbę zaktualizowanych kart (jak queryset.update()).
+    """
+    fields = list(values)
+    now = timezone.now()
+    author = user if user is not None and user.is_authenticated else None
+    update_values = {
+        **values,
+        **network_shadow_values(values),
+        "last_modified_by": author,
+        "last_modified_at": now,
+        "version": VERSION_BUMP,
+    }
+    base = queryset.model._default_manager
+
+    with transaction.atomic():
+        pks = list(queryset.order_by("pk").values_list("pk", flat=True))
+        total = len(pks)
+        updated_count = 0
+
+        if any(name in values for name in ROOM_FIELDS):
+            old_rooms = set(
+                base.filter(pk__in=pks).values_list(*ROOM_FIELDS).distinct().order_by()
+            )
+            new_rooms = {
+                (values.get("building", building), values.get("room", room))
+                for building, room in old_rooms
+            }
+            send_rooms_changed(queryset.model, old_rooms | new_rooms)
+
+        for offset in range(0, total, chunk_size):
+            chunk = pks[offset:offset + chunk_size]
+            current = (
+                base.filter(pk__in=chunk)
+                .select_for_update()
+                .values_list("pk", "inventory_number", *fields)
+                .order_by()
+            )
+            changes = []
+            for pk, inventory_number, *old_values in current:
+                for name, old in zip(fields, old_values):
+                    new = values[name]
+                    if value_to_text(old) != value_to_text(new):
+                        changes.append(
+                            make_change(pk, inventory_number, name, old, new, source, author, now)
+                        )
+
+            updated_count += base.filter(pk__in=chunk).update(**update_values)
+            save_changes(changes)
+
+            done = min(offset + chunk_size, total)
+            if progress is not None:
+                progress(done, total)
+            elif total > chunk_size:
+                logger.info("%s: %s/%s kart", source, done, total)
+
+    return updated_count
+
+
+def form_changes(obj, form, user=None, source="edit"):
+    """
+    Wpisy historii dla pojedynczej edycji przez ModelForm
+    (form.initial = wartości sprzed edycji, form.changed_data = zmienione pola).
+    """
+    now = timezone.now()
+    changes = []
+    for name in form.changed_data:
+        old = form.initial.get(name)
+        new = getattr(obj, name, None)
+        if value_to_text(old) == value_to_text(new):
+            continue
+        changes.append(
+            make_change(obj.pk, obj.inventory_number, name, old, new, source, user, now)
+        )
+    return changes
+
+
+# ============================================================
+# ZAPYTANIA DO HISTORII
+# ============================================================
+
+
+def equipment_history(equipment, limit=50):
+    """
+    Ostatnie zmiany jednej karty (indeks equipment, -changed_at).
+    """
+    return (
+        EquipmentChange.objects.filter(equipment=equipment)
+        .select_related("changed_by")
+        .order_by("-changed_at", "-id")[:limit]
+    )
+
+
+def moved_out_of_room(building, room, since, until=None):
+    """
+    Zmiany typu "karta wyjechała z pomieszczenia <room>" w zadanym okresie.
+
+    Korzysta z indeksu (field_name, changed_at) – zakres czasu zawęża
+    wyszukiwanie, a porównanie starej wartości robimy już na małym zbiorze.
+    Budynek sprawdzamy tak: karta nadal jest w tym budynku albo w tej samej
+    zmianie (ten sam changed_at) budynek zmienił się z podanego.
+    """
+    qs = EquipmentChange.objects.filter(
+        field_name="room",
+        old_value=room,
+        changed_at__gte=since,
+    )
+    if until is not None:
+        qs = qs.filter(changed_at__lt=until)
+    if building:
+        building_changed = EquipmentChange.objects.filter(
+            equipment_id=OuterRef("equipment_id"),
+            changed_at=OuterRef("changed_at"),
+            field_name="building",
+            old_value=building,
+        )
+        qs = qs.filter(Q(equipment__building=building) | Exists(building_changed))
+    return qs.select_related("equipment", "changed_by").order_by("-changed_at")
+
+
+def changed_equipment_ids(since, until=None, field_name=None):
+    """
+    Id kart zmienionych w zadanym okresie (opcjonalnie tylko dla jednego pola).
+    """
+    qs = EquipmentChange.objects.filter(changed_at__gte=since)
+    if until is not None:
+        qs = qs.filter(changed_at__lt=until)
+    if field_name:
+        qs = qs.filter(field_name=field_name)
+    return qs.exclude(equipment__isnull=True).values_list("equipment_id", flat=True).distinct()
+
@@ -0,0 +1,527 @@
+"""
+Import kart sprzętu z pliku XLSX – wspólny "silnik" dla importu
+bezpośredniego i podglądu zmian (dry-run).
+
+Przebieg:
+1) build_import_plan() – jedno przejście po pliku (openpyxl w trybie read_only),
+   wiersze przetwarzane paczkami po IMPORT_CHUNK_SIZE; dla każdej paczki
+   jedno zapytanie o istniejące karty (inventory_number__in=...).
+   Wynik: plan z podziałem na new / changed / unchanged / invalid.
+   Wiersze "unchanged" są tylko liczone, więc plan zajmuje mało pamięci.
+   Wartości komórek są normalizowane kolumnami (equipment.normalize).
+2) save_plan() / load_plan() – plan zapisany na serwerze (JSON) pod tokenem.
+3) apply_plan() – zapis planu do bazy (bulk_create / bulk_update + historia)
+   w jednej transakcji, bez ponownego czytania pliku.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import secrets
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from openpyxl import load_workbook
+
+from .concurrency import VERSION_BUMP
+from .history import make_change, save_changes, value_to_text
+from .models import Equipment
+from .signals import equipment_imported
+from .normalize import (
+    build_converters,
+    ip_or_none,
+    mac_hex,
+    network_shadow_values,
+    normalize_columns,
+    resolve_header,
+)
+
+
+IMPORT_CHUNK_SIZE = 1000
+WRITE_BATCH_SIZE = 500
+
+# Ile wierszy każdego rodzaju pokazujemy w podglądzie
+PREVIEW_SAMPLE_ROWS = 200
+
+# Podglądy starsze niż doba są usuwane przy zapisie kolejnego
+PREVIEW_MAX_AGE_SECONDS = 24 * 3600
+
+# Pola, których nie przyjmujemy z pliku (ustawiane automatycznie)
+EXCLUDED_FIELDS = {"last_modified_by", "last_modified_at"}
+
+_TOKEN_RE = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+
+class ImportFileError(Exception):
+    """
+    Plik nie nadaje się do importu (nie da się go odczytać / jest pusty).
+    """
+
+
+def importable_fields() -> dict:
+    """
+    Pola modelu, które można ustawić z pliku: nazwa -> obiekt pola.
+    """
+    return {
+        f.name: f
+        for f in Equipment._meta.get_fields()
+        if f.concrete
+        and not f.many_to_many
+        and not f.auto_created
+        and f.editable
+        and f.name not in EXCLUDED_FIELDS
+    }
+
+
+def _to_json_value(value):
+    """
+    Wartość pola w postaci do zapisania w planie (JSON).
+    """
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+# ============================================================
+# 1) BUDOWA PLANU
+# ============================================================
+
+
+def _iter_sheet_rows(file_obj):
+    """
+    Zwraca (nagłówki, iterator wierszy) z aktywnego arkusza.
+    """
+    try:
+        wb = load_workbook(file_obj, read_only=True, data_only=True)
+    except Exception as exc:
+        raise ImportFileError(f"Nie udało się odczytać pliku XLSX: {exc}")
+
+    rows = wb.active.iter_rows(values_only=True)
+    header_row = next(rows, None)
+    if header_row is None:
+        wb.close()
+        raise ImportFileError("Plik jest pusty.")
+
+    headers = ["" if cell is None else str(cell).strip() for cell in header_row]
+
+    def generator():
+        try:
+            yield from rows
+        finally:
+            wb.close()
+
+    return headers, generator()
+
+
+# Różne zapisy tej samej wartości, które przy porównaniu z bazą nie są zmianą:
+# MAC / IP w dowolnym obsługiwanym zapisie (dawne, niekanoniczne wartości
+# w bazie) i białe znaki na brzegach tekstu (import je obcina).
+_COMPARISON_KEYS = {
+    "mac_address": mac_hex,
+    "ip_address": ip_or_none,
+}
+
+
+def comparison_key(name, value) -> str:
+    """
+    Klucz porównania wartości z pliku i z bazy – dzięki niemu plik
+    z eksportu zaimportowany bez edycji nie zmienia żadnej karty.
+    """
+    text = value_to_text(value).strip()
+    key = _COMPARISON_KEYS.get(name)
+    if key is None:
+        return text
+    return key(text) or text
+
+
+def _is_empty_cell(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _diff_chunk(chunk, column_fields, entries, stats):
+    """
+    Porównuje paczkę sparsowanych wierszy z bazą (jedno zapytanie)
+    i uzupełnia słownik entries (klucz: inventory_number).
+
+    Pusta komórka w istniejącej karcie nie zmienia pola (np. pusta
+    KATEGORIA_POMIESZCZENIA nie przestawia karty na MAGAZYN) – takie
+    komórki liczymy w stats["kept_empty_cells"]. Nowa karta dostaje
+    w pustych polach wartości domyślne.
+    """
+    numbers = [item["inventory_number"] for item in chunk]
+    existing = {
+        row["inventory_number"]: row
+        for row in Equipment.objects.filter(inventory_number__in=numbers).values(
+            "pk", *column_fields
+        )
+    }
+
+    for item in chunk:
+        inventory_number = item["inventory_number"]
+        values = item["values"]
+        current = existing.get(inventory_number)
+
+        if current is None:
+            entry = {
+                "status": "new",
+                "values": {k: _to_json_value(v) for k, v in values.items()},
+            }
+        else:
+            changes = {}
+            for name, new in values.items():
+                old = current[name]
+                if name in item["empty"]:
+                    if comparison_key(name, old) != comparison_key(name, new):
+                        stats["kept_empty_cells"] += 1
+                    continue
+                if comparison_key(name, old) != comparison_key(name, new):
+                    changes[name] = [value_to_text(old), _to_json_value(new)]
+            entry = {
+                "status": "changed" if changes else "unchanged",
+                "pk": current["pk"],
+                "changes": changes,
+            }
+
+        entry["row"] = item["row"]
+        entry["inventory_number"] = inventory_number
+        # Duplikat w pliku – wygrywa ostatnie wystąpienie (jak przy update_or_create)
+        entries.pop(inventory_number, None)
+        entries[inventory_number] = entry
+
+
+def _normalize_chunk(raw_chunk, column_map, converters, stats, seen_inventory_numbers, invalid):
+    """
+    Normalizacja paczki surowych wierszy (układ kolumnowy) -> lista wierszy
+    gotowych do porównania z bazą. Wiersze z błędami trafiają do `invalid`.
+    """
+    raw_columns = {
+        name: [row[idx] if idx < len(row) else None for _, row in raw_chunk]
+        for idx, name in column_map
+    }
+    columns, row_errors = normalize_columns(raw_columns, converters)
+
+    names = list(columns)
+    parsed = []
+    for i, (row_number, _row) in enumerate(raw_chunk):
+        values = {name: columns[name][i] for name in names}
+        empty = [name for name in names if _is_empty_cell(raw_columns[name][i])]
+
+        inventory_number = values.get("inventory_number") or ""
+        if not inventory_number:
+            # Bez numeru inwentarzowego nie zapisujemy wiersza
+            stats["skipped_no_inventory"] += 1
+            continue
+
+        # Duplikaty NR_INWENTARZOWY w samym pliku (liczymy kolejne wystąpienia)
+        if inventory_number in seen_inventory_numbers:
+            stats["duplicate_inventory_in_file"] += 1
+        else:
+            seen_inventory_numbers.add(inventory_number)
+
+        if i in row_errors:
+            invalid.append(
+                {
+                    "status": "invalid",
+                    "row": row_number,
+                    "inventory_number": inventory_number,
+                    "errors": row_errors[i],
+                }
+            )
+            continue
+
+        parsed.append(
+            {"row": row_number, "inventory_number": inventory_number, "values": values, "empty": empty}
+        )
+    return parsed
+
+
+def iter_normalized_chunks(file_obj, stats, invalid):
+    """
+    Jedno przejście po pliku: zwraca (lista_pól, generator paczek wierszy
+    po normalizacji). Liczniki trafiają do `stats`, wiersze z błędami do
+    `invalid`. Nie dotyka bazy danych.
+    """
+    headers, rows = _iter_sheet_rows(file_obj)
+
+    fields = importable_fields()
+    column_map = []
+    used_fields = set()
+    for idx, header in enumerate(headers):
+        name = resolve_header(header, fields)
+        # Ta sama kolumna dwa razy – bierzemy pierwszą
+        if name and name not in used_fields:
+            column_map.append((idx, name))
+            used_fields.add(name)
+    converters = build_converters(used_fields, fields)
+
+    stats.setdefault("processed_rows", 0)
+    stats.setdefault("skipped_empty_rows", 0)
+    stats.setdefault("skipped_no_inventory", 0)
+    stats.setdefault("duplicate_inventory_in_file", 0)
+    seen_inventory_numbers = set()
+
+    def chunks():
+        raw_chunk = []
+        for row_number, row in enumerate(rows, start=2):
+            # Pomijamy całkowicie puste wiersze
+            if all(cell is None for cell in row):
+                stats["skipped_empty_rows"] += 1
+                continue
+
+            stats["processed_rows"] += 1
+            raw_chunk.append((row_number, row))
+            if len(raw_chunk) >= IMPORT_CHUNK_SIZE:
+                yield _normalize_chunk(
+                    raw_chunk, column_map, converters, stats, seen_inventory_numbers, invalid
+                )
+                raw_chunk = []
+
+        if raw_chunk:
+            yield _normalize_chunk(
+                raw_chunk, column_map, converters, stats, seen_inventory_numbers, invalid
+            )
+
+    return sorted(used_fields), chunks()
+
+
+def build_import_plan(file_obj, filename="") -> dict:
+    """
+    Jedno przejście po pliku -> plan importu (bez zapisu do bazy).
+
+    Wiersze zbieramy w paczki, każdą paczkę normalizujemy kolumnami
+    (equipment.normalize) i porównujemy z bazą jednym zapytaniem.
+    """
+    started = time.monotonic()
+
+    stats = {}
+    invalid = []
+    entries = {}
+    column_fields, chunks = iter_normalized_chunks(file_obj, stats, invalid)
+    stats["kept_empty_cells"] = 0
+    for parsed in chunks:
+        if parsed:
+            _diff_chunk(parsed, column_fields, entries, stats)
+
+    counts = {"new": 0, "changed": 0, "unchanged": 0, "invalid": len(invalid)}
+    kept = []
+    for entry in entries.values():
+        counts[entry["status"]] += 1
+        if entry["status"] != "unchanged":
+            kept.append(entry)
+
+    stats.update(counts)
+    stats["duration_seconds"] = round(time.monotonic() - started, 2)
+
+    return {
+        "filename": filename,
+        "created_at": timezone.now().isoformat(),
+        "columns": column_fields,
+        "stats": stats,
+        "rows": kept,
+        "invalid": invalid,
+    }
+
+
+def plan_sample(plan: dict, limit=PREVIEW_SAMPLE_ROWS) -> dict:
+    """
+    Próbka wierszy do pokazania w podglądzie (po `limit` z każdej grupy).
+    """
+    sample = {"new": [], "changed": [], "invalid": plan["invalid"][:limit]}
+    for entry in plan["rows"]:
+        bucket = sample[entry["status"]]
+        if len(bucket) < limit:
+            bucket.append(entry)
+    return sample
+
+
+# ============================================================
+# 2) PRZECHOWYWANIE PLANU POD TOKENEM
+# ============================================================
+
+
+def _preview_dir() -> Path:
+    path = Path(
+        getattr(
+            settings,
+            "EQUIPMENT_IMPORT_PREVIEW_DIR",
+            Path(settings.BASE_DIR) / "var" / "import_previews",
+        )
+    )
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _cleanup_previews(directory: Path):
+    limit = time.time() - PREVIEW_MAX_AGE_SECONDS
+    for p in directory.glob("*.json"):
+        try:
+            if p.stat().st_mtime < limit:
+                p.unlink()
+        except OSError:
+            pass
+
+
+def save_plan(plan: dict) -> str:
+    """
+    Zapisuje plan na dysku i zwraca token.
+    """
+    directory = _preview_dir()
+    _cleanup_previews(directory)
+
+    token = secrets.token_urlsafe(24)
+    tmp_path = directory / f"{token}.tmp"
+    tmp_path.write_text(json.dumps(plan, ensure_ascii=False), encoding="utf-8")
+    tmp_path.replace(directory / f"{token}.json")
+    return token
+
+
+def load_plan(token: str):
+    """
+    Odczytuje plan zapisany pod tokenem (None, gdy nie istnieje / wygasł).
+    """
+    if not token or not _TOKEN_RE.match(token):
+        return None
+    path = _preview_dir() / f"{token}.json"
+    try:
+        if time.time() - path.stat().st_mtime > PREVIEW_MAX_AGE_SECONDS:
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def discard_plan(token: str):
+    if token and _TOKEN_RE.match(token):
+        (_preview_dir() / f"{token}.json").unlink(missing_ok=True)
+
+
+# ============================================================
+# 3) ZAPIS PLANU DO BAZY
+# ============================================================
+
+
+def apply_plan(plan: dict, user=None) -> dict:
+    """
+    Zapisuje plan w bazie w jednej transakcji.
+
+    - "new"     -> bulk_create (z pominięciem numerów, które w międzyczasie
+                   ktoś dodał),
+    - "changed" -> bulk_update pogrupowany po zestawie zmienionych pól;
+                   wiersze, w których od czasu podglądu zmieniła się
+                   któraś z aktualizowanych wartości, są pomijane (stale),
+    - historia zmian -> bulk_create EquipmentChange.
+    """
+    fields = importable_fields()
+    author = user if user is not None and user.is_authenticated else None
+    now = timezone.now()
+
+    new_entries = [e for e in plan["rows"] if e["status"] == "new"]
+    changed_entries = [e for e in plan["rows"] if e["status"] == "changed"]
+
+    created_count = 0
+    updated_count = 0
+    stale_count = 0
+    touched = []
+
+    def to_python(name, value):
+        return fields[name].to_python(value)
+
+    with transaction.atomic():
+        # --- nowe karty ---
+        for start in range(0, len(new_entries), IMPORT_CHUNK_SIZE):
+            batch = new_entries[start:start + IMPORT_CHUNK_SIZE]
+            taken = set(
+                Equipment.objects.filter(
+                    inventory_number__in=[e["inventory_number"] for e in batch]
+                ).values_list("inventory_number", flat=True)
+            )
+            objs = []
+            for entry in batch:
+                if entry["inventory_number"] in taken:
+                    stale_count += 1
+                    continue
+                values = {k: to_python(k, v) for k, v in entry["values"].items()}
+                obj = Equipment(**values, last_modified_by=author, last_modified_at=now)
+                obj.refresh_network_fields()
+                objs.append(obj)
+            Equipment.objects.bulk_create(objs, batch_size=WRITE_BATCH_SIZE)
+            created_count += len(objs)
+            touched.extend(obj.inventory_number for obj in objs)
+
+        # --- zmienione karty ---
+        history_changes = []
+        for start in range(0, len(changed_entries), IMPORT_CHUNK_SIZE):
+            batch = changed_entries[start:start + IMPORT_CHUNK_SIZE]
+            batch_fields = sorted({name for e in batch for name in e["changes"]})
+            current = {
+                row["pk"]: row
+                for row in Equipment.objects.filter(pk__in=[e["pk"] for e in batch])
+                .select_for_update()
+                .values("pk", *batch_fields)
+            }
+
+            groups = {}
+            for entry in batch:
+                row = current.get(entry["pk"])
+                if row is None or any(
+                    value_to_text(row[name]) != old
+                    for name, (old, _new) in entry["changes"].items()
+                ):
+                    stale_count += 1
+                    continue
+
+                obj = Equipment(
+                    pk=entry["pk"], last_modified_by=author, last_modified_at=now, version=VERSION_BUMP
+                )
+                new_values = {}
+                for name, (old, new) in entry["changes"].items():
+                    new_value = to_python(name, new)
+                    new_values[name] = new_value
+                    setattr(obj, name, new_value)
+                    history_changes.append(
+                        make_change(
+                            entry["pk"], entry["inventory_number"], name,
+                            old, new_value, "import", author, now,
+                        )
+                    )
+                # znormalizowane kopie IP / MAC / hostname (equipment.normalize)
+                shadows = network_shadow_values(new_values)
+                for name, value in shadows.items():
+                    setattr(obj, name, value)
+                key = tuple(sorted(entry["changes"])) + tuple(sorted(shadows))
+                groups.setdefault(key, []).append(obj)
+                touched.append(entry["inventory_number"])
+
+            for key, objs in groups.items():
+                Equipment.objects.bulk_update(
+                    objs,
+                    list(key) + ["last_modified_by", "last_modified_at", "version"],
+                    batch_size=WRITE_BATCH_SIZE,
+                )
+                updated_count += len(objs)
+
+        save_changes(history_changes)
+
+        # np. przebudowa powiązań laboratoriów z salami (educational_software)
+        transaction.on_commit(
+            lambda: equipment_imported.send(
+                sender=Equipment,
+                created_count=created_count,
+                updated_count=updated_count,
+                touched_inventory_numbers=touched,
+            )
+        )
+
+    return {
+        "created_count": created_count,
+        "updated_count": updated_count,
+        "stale_count": stale_count,
+        # numery zapisanych kart – do sprawdzenia konfliktów po imporcie
+        "touched_inventory_numbers": touched,
+    }
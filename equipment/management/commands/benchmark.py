@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import time
+from datetime import date, timedelta
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+
+from equipment.columns import EXPORT_FIELDS, export_row, write_workbook
+from equipment.importing import comparison_key, iter_normalized_chunks
+
+
+def _synthetic_rows(count: int):
+    """
+    Sztuczne karty sprzętu w układzie EXPORT_FIELDS (bez bazy danych).
+    """
+    start = date(2015, 1, 1)
+    values = {
+        "building": "30",
+        "equipment_type": "Komputer",
+        "equipment_name": "Dell OptiPlex 7090",
+        "monitor_serial_number": "",
+        "notes": "",
+        "os_serial_key": "XXXXX-XXXXX-XXXXX-XXXXX-XXXXX",
+        "office_serial_key": "",
+        "room_category": "LAB",
+        "status": "w użyciu",
+        "os_name": "Windows",
+        "os_version": "11",
+        "office_name": "Office",
+        "office_version": "2021",
+        "borrowed_to": "",
+        "supplier": "Dostawca Sp. z o.o.",
+    }
+    for i in range(count):
+        values.update(
+            {
+                "inventory_number": f"3014985{i:06d}",
+                "room": f"{i % 120:03d}",
+                "user_full_name": f"KOWALSKI JAN {i % 300}",
+                "unit_serial_number": f"SN{i:08d}",
+                "purchase_date": start + timedelta(days=i % 3000),
+                "warranty_until": start + timedelta(days=i % 3000 + 1095) if i % 5 else None,
+                "mac_address": ":".join(f"{b:02X}" for b in (0, 0x1A, (i >> 16) & 255, (i >> 8) & 255, i & 255, 1)),
+                "hostname": f"pc-{i}",
+                "ip_address": f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}",
+            }
+        )
+        if i % 10 == 0:
+            # dawne, niekanoniczne wartości z bazy (pola tekstowe bez walidacji)
+            values.update(
+                {
+                    "mac_address": values["mac_address"].lower().replace(":", "-"),
+                    "ip_address": ("DHCP", " brak ", f"10.0.{i & 255}. 5")[i // 10 % 3],
+                    "notes": "  uwagi z inwentaryzacji\n",
+                }
+            )
+        else:
+            values["notes"] = ""
+        yield tuple(values[name] for name in EXPORT_FIELDS)
+
+
+def bench_import_export(command, options):
+    """
+    Eksport -> import przez rejestr kolumn (equipment.columns) na N wierszach:
+    przepustowość w obie strony + sprawdzenie, że dane wracają bez zmian
+    (tak jak porównuje je import – comparison_key; co 10. wiersz ma dawne,
+    niekanoniczne MAC / IP i uwagi z białymi znakami na brzegach).
+    """
+    count = options["rows"]
+    source = list(_synthetic_rows(count))
+
+    started = time.perf_counter()
+    content = write_workbook(map(export_row, source))
+    export_seconds = time.perf_counter() - started
+
+    stats = {}
+    invalid = []
+    started = time.perf_counter()
+    fields, chunks = iter_normalized_chunks(BytesIO(content), stats, invalid)
+    imported = [item["values"] for chunk in chunks for item in chunk]
+    import_seconds = time.perf_counter() - started
+
+    mismatches = 0
+    for original, values in zip(source, imported):
+        if any(
+            comparison_key(name, values[name]) != comparison_key(name, expected)
+            for name, expected in zip(EXPORT_FIELDS, original)
+        ):
+            mismatches += 1
+    mismatches += abs(len(source) - len(imported))
+
+    command.stdout.write(f"Wiersze: {count}, rozmiar pliku: {len(content) / 1024 / 1024:.1f} MB")
+    command.stdout.write(f"Eksport: {export_seconds:.2f} s ({count / export_seconds:,.0f} wierszy/s)")
+    command.stdout.write(f"Import (odczyt + normalizacja): {import_seconds:.2f} s ({count / import_seconds:,.0f} wierszy/s)")
+    command.stdout.write(f"Wiersze z błędami: {len(invalid)}, różnice po eksport -> import: {mismatches}")
+
+    if mismatches or invalid:
+        raise CommandError("Eksport -> import nie jest bezstratny.")
+
+
+def bench_decorator(command, options):
+    """
+    Narzut login_required_no_next na wywołanie widoku (bez bazy danych):
+    widok bez dekoratora / z dekoratorem (zalogowany, anonim) / login_required.
+    """
+    from django.contrib.auth.decorators import login_required
+    from django.contrib.auth.models import AnonymousUser, User
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+
+    from equipment.decorators import login_required_no_next
+
+    def view(request):
+        return HttpResponse("ok")
+
+    count = options["iterations"]
+    factory = RequestFactory()
+    user_request = factory.get("/baza/magazyn/")
+    user_request.user = User(username="bench")
+    anonymous_request = factory.get("/baza/magazyn/")
+    anonymous_request.user = AnonymousUser()
+
+    cases = [
+        ("bez dekoratora", view, user_request),
+        ("login_required_no_next, zalogowany", login_required_no_next(view), user_request),
+        ("login_required_no_next, anonim", login_required_no_next(view), anonymous_request),
+        ("login_required (Django), zalogowany", login_required(view), user_request),
+    ]
+    baseline = None
+    for label, func, request in cases:
+        started = time.perf_counter()
+        for _ in range(count):
+            func(request)
+        per_call = (time.perf_counter() - started) / count * 1e6
+        if baseline is None:
+            baseline = per_call
+        command.stdout.write(f"{label}: {per_call:.2f} µs/wywołanie (+{per_call - baseline:.2f} µs)")
+
+
+def bench_admin_changelist(command, options):
+    """
+    Lista kart w panelu administracyjnym (EquipmentAdmin.changelist_view,
+    z renderowaniem szablonu) – liczba zapytań i czas przy wyłączonym
+    i włączonym trybie wydajności. Pierwsze wywołanie w trybie wydajności
+    wypełnia cache (zimny start), kolejne pokazują stan ustalony.
+    """
+    from django.contrib import admin
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import RequestFactory
+    from django.test.utils import CaptureQueriesContext, override_settings
+
+    from equipment.models import Equipment
+
+    model_admin = admin.site._registry[Equipment]
+    repeat = max(1, options["repeat"])
+    factory = RequestFactory()
+    user = User(username="bench", is_active=True, is_staff=True, is_superuser=True)
+
+    def run(path):
+        request = factory.get(path)
+        request.user = user
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            model_admin.changelist_view(request).render()
+            elapsed = time.perf_counter() - started
+        return len(queries), elapsed
+
+    command.stdout.write(f"Karty: {Equipment.objects.count()}, powtórzenia: {repeat}")
+    for label, path in (
+        ("bez filtrów", "/admin/equipment/equipment/"),
+        ("filtr budynku", "/admin/equipment/equipment/?building=30"),
+    ):
+        for mode in (False, True):
+            with override_settings(EQUIPMENT_ADMIN_PERFORMANCE_MODE=mode):
+                first = run(path)
+                rest = [run(path) for _ in range(repeat)]
+            avg_queries = sum(q for q, _ in rest) / len(rest)
+            avg_ms = sum(t for _, t in rest) / len(rest) * 1000
+            command.stdout.write(
+                f"{label}, tryb wydajności {'wł.' if mode else 'wył.'}: "
+                f"pierwsze {first[0]} zapytań / {first[1] * 1000:.0f} ms, "
+                f"dalej {avg_queries:.0f} zapytań / {avg_ms:.0f} ms"
+            )
+
+
+BENCHMARKS = {
+    "admin_changelist": bench_admin_changelist,
+    "decorator": bench_decorator,
+    "import_export": bench_import_export,
+}
+
+
+class Command(BaseCommand):
+    help = "Pomiary wydajności wybranych ścieżek aplikacji (bez serwera HTTP)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=sorted(BENCHMARKS), help="Nazwa pomiaru")
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=50000,
+            help="Liczba wierszy danych testowych (domyślnie: 50000)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=100000,
+            help="Liczba powtórzeń w mikro-pomiarach (domyślnie: 100000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=10,
+            help="Liczba powtórzeń widoków w pomiarach z bazą danych (domyślnie: 10)",
+        )
+
+    def handle(self, *args, **options):
+        BENCHMARKS[options["name"]](self, options)
+        self.stdout.write(self.style.SUCCESS("OK"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from equipment.export_cache import refresh_export_artifact
+
+
+class Command(BaseCommand):
+    help = (
+        "Buduje plik eksportu kart sprzętu dla bieżącego stanu danych, jeżeli "
+        "jeszcze go nie ma (cache equipment.export_cache). Do uruchamiania z crona."
+    )
+
+    def handle(self, *args, **options):
+        path, built = refresh_export_artifact()
+        if path is None:
+            self.stdout.write("Eksport jest właśnie budowany przez inny proces.")
+        elif built:
+            self.stdout.write(self.style.SUCCESS(f"Zbudowano {path.name}."))
+        else:
+            self.stdout.write(f"Eksport jest aktualny ({path.name}).")
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from equipment.sessions import DEFAULT_BATCH_SIZE, delete_expired_sessions, session_table_stats
+
+
+def _size(value) -> str:
+    if value is None:
+        return "n/d"
+    return f"{value / (1024 * 1024):.1f} MB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Usuwa wygasłe sesje partiami (zamiast jednego DELETE po całej tabeli) "
+        "i wypisuje rozmiar tabeli sesji. Do uruchamiania z crona."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="Przerwa między partiami (sekundy).",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Najwięcej usuniętych sesji w jednym uruchomieniu.",
+        )
+        parser.add_argument(
+            "--stats-only",
+            action="store_true",
+            help="Tylko statystyki tabeli, bez usuwania.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size musi być dodatnie.")
+
+        before = session_table_stats()
+        self.stdout.write(
+            f"Sesje: {before['total']} (wygasłe: {before['expired']}), "
+            f"rozmiar tabeli: {_size(before['bytes'])}"
+        )
+        if options["stats_only"]:
+            return
+
+        deleted = delete_expired_sessions(
+            batch_size=options["batch_size"],
+            pause=options["pause"],
+            limit=options["limit"],
+        )
+        after = session_table_stats()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Usunięto: {deleted}. Zostało: {after['total']} (wygasłe: {after['expired']}), "
+                f"rozmiar tabeli: {_size(after['bytes'])}"
+            )
+        )
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from equipment.conflicts import CONFLICT_FIELDS, conflict_count, find_conflicts
+
+
+class Command(BaseCommand):
+    help = "Wypisuje karty sprzętu z powtórzonym adresem IP, adresem MAC lub numerem seryjnym."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--field",
+            choices=[field for field, _ in CONFLICT_FIELDS],
+            help="Sprawdź tylko jedno pole (domyślnie: wszystkie)",
+        )
+        parser.add_argument(
+            "--summary",
+            action="store_true",
+            help="Tylko liczby grup, bez listy kart",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        # --field: liczymy tylko to pole (cała tabela), a nie wszystkie
+        values_by_field = {options["field"]: None} if options["field"] else None
+        report = find_conflicts(values_by_field, with_members=not options["summary"])
+        elapsed = time.perf_counter() - started
+
+        for section in report:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{section['label']}: {len(section['groups'])} grup"))
+            if options["summary"]:
+                continue
+            for group in section["groups"]:
+                numbers = ", ".join(m["inventory_number"] for m in group["members"])
+                self.stdout.write(f"  {group['value']} ({group['count']}): {numbers}")
+
+        total = conflict_count(report)
+        style = self.style.WARNING if total else self.style.SUCCESS
+        self.stdout.write(style(f"Łącznie grup konfliktów: {total} (czas: {elapsed:.2f} s)"))
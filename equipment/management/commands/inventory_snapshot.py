@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from equipment.snapshots import take_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Zapisuje migawkę stanu kart sprzętu (lokalizacja, użytkownik, status, system) "
+        "– przyrostowo względem poprzedniej. Uruchamiana co noc (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Wymuś pełną migawkę (domyślnie: co EQUIPMENT_SNAPSHOT_FULL_EVERY)",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        snapshot = take_snapshot(full=True if options["full"] else None)
+        elapsed = time.perf_counter() - started
+
+        kind = "pełna" if snapshot.is_full else "przyrostowa"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Migawka #{snapshot.pk} ({kind}): kart {snapshot.equipment_count}, "
+                f"zapisanych wpisów {snapshot.changed_count}, czas {elapsed:.2f} s"
+            )
+        )
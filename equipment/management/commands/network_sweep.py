@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from equipment.discovery import parse_arp, parse_dhcp_leases, parse_nmap_xml, reconcile
+
+
+def _file_time(path: Path):
+    # zrzut był aktualny w chwili zapisu pliku
+    return datetime.fromtimestamp(path.stat().st_mtime, tz=dt_timezone.utc)
+
+
+class Command(BaseCommand):
+    help = (
+        "Uzgadnia zrzuty z sieci (ARP, dzierżawy DHCP, nmap XML) z kartami sprzętu: "
+        "zapisuje czas ostatniego wykrycia i niezgodności."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--arp", action="append", default=[], metavar="PLIK",
+                            help="Zrzut tablicy ARP (arp -a / ip neigh / /proc/net/arp)")
+        parser.add_argument("--dhcp", action="append", default=[], metavar="PLIK",
+                            help="Plik dzierżaw DHCP (dhcpd.leases albo dnsmasq)")
+        parser.add_argument("--nmap", action="append", default=[], metavar="PLIK",
+                            help="Wynik nmap w formacie XML (-oX)")
+        parser.add_argument("--now", action="store_true",
+                            help="Czas wykrycia = teraz (domyślnie: czas modyfikacji pliku)")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Tylko pokaż wynik, nic nie zapisuj")
+
+    def handle(self, *args, **options):
+        sources = (
+            [(Path(p), "arp") for p in options["arp"]]
+            + [(Path(p), "dhcp") for p in options["dhcp"]]
+            + [(Path(p), "nmap") for p in options["nmap"]]
+        )
+        if not sources:
+            raise CommandError("Podaj co najmniej jeden plik: --arp, --dhcp albo --nmap.")
+        for path, _ in sources:
+            if not path.is_file():
+                raise CommandError(f"Brak pliku: {path}")
+
+        started = time.perf_counter()
+        observations = []
+        for path, kind in sources:
+            seen_at = timezone.now() if options["now"] else _file_time(path)
+            if kind == "nmap":
+                with path.open("rb") as f:
+                    found = list(parse_nmap_xml(f, seen_at))
+            else:
+                parser = parse_arp if kind == "arp" else parse_dhcp_leases
+                with path.open(encoding="utf-8", errors="replace") as f:
+                    found = list(parser(f, seen_at))
+            self.stdout.write(f"{path} ({kind}): {len(found)} wpisów")
+            observations.extend(found)
+
+        summary = reconcile(observations, dry_run=options["dry_run"])
+        elapsed = time.perf_counter() - started
+
+        if options["dry_run"]:
+            for m in summary["mismatch_objects"]:
+                number = m.equipment.inventory_number if m.equipment else "-"
+                self.stdout.write(
+                    f"  [{m.get_kind_display()}] {number}: {m.expected or '-'} -> {m.observed or '-'}"
+                )
+
+        self.stdout.write(
+            f"Urządzeń: {summary['observations']}, dopasowanych kart: {summary['matched']}, "
+            f"zaktualizowanych: {summary['updated']}"
+        )
+        style = self.style.WARNING if summary["mismatches"] else self.style.SUCCESS
+        self.stdout.write(
+            style(
+                f"Niezgodności: {summary['mismatches']} (w tym spoza bazy: {summary['unknown']}), "
+                f"czas: {elapsed:.2f} s" + (" [dry-run]" if options["dry_run"] else "")
+            )
+        )
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import json
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from equipment.models import Equipment, WARRANTY_BUCKETS
+
+
+REPORT_FIELDS = ("inventory_number", "equipment_name", "building", "room", "user_full_name", "warranty_until")
+
+
+def _state_path() -> Path:
+    return Path(
+        getattr(
+            settings,
+            "EQUIPMENT_WARRANTY_REPORT_STATE",
+            Path(settings.BASE_DIR) / "var" / "warranty_report.json",
+        )
+    )
+
+
+def _read_last_run():
+    try:
+        data = json.loads(_state_path().read_text(encoding="utf-8"))
+        return date.fromisoformat(data["last_run"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_last_run(day):
+    path = _state_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"last_run": day.isoformat()}), encoding="utf-8")
+
+
+def newly_entered(since, today):
+    """
+    Karty, które od `since` do `today` weszły do przedziałów gwarancji
+    z WARRANTY_BUCKETS (po gwarancji / < 30 dni / < 90 dni).
+
+    Karta wchodzi do przedziału "< N dni" w dniu warranty_until - N,
+    więc wystarczy zakres warranty_until w [since + N, today + N) –
+    zapytanie po indeksie, bez przeglądania całej tabeli.
+    """
+    sections = []
+    for code, label, days in WARRANTY_BUCKETS:
+        if days is None:
+            continue
+        rows = list(
+            Equipment.objects.warranty_ending_between(
+                since + timedelta(days=days), today + timedelta(days=days)
+            )
+            .order_by("warranty_until", "building", "inventory_number")
+            .values_list(*REPORT_FIELDS)
+        )
+        sections.append((code, label, rows))
+    return sections
+
+
+def format_report(sections, since, today) -> str:
+    lines = [f"Gwarancje – zmiany od {since.isoformat()} do {today.isoformat()}", ""]
+    for _, label, rows in sections:
+        lines.append(f"{label}: {len(rows)}")
+        for number, name, building, room, user, until in rows:
+            place = f"{building}/{room}" if building or room else "-"
+            lines.append(f"  {until.isoformat()}  {number}  {name}  [{place}]  {user}".rstrip())
+        lines.append("")
+    return "\n".join(lines)
+
+
+class Command(BaseCommand):
+    help = (
+        "Raport kart, którym od ostatniego uruchomienia skończyła się gwarancja "
+        "albo zbliża się jej koniec (30 / 90 dni). Uruchamiany codziennie (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", action="append", default=[], metavar="ADRES",
+                            help="Wyślij raport na podany adres (można powtórzyć)")
+        parser.add_argument("--output", metavar="PLIK",
+                            help="Zapisz raport do pliku (domyślnie: na ekran)")
+        parser.add_argument("--since", metavar="RRRR-MM-DD",
+                            help="Początek okresu (domyślnie: data poprzedniego uruchomienia)")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Nie zapisuj daty uruchomienia")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options["since"]:
+            try:
+                since = date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError("Nieprawidłowa data w --since (format RRRR-MM-DD).")
+        else:
+            # pierwsze uruchomienie – zmiany z ostatniej doby
+            since = _read_last_run() or today - timedelta(days=1)
+
+        if since >= today:
+            self.stdout.write("Raport za dziś został już przygotowany.")
+            return
+
+        sections = newly_entered(since, today)
+        total = sum(len(rows) for _, _, rows in sections)
+        report = format_report(sections, since, today)
+
+        if options["output"]:
+            Path(options["output"]).write_text(report, encoding="utf-8")
+            self.stdout.write(f"Zapisano raport: {options['output']}")
+        if options["email"]:
+            if total:
+                try:
+                    send_mail(
+                        f"Gwarancje sprzętu – {total} zmian ({today.isoformat()})",
+                        report,
+                        settings.DEFAULT_FROM_EMAIL,
+                        options["email"],
+                    )
+                except OSError as exc:
+                    # data uruchomienia nie jest zapisywana – jutro raport obejmie też dziś
+                    raise CommandError(f"Nie udało się wysłać raportu: {exc}")
+                self.stdout.write(f"Wysłano raport do: {', '.join(options['email'])}")
+            else:
+                self.stdout.write("Brak zmian – raport nie został wysłany.")
+        if not options["output"] and not options["email"]:
+            self.stdout.write(report)
+
+        if not options["dry_run"]:
+            _write_last_run(today)
+
+        self.stdout.write(self.style.SUCCESS(f"Kart w raporcie: {total}"))
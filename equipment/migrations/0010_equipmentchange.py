@@ -0,0 +1,37 @@
+# Generated by Django 5.1.3 on 2026-10-19 13:57
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0009_equipment_room_category'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('inventory_number', models.CharField(max_length=50, verbose_name='Numer inwentarzowy')),
+                ('field_name', models.CharField(max_length=64, verbose_name='Pole')),
+                ('old_value', models.TextField(blank=True, default='', verbose_name='Poprzednia wartość')),
+                ('new_value', models.TextField(blank=True, default='', verbose_name='Nowa wartość')),
+                ('source', models.CharField(choices=[('edit', 'Edycja karty'), ('admin', 'Edycja w adminie'), ('import', 'Import z Excela'), ('action_move_to_rooms', 'Akcja: przeniesienie do pomieszczenia'), ('action_move_to_magazyn', 'Akcja: przeniesienie do magazynu'), ('action_assign_user', 'Akcja: przypisanie użytkownika')], max_length=32, verbose_name='Źródło zmiany')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Data zmiany')),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='equipment_changes', to=settings.AUTH_USER_MODEL, verbose_name='Zmienił')),
+                ('equipment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='changes', to='equipment.equipment', verbose_name='Karta sprzętu')),
+            ],
+            options={
+                'verbose_name': 'Zmiana karty sprzętu',
+                'verbose_name_plural': 'Historia zmian kart sprzętu',
+                'ordering': ['-changed_at', '-id'],
+                'indexes': [models.Index(fields=['equipment', '-changed_at'], name='equipment_e_equipme_9792b8_idx'), models.Index(fields=['changed_at'], name='equipment_e_changed_8e876f_idx'), models.Index(fields=['field_name', 'changed_at'], name='equipment_e_field_n_e4cc3c_idx')],
+            },
+        ),
+    ]
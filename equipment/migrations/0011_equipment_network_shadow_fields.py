@@ -0,0 +1,84 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:04
+
+import ipaddress
+import re
+
+from django.db import migrations, models
+
+
+# Kopia normalizacji z equipment.normalize z chwili tej migracji –
+# migracje nie importują kodu aplikacji, który może się później zmienić.
+_WHITESPACE_RE = re.compile(r"\s+")
+_MAC_SEPARATORS_RE = re.compile(r"[\s:\-.]")
+_MAC_HEX_RE = re.compile(r"^[0-9A-F]{12}$")
+
+
+def _ip_or_none(value):
+    text = _WHITESPACE_RE.sub("", str(value or ""))
+    if not text:
+        return None
+    try:
+        return str(ipaddress.ip_address(text))
+    except ValueError:
+        return None
+
+
+def _mac_hex(value):
+    hexdigits = _MAC_SEPARATORS_RE.sub("", str(value or "")).upper()
+    return hexdigits if _MAC_HEX_RE.match(hexdigits) else ""
+
+
+def _hostname_key(value):
+    return str(value or "").strip().rstrip(".").lower()
+
+
+# pole źródłowe -> (kolumna-cień, normalizacja)
+NETWORK_SHADOW_FIELDS = {
+    "ip_address": ("ip_normalized", _ip_or_none),
+    "mac_address": ("mac_normalized", _mac_hex),
+    "hostname": ("hostname_normalized", _hostname_key),
+}
+SHADOW_COLUMNS = [shadow for shadow, _ in NETWORK_SHADOW_FIELDS.values()]
+
+
+def fill_network_fields(apps, schema_editor):
+    """
+    Wypełnia znormalizowane kolumny dla istniejących kart (partiami).
+    """
+    Equipment = apps.get_model("equipment", "Equipment")
+    batch = []
+    for obj in Equipment.objects.only("pk", *NETWORK_SHADOW_FIELDS).iterator(chunk_size=2000):
+        for name, (shadow, normalize) in NETWORK_SHADOW_FIELDS.items():
+            setattr(obj, shadow, normalize(getattr(obj, name)))
+        batch.append(obj)
+        if len(batch) >= 2000:
+            Equipment.objects.bulk_update(batch, SHADOW_COLUMNS)
+            batch = []
+    if batch:
+        Equipment.objects.bulk_update(batch, SHADOW_COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0010_equipmentchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='hostname_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255, verbose_name='Nazwa domenowa (małe litery)'),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='ip_normalized',
+            field=models.GenericIPAddressField(blank=True, db_index=True, editable=False, null=True, verbose_name='Adres IP (znormalizowany)'),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='mac_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=12, verbose_name='Adres MAC (12 znaków hex)'),
+        ),
+        migrations.RunPython(fill_network_fields, migrations.RunPython.noop),
+    ]
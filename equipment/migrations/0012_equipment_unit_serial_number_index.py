@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:05
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0011_equipment_network_shadow_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(django.db.models.functions.text.Upper(django.db.models.functions.text.Trim('unit_serial_number')), name='equipment_serial_key_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0012_equipment_unit_serial_number_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='last_seen_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True, verbose_name='Ostatnio widziany w sieci'),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='last_seen_ip',
+            field=models.GenericIPAddressField(blank=True, editable=False, null=True, verbose_name='Ostatni widziany adres IP'),
+        ),
+        migrations.CreateModel(
+            name='NetworkMismatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ip', 'Inny adres IP'), ('mac', 'Inny adres MAC'), ('hostname', 'Inna nazwa hosta'), ('unknown', 'Urządzenie spoza bazy')], max_length=16, verbose_name='Rodzaj')),
+                ('expected', models.CharField(blank=True, default='', max_length=255, verbose_name='W karcie')),
+                ('observed', models.CharField(blank=True, default='', max_length=255, verbose_name='W sieci')),
+                ('ip', models.GenericIPAddressField(blank=True, null=True, verbose_name='Adres IP')),
+                ('mac', models.CharField(blank=True, db_index=True, default='', max_length=12, verbose_name='Adres MAC (12 znaków hex)')),
+                ('hostname', models.CharField(blank=True, default='', max_length=255, verbose_name='Nazwa hosta')),
+                ('source', models.CharField(blank=True, default='', max_length=32, verbose_name='Źródło')),
+                ('seen_at', models.DateTimeField(verbose_name='Wykryto')),
+                ('equipment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='network_mismatches', to='equipment.equipment', verbose_name='Karta sprzętu')),
+            ],
+            options={
+                'verbose_name': 'Niezgodność sieciowa',
+                'verbose_name_plural': 'Niezgodności sieciowe',
+                'ordering': ['-seen_at', 'kind'],
+                'indexes': [models.Index(fields=['kind', '-seen_at'], name='equipment_n_kind_1bb934_idx')],
+            },
+        ),
+    ]
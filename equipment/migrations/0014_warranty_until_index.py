@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0013_network_sweep'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='equipment',
+            name='warranty_until',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='Gwarancja do'),
+        ),
+    ]
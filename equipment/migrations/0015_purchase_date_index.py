@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0014_warranty_until_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='equipment',
+            name='purchase_date',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='Data zakupu'),
+        ),
+    ]
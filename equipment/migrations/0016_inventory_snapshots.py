@@ -0,0 +1,52 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0015_purchase_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Wykonano')),
+                ('is_full', models.BooleanField(default=False, verbose_name='Pełna')),
+                ('equipment_count', models.PositiveIntegerField(default=0, verbose_name='Liczba kart')),
+                ('changed_count', models.PositiveIntegerField(default=0, verbose_name='Zapisane wpisy')),
+            ],
+            options={
+                'verbose_name': 'Migawka stanu',
+                'verbose_name_plural': 'Migawki stanu',
+                'ordering': ['-taken_at', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SnapshotEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('equipment_id', models.IntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('inventory_number', models.CharField(blank=True, default='', max_length=50)),
+                ('building', models.CharField(blank=True, default='', max_length=100)),
+                ('room', models.CharField(blank=True, default='', max_length=100)),
+                ('room_category', models.CharField(blank=True, default='', max_length=20)),
+                ('user_full_name', models.CharField(blank=True, default='', max_length=255)),
+                ('status', models.CharField(blank=True, default='', max_length=100)),
+                ('os_name', models.CharField(blank=True, default='', max_length=100)),
+                ('os_version', models.CharField(blank=True, default='', max_length=100)),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='equipment.inventorysnapshot')),
+            ],
+            options={
+                'verbose_name': 'Wpis migawki',
+                'verbose_name_plural': 'Wpisy migawek',
+                'indexes': [models.Index(fields=['equipment_id', 'snapshot'], name='equipment_s_equipme_8f45c5_idx'), models.Index(fields=['building', 'room', 'snapshot'], name='equipment_s_buildin_722787_idx'), models.Index(fields=['user_full_name', 'snapshot'], name='equipment_s_user_fu_b26950_idx')],
+            },
+        ),
+    ]
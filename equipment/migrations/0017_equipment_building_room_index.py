@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0016_inventory_snapshots'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['building', 'room'], name='equipment_e_buildin_8c8033_idx'),
+        ),
+    ]
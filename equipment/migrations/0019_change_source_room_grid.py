@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0018_change_source_bulk_edit'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='equipmentchange',
+            name='source',
+            field=models.CharField(choices=[('edit', 'Edycja karty'), ('admin', 'Edycja w adminie'), ('import', 'Import z Excela'), ('action_move_to_rooms', 'Akcja: przeniesienie do pomieszczenia'), ('action_move_to_magazyn', 'Akcja: przeniesienie do magazynu'), ('action_assign_user', 'Akcja: przypisanie użytkownika'), ('action_bulk_edit', 'Akcja: hurtowa edycja pola'), ('room_grid', 'Edycja tabelaryczna sali')], max_length=32, verbose_name='Źródło zmiany'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0019_change_source_room_grid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Wersja'),
+        ),
+    ]
@@ -1,7 +1,13 @@
-from datetime import date
+from datetime import timedelta
 
 from django.db import models
+from django.db.models import Case, CharField, Q, Value, When
+from django.db.models.functions import Trim, Upper
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from .data_version import VersionedQuerySet
+from .normalize import NETWORK_SHADOW_FIELDS, network_shadow_values
 
 
 User = get_user_model()
@@ -19,6 +25,85 @@ ROOM_CATEGORY_CHOICES = [
 ]
 
 
+# ============================================================
+# GWARANCJA – PRZEDZIAŁY
+# ============================================================
+
+# (kod, etykieta, liczba dni do końca gwarancji – górna granica przedziału)
+WARRANTY_BUCKETS = [
+    ("expired", "Po gwarancji", 0),
+    ("lt30", "Wygasa w ciągu 30 dni", 30),
+    ("lt90", "Wygasa w ciągu 90 dni", 90),
+    ("ok", "Na gwarancji", None),
+    ("unknown", "Brak danych", None),
+]
+WARRANTY_BUCKET_CHOICES = [(code, label) for code, label, _ in WARRANTY_BUCKETS]
+WARRANTY_BUCKET_LABELS = dict(WARRANTY_BUCKET_CHOICES)
+
+
+def warranty_bucket_for(warranty_until, today) -> str:
+    """
+    Ten sam podział co w with_warranty_bucket(), ale w Pythonie
+    (dla pojedynczego obiektu bez adnotacji).
+    """
+    if warranty_until is None:
+        return "unknown"
+    for code, _, days in WARRANTY_BUCKETS:
+        if days is not None and warranty_until < today + timedelta(days=days):
+            return code
+    return "ok"
+
+
+class EquipmentQuerySet(VersionedQuerySet):
+    def with_warranty_bucket(self, today=None):
+        """
+        Adnotacja `warranty_bucket` liczona w bazie (CASE WHEN po
+        warranty_until – kolumna z indeksem), bez pętli po obiektach.
+        """
+        today = today or timezone.localdate()
+        whens = [When(warranty_until__isnull=True, then=Value("unknown"))]
+        for code, _, days in WARRANTY_BUCKETS:
+            if days is not None:
+                whens.append(
+                    When(warranty_until__lt=today + timedelta(days=days), then=Value(code))
+                )
+        return self.annotate(
+            warranty_bucket=Case(*whens, default=Value("ok"), output_field=CharField())
+        )
+
+    def warranty_ending_between(self, start, end):
+        """
+        Karty, którym gwarancja kończy się w [start, end) – zakres po indeksie.
+        """
+        return self.filter(warranty_until__gte=start, warranty_until__lt=end)
+
+    def expiring_within(self, days, today=None):
+        """
+        Gwarancja jeszcze trwa, ale kończy się w ciągu `days` dni.
+        """
+        today = today or timezone.localdate()
+        return self.warranty_ending_between(today, today + timedelta(days=days))
+
+    def warranty_bucket_counts(self, today=None):
+        """
+        Słownik {kod_przedziału: Count(...) z filtrem} do użycia w aggregate()/annotate().
+        """
+        today = today or timezone.localdate()
+        counts = {"unknown": models.Count("id", filter=Q(warranty_until__isnull=True))}
+        lower = None
+        for code, _, days in WARRANTY_BUCKETS:
+            if days is None:
+                continue
+            upper = today + timedelta(days=days)
+            condition = Q(warranty_until__lt=upper)
+            if lower is not None:
+                condition &= Q(warranty_until__gte=lower)
+            counts[code] = models.Count("id", filter=condition)
+            lower = upper
+        counts["ok"] = models.Count("id", filter=Q(warranty_until__gte=lower))
+        return counts
+
+
 class Equipment(models.Model):
     """
     Model karty sprzętu.
@@ -86,11 +171,55 @@ class Equipment(models.Model):
         blank=True,
         default="",
     )
+
+    # Znormalizowane kopie pól sieciowych (z indeksami) – do wyszukiwania
+    # po IP / zakresie CIDR / prefiksie MAC / nazwie hosta.
+    # Utrzymywane w save() oraz w ścieżkach hurtowych (import, akcje).
+    ip_normalized = models.GenericIPAddressField(
+        "Adres IP (znormalizowany)",
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+    )
+    mac_normalized = models.CharField(
+        "Adres MAC (12 znaków hex)",
+        max_length=12,
+        blank=True,
+        default="",
+        editable=False,
+        db_index=True,
+    )
+    hostname_normalized = models.CharField(
+        "Nazwa domenowa (małe litery)",
+        max_length=255,
+        blank=True,
+        default="",
+        editable=False,
+        db_index=True,
+    )
+
+    # Ostatnie wykrycie w sieci (komenda network_sweep)
+    last_seen_at = models.DateTimeField(
+        "Ostatnio widziany w sieci",
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+    )
+    last_seen_ip = models.GenericIPAddressField(
+        "Ostatni widziany adres IP",
+        null=True,
+        blank=True,
+        editable=False,
+    )
+
     unit_serial_number = models.CharField(
         "Nr seryjny jednostki",
         max_length=100,
         blank=True,
         default="",
+        # wykrywanie duplikatów: indeks na UPPER(TRIM(...)) w Meta.indexes
     )
     monitor_serial_number = models.CharField(
         "Nr seryjny monitora",
@@ -172,12 +301,14 @@ class Equipment(models.Model):
         "Data zakupu",
         null=True,
         blank=True,
+        db_index=True,
     )
 
     warranty_until = models.DateField(
         "Gwarancja do",
         null=True,
         blank=True,
+        db_index=True,
     )
 
     # Dodatkowe informacje
@@ -203,22 +334,49 @@ class Equipment(models.Model):
         blank=True,
     )
 
+    # Optimistic locking – podbijana przy każdym zapisie karty (equipment.concurrency)
+    version = models.PositiveIntegerField(
+        "Wersja",
+        default=1,
+        editable=False,
+    )
+
+    objects = EquipmentQuerySet.as_manager()
+
     def warranty_status(self):
         """
         Metoda używana w adminie w list_display jako 'warranty_status'.
-        Zwraca prostą informację tekstową.
+        Korzysta z adnotacji with_warranty_bucket() (jeśli jest),
+        w przeciwnym razie liczy przedział w Pythonie.
         """
-        if not self.warranty_until:
-            return "brak danych"
-
-        today = date.today()
-        if self.warranty_until >= today:
-            return "na gwarancji"
-        return "po gwarancji"
+        bucket = getattr(self, "warranty_bucket", None)
+        if bucket is None:
+            bucket = warranty_bucket_for(self.warranty_until, timezone.localdate())
+        return WARRANTY_BUCKET_LABELS[bucket]
 
     warranty_status.short_description = "Status gwarancji"
     warranty_status.admin_order_field = "warranty_until"
 
+    def refresh_network_fields(self):
+        """
+        Przelicza znormalizowane kopie IP / MAC / hostname.
+        """
+        values = {name: getattr(self, name) for name in NETWORK_SHADOW_FIELDS}
+        for name, value in network_shadow_values(values).items():
+            setattr(self, name, value)
+
+    def save(self, *args, **kwargs):
+        self.refresh_network_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            kwargs["update_fields"] = update_fields | {
+                shadow
+                for name, shadow in NETWORK_SHADOW_FIELDS.items()
+                if name in update_fields
+            }
+        super().save(*args, **kwargs)
+
     def __str__(self):
         """
         W adminie ma być:
@@ -231,6 +389,45 @@ class Equipment(models.Model):
         verbose_name = "Karta sprzętu"
         verbose_name_plural = "Karty sprzętu"
         ordering = ["inventory_number"]
+        indexes = [
+            # sale (pomieszczenia) i powiązania z laboratoriami
+            models.Index(fields=["building", "room"]),
+            # wykrywanie duplikatów numerów seryjnych (equipment.conflicts)
+            models.Index(
+                Upper(Trim("unit_serial_number")),
+                name="equipment_serial_key_idx",
+            ),
+        ]
+
+
+# Pola karty edytowalne przez użytkowników: formularz EquipmentUpdateView
+# (forms.EquipmentEditForm) i hurtowa edycja pola w adminie (EquipmentAdmin.action_bulk_edit)
+EDITABLE_FIELDS = [
+    "inventory_number",
+    "equipment_name",
+    "equipment_type",
+    "status",
+    "hostname",
+    "user_full_name",
+    "borrowed_to",
+    "building",
+    "room",
+    "room_category",  # wybór kategorii pomieszczenia
+    "ip_address",
+    "mac_address",
+    "unit_serial_number",
+    "monitor_serial_number",
+    "os_name",
+    "os_version",
+    "os_serial_key",
+    "office_name",
+    "office_version",
+    "office_serial_key",
+    "supplier",
+    "purchase_date",
+    "warranty_until",
+    "notes",
+]
 
 
 class EquipmentAttachment(models.Model):
@@ -264,4 +461,233 @@ class EquipmentAttachment(models.Model):
 
     def __str__(self):
         # pokazujemy samą nazwę pliku, bez ścieżki
-        return self.file.name.split("/")[-1] if self.file.name else "Załącznik"
\ No newline at end of file
+        return self.file.name.split("/")[-1] if self.file.name else "Załącznik"
+
+
+# ============================================================
+# HISTORIA ZMIAN KART SPRZĘTU
+# ============================================================
+
+CHANGE_SOURCE_CHOICES = [
+    ("edit", "Edycja karty"),
+    ("admin", "Edycja w adminie"),
+    ("import", "Import z Excela"),
+    ("action_move_to_rooms", "Akcja: przeniesienie do pomieszczenia"),
+    ("action_move_to_magazyn", "Akcja: przeniesienie do magazynu"),
+    ("action_assign_user", "Akcja: przypisanie użytkownika"),
+    ("action_bulk_edit", "Akcja: hurtowa edycja pola"),
+    ("room_grid", "Edycja tabelaryczna sali"),
+]
+
+
+class EquipmentChange(models.Model):
+    """
+    Wpis historii zmian – jedna zmiana jednego pola jednej karty.
+    Tabela tylko do dopisywania (append-only), zapisywana hurtowo
+    przez equipment.history (bulk_create w tej samej transakcji co zmiana).
+    """
+
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="changes",
+        verbose_name="Karta sprzętu",
+    )
+    # Kopia numeru – historia zostaje czytelna także po usunięciu karty
+    inventory_number = models.CharField(
+        "Numer inwentarzowy",
+        max_length=50,
+    )
+    field_name = models.CharField(
+        "Pole",
+        max_length=64,
+    )
+    old_value = models.TextField(
+        "Poprzednia wartość",
+        blank=True,
+        default="",
+    )
+    new_value = models.TextField(
+        "Nowa wartość",
+        blank=True,
+        default="",
+    )
+    source = models.CharField(
+        "Źródło zmiany",
+        max_length=32,
+        choices=CHANGE_SOURCE_CHOICES,
+    )
+    changed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="equipment_changes",
+        verbose_name="Zmienił",
+    )
+    changed_at = models.DateTimeField(
+        "Data zmiany",
+        default=timezone.now,
+    )
+
+    class Meta:
+        verbose_name = "Zmiana karty sprzętu"
+        verbose_name_plural = "Historia zmian kart sprzętu"
+        ordering = ["-changed_at", "-id"]
+        indexes = [
+            # historia jednej karty (najnowsze najpierw)
+            models.Index(fields=["equipment", "-changed_at"]),
+            # zakresy czasu ("co zmieniono w tym miesiącu")
+            models.Index(fields=["changed_at"]),
+            # zmiany konkretnego pola w czasie ("co wyjechało z sali X")
+            models.Index(fields=["field_name", "changed_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.inventory_number}: {self.field_name}"
+
+
+
+# ============================================================
+# NIEZGODNOŚCI WYKRYTE PRZY SKANOWANIU SIECI
+# ============================================================
+
+MISMATCH_KIND_CHOICES = [
+    ("ip", "Inny adres IP"),
+    ("mac", "Inny adres MAC"),
+    ("hostname", "Inna nazwa hosta"),
+    ("unknown", "Urządzenie spoza bazy"),
+]
+
+
+class NetworkMismatch(models.Model):
+    """
+    Niezgodność między kartą sprzętu a tym, co widać w sieci
+    (ARP / dzierżawy DHCP / nmap). Odświeżana przy każdym skanowaniu
+    dla kart (i adresów MAC), które pojawiły się w danym skanie.
+    """
+
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="network_mismatches",
+        verbose_name="Karta sprzętu",
+    )
+    kind = models.CharField(
+        "Rodzaj",
+        max_length=16,
+        choices=MISMATCH_KIND_CHOICES,
+    )
+    expected = models.CharField(
+        "W karcie",
+        max_length=255,
+        blank=True,
+        default="",
+    )
+    observed = models.CharField(
+        "W sieci",
+        max_length=255,
+        blank=True,
+        default="",
+    )
+    ip = models.GenericIPAddressField(
+        "Adres IP",
+        null=True,
+        blank=True,
+    )
+    mac = models.CharField(
+        "Adres MAC (12 znaków hex)",
+        max_length=12,
+        blank=True,
+        default="",
+        db_index=True,
+    )
+    hostname = models.CharField(
+        "Nazwa hosta",
+        max_length=255,
+        blank=True,
+        default="",
+    )
+    source = models.CharField(
+        "Źródło",
+        max_length=32,
+        blank=True,
+        default="",
+    )
+    seen_at = models.DateTimeField("Wykryto")
+
+    class Meta:
+        verbose_name = "Niezgodność sieciowa"
+        verbose_name_plural = "Niezgodności sieciowe"
+        ordering = ["-seen_at", "kind"]
+        indexes = [
+            models.Index(fields=["kind", "-seen_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.expected} -> {self.observed}"
+
+
+# ============================================================
+# MIGAWKI STANU (zapytania "co było w sali X w dniu D")
+# ============================================================
+
+class InventorySnapshot(models.Model):
+    """
+    Migawka stanu kart sprzętu (komenda inventory_snapshot, uruchamiana w nocy).
+
+    Wpisy (SnapshotEntry) są zapisywane przyrostowo: tylko karty, które
+    zmieniły się od poprzedniej migawki (+ "nagrobki" kart usuniętych).
+    Co jakiś czas migawka jest pełna – od niej zaczyna się odtwarzanie stanu.
+    """
+
+    taken_at = models.DateTimeField("Wykonano", default=timezone.now, db_index=True)
+    is_full = models.BooleanField("Pełna", default=False)
+    equipment_count = models.PositiveIntegerField("Liczba kart", default=0)
+    changed_count = models.PositiveIntegerField("Zapisane wpisy", default=0)
+
+    class Meta:
+        verbose_name = "Migawka stanu"
+        verbose_name_plural = "Migawki stanu"
+        ordering = ["-taken_at", "-id"]
+
+    def __str__(self):
+        kind = "pełna" if self.is_full else "przyrostowa"
+        return f"{self.taken_at:%Y-%m-%d %H:%M} ({kind})"
+
+
+class SnapshotEntry(models.Model):
+    """
+    Stan jednej karty w migawce (lokalizacja, użytkownik, status, system).
+    equipment_id to zwykła liczba (nie FK) – karta mogła zostać usunięta.
+    """
+
+    snapshot = models.ForeignKey(
+        InventorySnapshot,
+        on_delete=models.CASCADE,
+        related_name="entries",
+    )
+    equipment_id = models.IntegerField()
+    deleted = models.BooleanField(default=False)
+
+    inventory_number = models.CharField(max_length=50, blank=True, default="")
+    building = models.CharField(max_length=100, blank=True, default="")
+    room = models.CharField(max_length=100, blank=True, default="")
+    room_category = models.CharField(max_length=20, blank=True, default="")
+    user_full_name = models.CharField(max_length=255, blank=True, default="")
+    status = models.CharField(max_length=100, blank=True, default="")
+    os_name = models.CharField(max_length=100, blank=True, default="")
+    os_version = models.CharField(max_length=100, blank=True, default="")
+
+    class Meta:
+        verbose_name = "Wpis migawki"
+        verbose_name_plural = "Wpisy migawek"
+        indexes = [
+            models.Index(fields=["equipment_id", "snapshot"]),
+            models.Index(fields=["building", "room", "snapshot"]),
+            models.Index(fields=["user_full_name", "snapshot"]),
+        ]
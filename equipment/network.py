@@ -0,0 +1,104 @@
+"""
+Wyszukiwanie kart sprzętu po danych sieciowych.
+
+Wszystkie zapytania idą po znormalizowanych kolumnach z indeksami
+(ip_normalized, mac_normalized, hostname_normalized):
+- dokładny adres IP       -> ip_normalized = ...
+- zakres CIDR             -> ip_normalized BETWEEN adres_sieci AND adres_rozgłoszeniowy
+                             (PostgreSQL, typ inet – zwykły indeks btree)
+- prefiks MAC (np. OUI)   -> mac_normalized LIKE 'AABBCC%'
+- nazwa hosta (prefiks)   -> hostname_normalized LIKE 'pc-033%'
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import re
+
+from django.db import connection
+
+from .models import Equipment
+from .normalize import hostname_key, ip_or_none
+
+
+_MAC_PREFIX_RE = re.compile(r"^[0-9A-Fa-f]{2}([\s:\-.]?[0-9A-Fa-f]{2}){2,5}$")
+_MAC_SEPARATORS_RE = re.compile(r"[\s:\-.]")
+
+LOOKUP_KINDS = [
+    ("auto", "Automatycznie"),
+    ("ip", "Adres IP"),
+    ("cidr", "Zakres CIDR"),
+    ("mac", "Prefiks MAC / OUI"),
+    ("hostname", "Nazwa hosta"),
+]
+
+
+def detect_kind(query: str) -> str:
+    """
+    Rozpoznaje rodzaj zapytania wpisanego w jedno pole wyszukiwania.
+    """
+    if "/" in query:
+        return "cidr"
+    if ip_or_none(query):
+        return "ip"
+    if _MAC_PREFIX_RE.match(query.strip()):
+        return "mac"
+    return "hostname"
+
+
+def filter_by_network(queryset, network):
+    """
+    Karty z ip_normalized w podanej sieci.
+
+    Na PostgreSQL – zakres od adresu sieci do adresu rozgłoszeniowego
+    (kolumna typu inet, adresy hostów /32 i /128 sortują się jak liczby,
+    a IPv4 przed IPv6), więc wystarcza indeks btree z db_index; operator
+    <<= wymagałby indeksu GiST. W innych bazach (np. SQLite w środowisku
+    deweloperskim, gdzie adres jest tekstem) – filtr w Pythonie na kartach z IP.
+    """
+    if connection.vendor == "postgresql":
+        return queryset.filter(
+            ip_normalized__gte=str(network.network_address),
+            ip_normalized__lte=str(network.broadcast_address),
+        )
+
+    pks = [
+        pk
+        for pk, ip in queryset.exclude(ip_normalized=None).values_list("pk", "ip_normalized")
+        if ipaddress.ip_address(ip) in network
+    ]
+    return queryset.filter(pk__in=pks)
+
+
+def lookup_equipment(query: str, kind="auto"):
+    """
+    Zwraca (rodzaj, queryset, komunikat_błędu).
+    """
+    query = (query or "").strip()
+    qs = Equipment.objects.all()
+    if not query:
+        return kind, qs.none(), ""
+
+    if kind == "auto":
+        kind = detect_kind(query)
+
+    if kind == "ip":
+        ip = ip_or_none(query)
+        if ip is None:
+            return kind, qs.none(), f"„{query}” nie jest adresem IP."
+        return kind, qs.filter(ip_normalized=ip), ""
+
+    if kind == "cidr":
+        try:
+            network = ipaddress.ip_network(query.replace(" ", ""), strict=False)
+        except ValueError:
+            return kind, qs.none(), f"„{query}” nie jest poprawnym zakresem CIDR."
+        return kind, filter_by_network(qs, network), ""
+
+    if kind == "mac":
+        prefix = _MAC_SEPARATORS_RE.sub("", query).upper()
+        if not prefix or len(prefix) > 12 or any(c not in "0123456789ABCDEF" for c in prefix):
+            return kind, qs.none(), f"„{query}” nie jest prefiksem adresu MAC."
+        return kind, qs.filter(mac_normalized__startswith=prefix), ""
+
+    return "hostname", qs.filter(hostname_normalized__startswith=hostname_key(query)), ""
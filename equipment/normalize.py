@@ -0,0 +1,334 @@
+"""
+Normalizacja wartości z Excela – etap importu działający na całych kolumnach.
+
+Excel podaje nam:
+- daty jako datetime, tekst ("2021-03-05", "05.03.2021") albo liczbę seryjną,
+- numery inwentarzowe jako float (30149850000.0),
+- MAC-i w różnych zapisach (AA:BB:.., aa-bb-.., aabb.ccdd.eeff, AABBCCDDEEFF, "AA BB ..."),
+- adresy IP ze spacjami.
+
+Każdy konwerter dostaje całą kolumnę (listę wartości z paczki wierszy)
+i zwraca (lista_wartości, {indeks_wiersza: komunikat_błędu}).
+Konwertery nie rzucają wyjątków – zła komórka trafia do raportu błędów,
+a cały wiersz jest potem odrzucany przez importer.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import re
+from datetime import date, datetime, timedelta
+
+from .columns import HEADER_ALIASES
+
+
+# ============================================================
+# NAGŁÓWKI (rejestr kolumn wspólny z eksportem – equipment.columns)
+# ============================================================
+
+_HEADER_SEPARATORS_RE = re.compile(r"[\s\-]+")
+
+
+def normalize_header(header) -> str:
+    """
+    "Nr inwentarzowy " / "NR-INWENTARZOWY" -> "NR_INWENTARZOWY".
+    """
+    if header is None:
+        return ""
+    return _HEADER_SEPARATORS_RE.sub("_", str(header).strip()).upper()
+
+
+def resolve_header(header, fields: dict):
+    """
+    Nagłówek kolumny -> nazwa pola modelu (albo None, gdy kolumnę pomijamy).
+    Przyjmujemy nagłówki z rejestru kolumn (te same co w eksporcie)
+    oraz nazwy pól modelu.
+    """
+    key = normalize_header(header)
+    if not key:
+        return None
+    if key in HEADER_ALIASES:
+        return HEADER_ALIASES[key]
+    name = key.lower()
+    return name if name in fields else None
+
+
+# ============================================================
+# KONWERTERY KOLUMN
+# ============================================================
+
+_INTEGRAL_FLOAT_RE = re.compile(r"^(\d+)\.0+$")
+_MAC_SEPARATORS_RE = re.compile(r"[\s:\-.]")
+_MAC_HEX_RE = re.compile(r"^[0-9A-F]{12}$")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y", "%d-%m-%Y", "%d/%m/%Y", "%Y.%m.%d", "%Y/%m/%d")
+
+# Liczby seryjne dat Excela (system 1900) – tylko sensowny zakres lat
+_EXCEL_EPOCH = date(1899, 12, 30)
+_EXCEL_SERIAL_MIN = 18264  # 1950-01-01
+_EXCEL_SERIAL_MAX = 73051  # 2099-12-31
+
+
+def _number_to_text(value):
+    """
+    30149850000.0 -> "30149850000", 12.5 -> "12.5".
+    """
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def text_column(values, max_length=None, default=""):
+    """
+    Kolumna tekstowa: strip, liczby -> tekst, pusta -> default, kontrola długości.
+    """
+    out = []
+    errors = {}
+    for i, value in enumerate(values):
+        if value is None:
+            out.append(default)
+            continue
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = _number_to_text(value)
+        elif isinstance(value, datetime):
+            value = value.date().isoformat()
+        elif isinstance(value, date):
+            value = value.isoformat()
+        else:
+            value = str(value).strip()
+        if max_length and len(value) > max_length:
+            errors[i] = f"za długa wartość ({len(value)} > {max_length} znaków)"
+        out.append(value)
+    return out, errors
+
+
+def numeric_id_column(values, max_length=None, default=""):
+    """
+    Identyfikatory liczbowe (numery inwentarzowe, seryjne, budynki, sale):
+    float z Excela i tekst "30149850000.0" -> "30149850000".
+    """
+    out, errors = text_column(values, max_length=max_length, default=default)
+    for i, value in enumerate(out):
+        match = _INTEGRAL_FLOAT_RE.match(value)
+        if match:
+            out[i] = match.group(1)
+    return out, errors
+
+
+def choice_column(values, choices, default=""):
+    """
+    Pole z listą wyborów – przyjmujemy kod lub etykietę (bez wielkości liter).
+    """
+    lookup = {}
+    for code, label in choices:
+        lookup[str(code).upper()] = code
+        lookup[str(label).upper()] = code
+
+    texts, errors = text_column(values)
+    out = []
+    for i, value in enumerate(texts):
+        if not value:
+            out.append(default)
+            continue
+        code = lookup.get(value.upper())
+        if code is None:
+            errors[i] = f"nieznana wartość „{value}”"
+            out.append(value)
+        else:
+            out.append(code)
+    return out, errors
+
+
+def date_column(values):
+    """
+    Daty: datetime/date, tekst w kilku formatach, liczba seryjna Excela.
+    Pusta komórka -> None.
+    """
+    out = []
+    errors = {}
+    for i, value in enumerate(values):
+        if value is None or value == "":
+            out.append(None)
+        elif isinstance(value, datetime):
+            out.append(value.date())
+        elif isinstance(value, date):
+            out.append(value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            if _EXCEL_SERIAL_MIN <= value <= _EXCEL_SERIAL_MAX:
+                out.append(_EXCEL_EPOCH + timedelta(days=int(value)))
+            else:
+                out.append(None)
+                errors[i] = f"nieprawidłowa data „{value}”"
+        else:
+            text = str(value).strip()
+            parsed = None
+            if text:
+                # "2021-03-05 00:00:00" – część z godziną pomijamy
+                head = text.split()[0]
+                for fmt in DATE_FORMATS:
+                    try:
+                        parsed = datetime.strptime(head, fmt).date()
+                        break
+                    except ValueError:
+                        continue
+                if parsed is None:
+                    errors[i] = f"nieprawidłowa data „{text}”"
+            out.append(parsed)
+    return out, errors
+
+
+def canonical_mac(value: str) -> str:
+    """
+    Dowolny z obsługiwanych zapisów MAC -> "AA:BB:CC:DD:EE:FF"
+    ("" gdy wartość nie jest adresem MAC).
+    """
+    hexdigits = mac_hex(value)
+    if not hexdigits:
+        return ""
+    return ":".join(hexdigits[i:i + 2] for i in range(0, 12, 2))
+
+
+def mac_column(values):
+    """
+    Adresy MAC -> zapis kanoniczny AA:BB:CC:DD:EE:FF.
+
+    Wartości, które nie są adresem MAC (np. „brak” z dawnych kart – pole
+    zawsze było tekstowe), zostają bez zmian i nie odrzucają wiersza;
+    mac_normalized dostaje wtedy pusty klucz (network_shadow_values).
+    """
+    texts, errors = text_column(values)
+    out = []
+    for value in texts:
+        out.append(canonical_mac(value) or value)
+    return out, errors
+
+
+def ip_column(values):
+    """
+    Adresy IP: usunięcie spacji i zapis kanoniczny (IPv4 / IPv6).
+
+    Wartości, które nie są adresem IP (np. „DHCP”), zostają bez zmian
+    i nie odrzucają wiersza; ip_normalized dostaje wtedy None.
+    """
+    texts, errors = text_column(values)
+    out = []
+    for value in texts:
+        out.append(ip_or_none(value) or value)
+    return out, errors
+
+
+# ============================================================
+# KOLUMNY "CIENIE" DLA WYSZUKIWANIA SIECIOWEGO
+# ============================================================
+
+# pole źródłowe -> znormalizowana kolumna z indeksem w Equipment
+NETWORK_SHADOW_FIELDS = {
+    "ip_address": "ip_normalized",
+    "mac_address": "mac_normalized",
+    "hostname": "hostname_normalized",
+}
+
+
+def ip_or_none(value):
+    """
+    "10.0.3. 5" -> "10.0.3.5"; wartość, która nie jest adresem IP -> None.
+    """
+    text = _WHITESPACE_RE.sub("", str(value or ""))
+    if not text:
+        return None
+    try:
+        return str(ipaddress.ip_address(text))
+    except ValueError:
+        return None
+
+
+def mac_hex(value) -> str:
+    """
+    Dowolny zapis MAC -> 12 znaków hex (wielkie litery); "" gdy to nie MAC.
+    """
+    hexdigits = _MAC_SEPARATORS_RE.sub("", str(value or "")).upper()
+    return hexdigits if _MAC_HEX_RE.match(hexdigits) else ""
+
+
+def hostname_key(value) -> str:
+    """
+    "PC-033-01.wimio.local." -> "pc-033-01.wimio.local".
+    """
+    return str(value or "").strip().rstrip(".").lower()
+
+
+_SHADOW_NORMALIZERS = {
+    "ip_address": ip_or_none,
+    "mac_address": mac_hex,
+    "hostname": hostname_key,
+}
+
+
+def network_shadow_values(values: dict) -> dict:
+    """
+    Dla słownika {pole: wartość} zwraca wartości kolumn-cieni, które trzeba
+    ustawić razem z nim (tylko dla pól sieciowych obecnych w `values`).
+    """
+    return {
+        NETWORK_SHADOW_FIELDS[name]: _SHADOW_NORMALIZERS[name](value)
+        for name, value in values.items()
+        if name in NETWORK_SHADOW_FIELDS
+    }
+
+
+# Pola z dedykowanym konwerterem (pozostałe – wg typu pola modelu)
+NUMERIC_ID_FIELDS = {
+    "inventory_number",
+    "unit_serial_number",
+    "monitor_serial_number",
+    "building",
+    "room",
+}
+FIELD_CONVERTERS = {
+    "mac_address": mac_column,
+    "ip_address": ip_column,
+}
+
+
+def converter_for(field):
+    """
+    Konwerter kolumny dla pola modelu.
+    """
+    if field.name in FIELD_CONVERTERS:
+        return FIELD_CONVERTERS[field.name]
+
+    internal_type = field.get_internal_type()
+    if internal_type == "DateField":
+        return date_column
+
+    default = field.get_default()
+    if field.choices:
+        return lambda values: choice_column(values, field.choices, default=default)
+    if field.name in NUMERIC_ID_FIELDS:
+        return lambda values: numeric_id_column(values, field.max_length, default=default)
+    return lambda values: text_column(values, field.max_length, default=default)
+
+
+def build_converters(field_names, fields: dict) -> dict:
+    """
+    Konwertery dla kolumn importu – wyznaczane raz na cały plik.
+    """
+    return {name: converter_for(fields[name]) for name in field_names}
+
+
+def normalize_columns(columns: dict, converters: dict):
+    """
+    Normalizacja paczki danych w układzie kolumnowym.
+
+    columns: {nazwa_pola: [wartości kolejnych wierszy]}
+    Zwraca (znormalizowane kolumny, {indeks_wiersza: [komunikaty błędów]}).
+    """
+    normalized = {}
+    row_errors = {}
+    for name, values in columns.items():
+        out, errors = converters[name](values)
+        normalized[name] = out
+        for i, message in errors.items():
+            row_errors.setdefault(i, []).append(f"{name}: {message}")
+    return normalized, row_errors
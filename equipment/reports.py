@@ -0,0 +1,154 @@
+"""
+Raporty przestawne (pivot) po kartach sprzętu, np. "Windows 10 per budynek"
+albo "Office 2016 per kategoria pomieszczenia".
+
+Każda tabela to jedno zapytanie:
+    SELECT <wymiar_wierszy>, <wymiar_kolumn>, COUNT(*) ... GROUP BY ...
+Wynik jest trzymany w cache per kombinacja (wiersze, kolumny, filtry)
+i wersję danych (data_version), więc po zmianie danych liczy się od nowa.
+"""
+
+from __future__ import annotations
+
+import csv
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.db.models import Count
+from openpyxl import Workbook
+
+from .data_version import cached_until_change
+from .models import Equipment, ROOM_CATEGORY_CHOICES
+
+
+# kod wymiaru -> (etykieta, pola modelu)
+DIMENSIONS = {
+    "type": ("Typ sprzętu", ("equipment_type",)),
+    "building": ("Budynek", ("building",)),
+    "room_category": ("Kategoria pomieszczenia", ("room_category",)),
+    "os": ("System", ("os_name", "os_version")),
+    "office": ("Office", ("office_name", "office_version")),
+    "status": ("Status", ("status",)),
+}
+
+# Pola, po których można zawęzić raport (?building=30&os_version=10 ...)
+FILTER_FIELDS = {
+    "equipment_type": "Typ sprzętu",
+    "building": "Budynek",
+    "room_category": "Kategoria pomieszczenia",
+    "os_name": "System",
+    "os_version": "Wersja systemu",
+    "office_name": "Office",
+    "office_version": "Wersja Office",
+    "status": "Status",
+}
+
+EMPTY_LABEL = "(brak)"
+
+_ROOM_CATEGORY_LABELS = dict(ROOM_CATEGORY_CHOICES)
+
+
+class ReportError(ValueError):
+    pass
+
+
+def _label(dimension, values) -> str:
+    if dimension == "room_category":
+        return _ROOM_CATEGORY_LABELS.get(values[0], values[0]) or EMPTY_LABEL
+    return " ".join(str(v) for v in values if v) or EMPTY_LABEL
+
+
+def clean_filters(params) -> dict:
+    """
+    Tylko znane pola i niepuste wartości (z request.GET albo słownika).
+    """
+    return {
+        field: params.get(field).strip()
+        for field in FILTER_FIELDS
+        if params.get(field) and params.get(field).strip()
+    }
+
+
+def build_pivot(rows_dim, cols_dim, filters=None) -> dict:
+    """
+    Tabela przestawna liczby kart: wiersze × kolumny (jedno zapytanie GROUP BY).
+    """
+    if rows_dim not in DIMENSIONS or cols_dim not in DIMENSIONS:
+        raise ReportError("Nieznany wymiar raportu.")
+    if rows_dim == cols_dim:
+        raise ReportError("Wiersze i kolumny muszą być różnymi wymiarami.")
+
+    row_fields = DIMENSIONS[rows_dim][1]
+    col_fields = DIMENSIONS[cols_dim][1]
+    n_row = len(row_fields)
+
+    groups = (
+        Equipment.objects.filter(**(filters or {}))
+        .values_list(*row_fields, *col_fields)
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+
+    cells = {}
+    for values in groups:
+        row = _label(rows_dim, values[:n_row])
+        col = _label(cols_dim, values[n_row:-1])
+        # np. "Windows" + "" i "Windows" + None lądują w tej samej komórce
+        cells[row, col] = cells.get((row, col), 0) + values[-1]
+
+    rows = sorted({r for r, _ in cells}, key=lambda v: (v == EMPTY_LABEL, v))
+    cols = sorted({c for _, c in cells}, key=lambda v: (v == EMPTY_LABEL, v))
+    matrix = [[cells.get((r, c), 0) for c in cols] for r in rows]
+
+    return {
+        "rows_dim": rows_dim,
+        "cols_dim": cols_dim,
+        "filters": dict(filters or {}),
+        "rows": rows,
+        "cols": cols,
+        "matrix": matrix,
+        "row_totals": [sum(line) for line in matrix],
+        "col_totals": [sum(line[i] for line in matrix) for i in range(len(cols))],
+        "total": sum(cells.values()),
+    }
+
+
+def get_pivot(rows_dim, cols_dim, filters=None) -> dict:
+    """
+    build_pivot() z cache – klucz: wymiary + filtry + stan tabeli kart.
+    """
+    filters = dict(filters or {})
+    return cached_until_change(
+        "pivot",
+        [rows_dim, cols_dim, sorted(filters.items())],
+        lambda: build_pivot(rows_dim, cols_dim, filters),
+        getattr(settings, "EQUIPMENT_REPORT_CACHE_SECONDS", 600),
+    )
+
+
+def _table(pivot):
+    """
+    Wiersze gotowe do zapisu (nagłówek, dane, suma).
+    """
+    corner = f"{DIMENSIONS[pivot['rows_dim']][0]} \\ {DIMENSIONS[pivot['cols_dim']][0]}"
+    yield [corner, *pivot["cols"], "Razem"]
+    for label, line, total in zip(pivot["rows"], pivot["matrix"], pivot["row_totals"]):
+        yield [label, *line, total]
+    yield ["Razem", *pivot["col_totals"], pivot["total"]]
+
+
+def pivot_csv(pivot) -> str:
+    output = StringIO()
+    writer = csv.writer(output, delimiter=";")
+    writer.writerows(_table(pivot))
+    return output.getvalue()
+
+
+def pivot_xlsx(pivot) -> bytes:
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Raport")
+    for row in _table(pivot):
+        ws.append(row)
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
@@ -0,0 +1,152 @@
+"""
+Edycja tabelaryczna kart jednej sali (views_rooms.room_grid_edit).
+
+Przeglądarka wysyła tylko zmienione komórki – jedną paczką JSON:
+
+    {"rows": [{"id": 12, "version": "7",
+               "changes": {"hostname": "lab-01", "ip_address": "10.0.0.1"}}, ...]}
+
+- parse_grid_payload() sprawdza wszystkie komórki razem (clean_model_value,
+  a adresy IP / MAC dodatkowo ip_or_none / mac_hex – w tabeli nie da się
+  wpisać tekstu, który nie jest adresem), błędy wracają jako {id: {pole: komunikat}},
+- apply_grid_changes() w jednej transakcji blokuje karty (select_for_update),
+  porównuje Equipment.version z wersją widzianą w przeglądarce (optimistic
+  locking, jak formularz edycji – equipment.concurrency; przy konflikcie nic
+  nie jest zapisywane) i zapisuje wszystko jednym bulk_update (+ kopie pól
+  sieciowych, wersja karty + 1 i historia zmian).
+"""
+
+from __future__ import annotations
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .concurrency import VERSION_BUMP
+from .forms import clean_model_value
+from .history import make_change, save_changes, value_to_text
+from .models import Equipment
+from .normalize import NETWORK_SHADOW_FIELDS, ip_or_none, mac_hex, network_shadow_values
+
+
+# Kolumny edytowalne w tabeli
+GRID_FIELDS = ["hostname", "ip_address", "mac_address"]
+
+# Pola sieciowe: niepusta wartość musi być adresem (normalizacja -> komunikat)
+GRID_ADDRESS_CHECKS = {
+    "ip_address": (ip_or_none, "Nieprawidłowy adres IP."),
+    "mac_address": (mac_hex, "Nieprawidłowy adres MAC."),
+}
+
+# Górny limit kart w jednej paczce
+GRID_MAX_ROWS = 500
+
+
+def grid_version(obj) -> str:
+    """
+    Wersja karty widziana przez przeglądarkę (Equipment.version jako tekst).
+    """
+    return str(obj.version)
+
+
+def parse_grid_payload(payload):
+    """
+    Zwraca (wiersze, błędy). Wiersz: {"id", "version", "changes"} z wartościami
+    już po walidacji; błędy: {id: {pole: komunikat}} (id 0 – błąd paczki).
+    """
+    rows_in = payload.get("rows") if isinstance(payload, dict) else None
+    if not isinstance(rows_in, list) or not rows_in:
+        return [], {0: {"rows": "Brak zmian do zapisania."}}
+    if len(rows_in) > GRID_MAX_ROWS:
+        return [], {0: {"rows": f"Za dużo kart w jednej paczce (maks. {GRID_MAX_ROWS})."}}
+
+    rows, errors = [], {}
+    for row in rows_in:
+        if not isinstance(row, dict) or not isinstance(row.get("changes"), dict):
+            return [], {0: {"rows": "Nieprawidłowy format danych."}}
+        try:
+            pk = int(row.get("id"))
+        except (TypeError, ValueError):
+            return [], {0: {"rows": "Nieprawidłowy identyfikator karty."}}
+
+        changes = {}
+        for name, raw in row["changes"].items():
+            if name not in GRID_FIELDS:
+                errors.setdefault(pk, {})[name] = "To pole nie jest edytowalne w tabeli."
+                continue
+            try:
+                value = clean_model_value(Equipment._meta.get_field(name), raw)
+            except ValidationError as exc:
+                errors.setdefault(pk, {})[name] = " ".join(exc.messages)
+                continue
+            check = GRID_ADDRESS_CHECKS.get(name)
+            if check is not None and str(value or "").strip() and not check[0](value):
+                errors.setdefault(pk, {})[name] = check[1]
+                continue
+            changes[name] = value
+        rows.append({"id": pk, "version": str(row.get("version") or ""), "changes": changes})
+    return rows, errors
+
+
+def apply_grid_changes(queryset, rows, user=None):
+    """
+    Zapis sprawdzonych wierszy (parse_grid_payload) dla kart z `queryset`
+    (karty jednej sali). Zwraca (nowe_wersje {id: wersja}, konflikty [id]);
+    przy konflikcie albo karcie spoza sali nic nie jest zapisywane.
+    """
+    now = timezone.now()
+    author = user if user is not None and user.is_authenticated else None
+    fields = sorted({name for row in rows for name in row["changes"]})
+    shadows = [NETWORK_SHADOW_FIELDS[name] for name in fields if name in NETWORK_SHADOW_FIELDS]
+
+    with transaction.atomic():
+        current = {
+            obj.pk: obj
+            for obj in queryset.filter(pk__in=[row["id"] for row in rows])
+            .select_for_update()
+            .only("pk", "inventory_number", "version", *fields, *shadows)
+            .order_by()
+        }
+        conflicts = [
+            row["id"]
+            for row in rows
+            if row["id"] not in current or grid_version(current[row["id"]]) != row["version"]
+        ]
+        if conflicts:
+            return {}, conflicts
+
+        objs, bumped, history = [], [], []
+        for row in rows:
+            obj = current[row["id"]]
+            changed = False
+            for name, new in row["changes"].items():
+                old = getattr(obj, name)
+                if value_to_text(old) == value_to_text(new):
+                    continue
+                setattr(obj, name, new)
+                history.append(
+                    make_change(obj.pk, obj.inventory_number, name, old, new, "room_grid", author, now)
+                )
+                changed = True
+            if changed:
+                # znormalizowane kopie IP / MAC / hostname (bez doczytywania pól spoza `fields`)
+                for name, value in network_shadow_values(
+                    {name: getattr(obj, name) for name in fields}
+                ).items():
+                    setattr(obj, name, value)
+                obj.last_modified_by = author
+                obj.last_modified_at = now
+                bumped.append((obj, obj.version + 1))
+                obj.version = VERSION_BUMP
+                objs.append(obj)
+
+        if objs:
+            Equipment.objects.bulk_update(
+                objs, fields + shadows + ["last_modified_by", "last_modified_at", "version"]
+            )
+            save_changes(history)
+            # wiersze są zablokowane – nowa wersja to dokładnie stara + 1
+            for obj, version in bumped:
+                obj.version = version
+
+    return {obj.pk: grid_version(obj) for obj in current.values()}, []
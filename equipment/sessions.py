@@ -0,0 +1,67 @@
+"""
+Tabela sesji (django_session) – rozmiar i sprzątanie.
+
+Goście nie mają sesji (equipment/guest.py), więc wiersze tworzą tylko
+zalogowani użytkownicy; wygasłe wiersze usuwamy partiami, żeby nie trzymać
+długo blokad na dużej tabeli (komenda cleanup_sessions).
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+
+from django.contrib.sessions.models import Session
+from django.db import connection
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def session_table_stats() -> dict:
+    """
+    {"total", "expired", "bytes"} – bytes tylko na PostgreSQL
+    (pg_total_relation_size: tabela + indeksy + TOAST), inaczej None.
+    """
+    now = timezone.now()
+    stats = {
+        "total": Session.objects.count(),
+        "expired": Session.objects.filter(expire_date__lt=now).count(),
+        "bytes": None,
+    }
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_total_relation_size(%s)", [Session._meta.db_table])
+            stats["bytes"] = cursor.fetchone()[0]
+    return stats
+
+
+def delete_expired_sessions(batch_size=DEFAULT_BATCH_SIZE, pause=0.0, limit=None) -> int:
+    """
+    Usuwa wygasłe sesje partiami po `batch_size` (każda partia to osobna,
+    krótka transakcja). `pause` – sekundy przerwy między partiami,
+    `limit` – maksymalna liczba usuniętych wierszy w jednym przebiegu.
+    Zwraca liczbę usuniętych sesji.
+    """
+    now = timezone.now()
+    deleted = 0
+    while limit is None or deleted < limit:
+        size = batch_size if limit is None else min(batch_size, limit - deleted)
+        keys = list(
+            Session.objects.filter(expire_date__lt=now)
+            .order_by("expire_date")
+            .values_list("session_key", flat=True)[:size]
+        )
+        if not keys:
+            break
+        count, _ = Session.objects.filter(session_key__in=keys).delete()
+        deleted += count
+        logger.info("Usunięto %s wygasłych sesji (razem %s)", count, deleted)
+        if len(keys) < size:
+            break
+        if pause:
+            time.sleep(pause)
+    return deleted
@@ -0,0 +1,32 @@
+"""
+Sygnały aplikacji equipment.
+
+equipment_imported – wysyłany po zatwierdzeniu importu kart z Excela
+(ścieżki zbiorcze nie wysyłają post_save dla każdej karty).
+Argumenty: created_count, updated_count, touched_inventory_numbers.
+
+equipment_rooms_changed – wysyłany po zatwierdzeniu innych zmian, po
+których w salach mogło przybyć lub ubyć kart (edycja karty, akcje i edycja
+hurtowa w adminie, dodanie / usunięcie karty). Argument: rooms – zbiór
+par (building, room) sprzed i po zmianie.
+"""
+
+from django.db import transaction
+from django.dispatch import Signal
+
+
+equipment_imported = Signal()
+equipment_rooms_changed = Signal()
+
+# pola karty, których zmiana przenosi ją do innej sali
+ROOM_FIELDS = ("building", "room")
+
+
+def send_rooms_changed(sender, rooms) -> None:
+    """
+    Wysyła equipment_rooms_changed po zatwierdzeniu bieżącej transakcji
+    (poza transakcją – od razu). Pary bez numeru sali są pomijane.
+    """
+    rooms = frozenset((building, room) for building, room in rooms if room)
+    if rooms:
+        transaction.on_commit(lambda: equipment_rooms_changed.send(sender=sender, rooms=rooms))
@@ -0,0 +1,176 @@
+"""
+Migawki stanu kart sprzętu i zapytania "na dzień".
+
+Zapis (take_snapshot) – przyrostowo względem poprzedniej migawki:
+zapisujemy tylko karty, których stan (SNAPSHOT_FIELDS) się zmienił,
+oraz "nagrobki" (deleted=True) dla kart usuniętych. Co
+EQUIPMENT_SNAPSHOT_FULL_EVERY migawek zapisywana jest migawka pełna.
+
+Odczyt (equipment_at) – stan karty w migawce S to jej najnowszy wpis
+z migawek od ostatniej pełnej do S. Dla sali / pracownika wystarcza jedno
+zapytanie: wpisy z (building, room) [albo user_full_name] z tego zakresu,
+dla których nie istnieje nowszy wpis tej samej karty (NOT EXISTS po
+indeksie (equipment_id, snapshot)).
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import Equipment, InventorySnapshot, SnapshotEntry
+
+
+SNAPSHOT_FIELDS = (
+    "inventory_number",
+    "building",
+    "room",
+    "room_category",
+    "user_full_name",
+    "status",
+    "os_name",
+    "os_version",
+)
+
+WRITE_BATCH_SIZE = 2000
+
+
+def _full_every() -> int:
+    return getattr(settings, "EQUIPMENT_SNAPSHOT_FULL_EVERY", 30)
+
+
+def _base_snapshot_id(snapshot_id):
+    """
+    Ostatnia pełna migawka nie nowsza niż `snapshot_id`.
+    """
+    return (
+        InventorySnapshot.objects.filter(is_full=True, id__lte=snapshot_id)
+        .order_by("-id")
+        .values_list("id", flat=True)
+        .first()
+    )
+
+
+def _row(values):
+    return tuple(v or "" for v in values)
+
+
+def current_state() -> dict:
+    """
+    {equipment_id: krotka SNAPSHOT_FIELDS} dla wszystkich kart.
+    """
+    rows = Equipment.objects.values_list("pk", *SNAPSHOT_FIELDS).iterator(chunk_size=5000)
+    return {row[0]: _row(row[1:]) for row in rows}
+
+
+def state_at_snapshot(snapshot_id) -> dict:
+    """
+    Pełny stan w migawce: pełna migawka bazowa + kolejne przyrosty.
+    """
+    base = _base_snapshot_id(snapshot_id)
+    if base is None:
+        return {}
+
+    state = {}
+    entries = (
+        SnapshotEntry.objects.filter(snapshot_id__gte=base, snapshot_id__lte=snapshot_id)
+        .order_by("snapshot_id")
+        .values_list("equipment_id", "deleted", *SNAPSHOT_FIELDS)
+        .iterator(chunk_size=5000)
+    )
+    for equipment_id, deleted, *values in entries:
+        if deleted:
+            state.pop(equipment_id, None)
+        else:
+            state[equipment_id] = _row(values)
+    return state
+
+
+def take_snapshot(full=None) -> InventorySnapshot:
+    """
+    Zapisuje migawkę; full=None -> pełna, gdy to pierwsza migawka albo
+    od ostatniej pełnej minęło EQUIPMENT_SNAPSHOT_FULL_EVERY migawek.
+    """
+    previous = InventorySnapshot.objects.order_by("-id").first()
+    if full is None:
+        base = _base_snapshot_id(previous.id) if previous else None
+        full = base is None or (
+            InventorySnapshot.objects.filter(id__gt=base).count() + 1 >= _full_every()
+        )
+
+    current = current_state()
+    if full:
+        changed = current
+        removed = []
+    else:
+        before = state_at_snapshot(previous.id)
+        changed = {pk: values for pk, values in current.items() if before.get(pk) != values}
+        removed = [pk for pk in before if pk not in current]
+
+    with transaction.atomic():
+        snapshot = InventorySnapshot.objects.create(
+            is_full=full,
+            equipment_count=len(current),
+            changed_count=len(changed) + len(removed),
+        )
+        entries = [
+            SnapshotEntry(snapshot=snapshot, equipment_id=pk, **dict(zip(SNAPSHOT_FIELDS, values)))
+            for pk, values in changed.items()
+        ]
+        entries.extend(
+            SnapshotEntry(snapshot=snapshot, equipment_id=pk, deleted=True) for pk in removed
+        )
+        SnapshotEntry.objects.bulk_create(entries, batch_size=WRITE_BATCH_SIZE)
+    return snapshot
+
+
+def snapshot_at(day):
+    """
+    Migawka obowiązująca na koniec dnia `day` (ostatnia wykonana przed
+    północą następnego dnia, czasu lokalnego).
+    """
+    until = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return InventorySnapshot.objects.filter(taken_at__lt=until).order_by("-taken_at", "-id").first()
+
+
+def equipment_at(day, building=None, room=None, user_full_name=None):
+    """
+    Karty w sali (building + room) albo u pracownika na dzień `day`.
+    Zwraca (migawka, lista słowników) – (None, []) gdy brak wcześniejszej migawki.
+    """
+    snapshot = snapshot_at(day)
+    if snapshot is None:
+        return None, []
+
+    filters = {}
+    if building is not None:
+        filters["building"] = building
+    if room is not None:
+        filters["room"] = room
+    if user_full_name is not None:
+        filters["user_full_name"] = user_full_name
+
+    base = _base_snapshot_id(snapshot.id)
+    if base is None:
+        return snapshot, []
+    newer = SnapshotEntry.objects.filter(
+        equipment_id=OuterRef("equipment_id"),
+        snapshot_id__gt=OuterRef("snapshot_id"),
+        snapshot_id__lte=snapshot.id,
+    )
+    entries = (
+        SnapshotEntry.objects.filter(
+            snapshot_id__gte=base,
+            snapshot_id__lte=snapshot.id,
+            deleted=False,
+            **filters,
+        )
+        .exclude(Exists(newer))
+        .order_by("inventory_number")
+        .values("equipment_id", *SNAPSHOT_FIELDS)
+    )
+    return snapshot, list(entries)
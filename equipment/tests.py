@@ -1,3 +1,520 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import date, datetime, timedelta
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.admin import helpers
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import importing
+from .admin_performance import EstimatedCountPaginator
+from .data_version import DATA_VERSION_KEY, _bump, cached_until_change, data_version
+from .decorators import login_required_no_next
+from .discovery import _observation, reconcile
+from .forms import BulkEditForm, EquipmentEditForm
+from .history import moved_out_of_room, update_with_history
+from .models import Equipment, EquipmentChange, InventorySnapshot
+from .network import lookup_equipment
+from .snapshots import equipment_at, take_snapshot
+
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class EquipmentHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("jan", password="x")
+        self.since = timezone.now()
+
+    def _card(self, number, building="40", room="033", **fields):
+        return Equipment.objects.create(inventory_number=number, building=building, room=room, **fields)
+
+    def test_history_only_for_changed_fields(self):
+        moved = self._card("T-1", user_full_name="Kowalski")
+        same = self._card("T-2", room="100", user_full_name="Kowalski")
+
+        updated = update_with_history(
+            Equipment.objects.all(), {"room": "100", "user_full_name": "Kowalski"}, user=self.user
+        )
+        self.assertEqual(updated, 2)
+        changes = list(EquipmentChange.objects.values_list("equipment_id", "field_name", "old_value", "new_value"))
+        self.assertEqual(changes, [(moved.pk, "room", "033", "100")])
+        self.assertFalse(EquipmentChange.objects.filter(equipment=same).exists())
+        self.assertEqual(EquipmentChange.objects.get().changed_by, self.user)
+
+    def test_moved_out_of_room_same_building(self):
+        card = self._card("T-1")
+        update_with_history(Equipment.objects.filter(pk=card.pk), {"room": "100"})
+        self.assertEqual(
+            [c.equipment_id for c in moved_out_of_room("40", "033", self.since)], [card.pk]
+        )
+        self.assertEqual(list(moved_out_of_room("30", "033", self.since)), [])
+
+    def test_moved_out_of_room_with_building_change(self):
+        card = self._card("T-1")
+        other = self._card("T-2", building="30")
+        update_with_history(
+            Equipment.objects.filter(pk__in=[card.pk, other.pk]), {"building": "50", "room": "100"}
+        )
+        self.assertEqual(
+            [c.equipment_id for c in moved_out_of_room("40", "033", self.since)], [card.pk]
+        )
+        self.assertEqual(
+            [c.equipment_id for c in moved_out_of_room("30", "033", self.since)], [other.pk]
+        )
+        self.assertEqual(list(moved_out_of_room("40", "033", timezone.now())), [])
+
+
+def _xlsx(headers, *rows):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(headers)
+    for row in rows:
+        ws.append(row)
+    out = BytesIO()
+    wb.save(out)
+    out.seek(0)
+    return out
+
+
+class ImportPlanTests(TestCase):
+    HEADERS = ["inventory_number", "room_category", "room", "purchase_date"]
+
+    def setUp(self):
+        self.user = User.objects.create_user("jan", password="x")
+        self.card = Equipment.objects.create(
+            inventory_number="T-1", room_category="LAB", room="100", purchase_date=date(2020, 1, 2)
+        )
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(EQUIPMENT_IMPORT_PREVIEW_DIR=tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _plan(self, *rows):
+        plan = importing.build_import_plan(_xlsx(self.HEADERS, *rows), "karty.xlsx")
+        # jak w widoku: plan przechodzi przez zapis na dysk (JSON)
+        return importing.load_plan(importing.save_plan(plan))
+
+    def test_plan_round_trip(self):
+        plan = self._plan(
+            ["T-1", "LAB", "200", datetime(2020, 1, 2)],
+            ["T-2", "SALA", "033", datetime(2021, 3, 5)],
+        )
+        self.assertEqual(
+            {k: plan["stats"][k] for k in ("new", "changed", "unchanged", "invalid")},
+            {"new": 1, "changed": 1, "unchanged": 0, "invalid": 0},
+        )
+        changed = next(e for e in plan["rows"] if e["status"] == "changed")
+        self.assertEqual(changed["changes"], {"room": ["100", "200"]})
+
+        result = importing.apply_plan(plan, self.user)
+        self.assertEqual((result["created_count"], result["updated_count"], result["stale_count"]), (1, 1, 0))
+
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.room, "200")
+        self.assertEqual(self.card.last_modified_by, self.user)
+        created = Equipment.objects.get(inventory_number="T-2")
+        self.assertEqual((created.room_category, created.purchase_date), ("SALA", date(2021, 3, 5)))
+        self.assertEqual(
+            list(EquipmentChange.objects.values_list("inventory_number", "field_name", "old_value", "new_value")),
+            [("T-1", "room", "100", "200")],
+        )
+
+        # ten sam plik drugi raz – nic do zmiany
+        again = self._plan(
+            ["T-1", "LAB", "200", datetime(2020, 1, 2)],
+            ["T-2", "SALA", "033", datetime(2021, 3, 5)],
+        )
+        self.assertEqual((again["stats"]["unchanged"], again["rows"]), (2, []))
+
+    def test_row_changed_after_preview_is_stale(self):
+        plan = self._plan(["T-1", "LAB", "200", None], ["T-3", "LAB", "300", None])
+        Equipment.objects.filter(pk=self.card.pk).update(room="150")
+        Equipment.objects.create(inventory_number="T-3", room="999")
+
+        result = importing.apply_plan(plan, self.user)
+        self.assertEqual((result["created_count"], result["updated_count"], result["stale_count"]), (0, 0, 2))
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.room, "150")
+        self.assertEqual(Equipment.objects.get(inventory_number="T-3").room, "999")
+        self.assertFalse(EquipmentChange.objects.exists())
+
+    def test_empty_cell_keeps_current_value(self):
+        plan = self._plan(["T-1", None, " ", None], ["T-2", None, None, None])
+        self.assertEqual(
+            (plan["stats"]["new"], plan["stats"]["changed"], plan["stats"]["unchanged"]), (1, 0, 1)
+        )
+        self.assertEqual(plan["stats"]["kept_empty_cells"], 3)
+
+        importing.apply_plan(plan, self.user)
+        self.card.refresh_from_db()
+        self.assertEqual(
+            (self.card.room_category, self.card.room, self.card.purchase_date),
+            ("LAB", "100", date(2020, 1, 2)),
+        )
+        # nowa karta – w pustych polach wartości domyślne
+        self.assertEqual(Equipment.objects.get(inventory_number="T-2").room_category, "MAGAZYN")
+
+
+class SubnetLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for number, ip in [
+            ("T-1", "10.0.3.5"),
+            ("T-2", "10.0.3. 200"),
+            ("T-3", "10.0.4.1"),
+            ("T-4", "DHCP"),
+            ("T-5", ""),
+        ]:
+            Equipment.objects.create(inventory_number=number, ip_address=ip)
+
+    def _numbers(self, query):
+        kind, queryset, error = lookup_equipment(query)
+        self.assertEqual((kind, error), ("cidr", ""))
+        return sorted(queryset.values_list("inventory_number", flat=True))
+
+    def test_cards_inside_network(self):
+        self.assertEqual(self._numbers("10.0.3.0/24"), ["T-1", "T-2"])
+        self.assertEqual(self._numbers("10.0.0.0/16"), ["T-1", "T-2", "T-3"])
+
+    def test_host_network_and_non_strict_prefix(self):
+        self.assertEqual(self._numbers("10.0.4.1/32"), ["T-3"])
+        self.assertEqual(self._numbers("10.0.3.77/24"), ["T-1", "T-2"])
+
+    def test_invalid_network(self):
+        kind, queryset, error = lookup_equipment("10.0.3.0/99", kind="cidr")
+        self.assertTrue(error)
+        self.assertFalse(queryset.exists())
+
+
+class SnapshotTests(TestCase):
+    def _take(self, day, **kwargs):
+        snapshot = take_snapshot(**kwargs)
+        # migawka "wykonana" w południe danego dnia
+        taken_at = timezone.make_aware(datetime.combine(day, datetime.min.time()) + timedelta(hours=12))
+        InventorySnapshot.objects.filter(pk=snapshot.pk).update(taken_at=taken_at)
+        return snapshot
+
+    def _numbers(self, day, **filters):
+        snapshot, rows = equipment_at(day, **filters)
+        return snapshot, [row["inventory_number"] for row in rows]
+
+    def test_full_then_delta_with_move_and_delete(self):
+        day1 = date(2024, 3, 1)
+        day2 = date(2024, 3, 2)
+        moved = Equipment.objects.create(inventory_number="T-1", building="40", room="033")
+        deleted = Equipment.objects.create(inventory_number="T-2", building="40", room="033")
+        Equipment.objects.create(inventory_number="T-3", building="40", room="033", user_full_name="Nowak")
+
+        full = self._take(day1)
+        self.assertTrue(full.is_full)
+        self.assertEqual((full.equipment_count, full.changed_count), (3, 3))
+
+        Equipment.objects.filter(pk=moved.pk).update(building="30", room="100")
+        deleted.delete()
+        delta = self._take(day2)
+        self.assertFalse(delta.is_full)
+        self.assertEqual((delta.equipment_count, delta.changed_count), (2, 2))
+
+        self.assertEqual(self._numbers(day1, building="40", room="033"), (full, ["T-1", "T-2", "T-3"]))
+        self.assertEqual(self._numbers(day1, building="30", room="100"), (full, []))
+
+        self.assertEqual(self._numbers(day2, building="40", room="033"), (delta, ["T-3"]))
+        self.assertEqual(self._numbers(day2, building="30", room="100"), (delta, ["T-1"]))
+        self.assertEqual(self._numbers(day2, user_full_name="Nowak"), (delta, ["T-3"]))
+
+        # przed pierwszą migawką nie ma danych
+        self.assertEqual(equipment_at(day1 - timedelta(days=1), building="40", room="033"), (None, []))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class DataVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_save_invalidates_cached_value(self):
+        calls = []
+
+        def build():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(cached_until_change("test", ["a"], build), 1)
+        self.assertEqual(cached_until_change("test", ["a"], build), 1)
+
+        before = data_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            Equipment.objects.create(inventory_number="T-1")
+        self.assertGreater(data_version(), before)
+        self.assertEqual(cached_until_change("test", ["a"], build), 2)
+
+    def test_bump_never_goes_back(self):
+        future = data_version() + 10**15
+        cache.set(DATA_VERSION_KEY, future, None)
+        _bump()
+        self.assertEqual(data_version(), future + 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReconcileTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # bez podbicia wersji w setUp (zwykły QuerySet), żeby test widział podbicie w reconcile()
+        card = Equipment(inventory_number="T-1", ip_address="10.0.3.5", mac_address="AA:BB:CC:DD:EE:FF")
+        card.refresh_network_fields()
+        [self.card] = Equipment._base_manager.bulk_create([card])
+
+    def test_sweep_sets_last_seen_without_bumping_data_version(self):
+        seen_at = timezone.now()
+        before = data_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            summary = reconcile([_observation("10.0.3.5", "aa-bb-cc-dd-ee-ff", "", "arp", seen_at)])
+        self.assertEqual(summary["updated"], 1)
+        self.assertEqual(data_version(), before)
+        self.card.refresh_from_db()
+        self.assertEqual((self.card.last_seen_at, self.card.last_seen_ip), (seen_at, "10.0.3.5"))
+
+
+def _view(request, *args, **kwargs):
+    return HttpResponse(f"ok {args} {sorted(kwargs.items())}")
+
+
+class LoginRequiredNoNextTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def _request(self, user, path="/baza/magazyn/?page=2"):
+        request = self.factory.get(path)
+        request.user = user
+        return request
+
+    def test_anonymous_is_redirected_without_next(self):
+        view = login_required_no_next(_view)
+        response = view(self._request(AnonymousUser()))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response["Location"], "/baza/")
+        self.assertNotIn("next", response["Location"])
+
+    def test_custom_login_url(self):
+        view = login_required_no_next(login_url="/admin/login/")(_view)
+        response = view(self._request(AnonymousUser()))
+        self.assertEqual(response["Location"], "/admin/login/")
+
+    def test_authenticated_reaches_view_with_arguments(self):
+        view = login_required_no_next(login_url="/baza/")(_view)
+        response = view(self._request(User(username="jan")), "LAB", pk=5)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"ok ('LAB',) [('pk', 5)]")
+
+    def test_wraps_once_and_keeps_metadata(self):
+        view = login_required_no_next(_view)
+        self.assertIs(view.__wrapped__, _view)
+        self.assertEqual(view.__name__, "_view")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch("equipment.admin_performance.ESTIMATE_MIN_ROWS", 0)
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Equipment.objects.bulk_create(
+            [Equipment(inventory_number=f"T-{i:02}") for i in range(25)]
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def _paginator(self, estimate):
+        with mock.patch("equipment.admin_performance._estimated_rows", return_value=estimate):
+            paginator = EstimatedCountPaginator(Equipment.objects.order_by("pk"), 10)
+            paginator.count
+        return paginator
+
+    def test_estimate_too_high_falls_back_to_last_page(self):
+        paginator = self._paginator(100)
+        self.assertEqual(paginator.num_pages, 10)
+        page = paginator.page(7)
+        self.assertEqual((page.number, len(page), page.has_next()), (3, 5, False))
+        self.assertEqual(paginator.count, 25)
+
+    def test_estimate_too_low_still_reaches_last_rows(self):
+        paginator = self._paginator(5)
+        page = paginator.page(1)
+        self.assertTrue(page.has_next())
+        page = paginator.page(3)
+        self.assertEqual((len(page), page.has_next(), paginator.num_pages), (5, False, 3))
+
+
+class AdminActionTestMixin:
+    def setUp(self):
+        self.admin = User.objects.create_superuser("adm", password="x")
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:equipment_equipment_changelist")
+        self.cards = [
+            Equipment.objects.create(inventory_number=f"T-{i}", building="40", room="033", room_category="LAB")
+            for i in range(5)
+        ]
+
+    def _action(self, action, pks, **data):
+        return self.client.post(
+            self.url,
+            {"action": action, "index": 0, helpers.ACTION_CHECKBOX_NAME: [str(pk) for pk in pks], **data},
+        )
+
+
+class BulkActionSelectionTests(AdminActionTestMixin, TestCase):
+    def test_confirmation_counts_selected_cards(self):
+        response = self._action("action_move_to_magazyn", [c.pk for c in self.cards[:2]])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["selected_count"], 2)
+        self.assertFalse(response.context["select_across"])
+        self.assertEqual(
+            [obj.inventory_number for obj in response.context["sample"]], ["T-0", "T-1"]
+        )
+
+    def test_select_across_counts_whole_changelist(self):
+        # "zaznacz wszystkie": admin dostaje jeden numer, liczy się cały queryset
+        response = self._action("action_move_to_magazyn", [self.cards[0].pk], select_across="1")
+        self.assertEqual(response.context["selected_count"], 5)
+        self.assertEqual(len(response.context["sample"]), 5)
+        self.assertEqual(response.context["selected_ids"], [self.cards[0].pk])
+
+        response = self._action(
+            "action_move_to_magazyn", [self.cards[0].pk], select_across="1", confirm="yes"
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Equipment.objects.filter(room_category="MAGAZYN").count(), 5)
+        self.assertEqual(EquipmentChange.objects.filter(field_name="room_category").count(), 5)
+        texts = [str(m) for m in response.wsgi_request._messages]
+        self.assertIn("Zapisano partie: 1/1 (5/5 kart).", texts)
+
+    def test_update_in_chunks_reports_progress(self):
+        calls = []
+        updated = update_with_history(
+            Equipment.objects.all(), {"room": "100"}, chunk_size=2,
+            progress=lambda done, total: calls.append((done, total)),
+        )
+        self.assertEqual(updated, 5)
+        self.assertEqual(calls, [(2, 5), (4, 5), (5, 5)])
+        self.assertEqual(EquipmentChange.objects.count(), 5)
+
+
+class BulkEditActionTests(AdminActionTestMixin, TestCase):
+    def test_unique_fields_are_not_offered(self):
+        choices = [name for name, _ in BulkEditForm().fields["field"].choices]
+        self.assertIn("room", choices)
+        self.assertNotIn("inventory_number", choices)
+        form = BulkEditForm({"field": "inventory_number", "value": "T-9"})
+        self.assertFalse(form.is_valid())
+        self.assertIn("field", form.errors)
+
+    def test_invalid_value_is_rejected(self):
+        pks = [c.pk for c in self.cards]
+        for field, value in (("purchase_date", "jutro"), ("room_category", "ZZZ")):
+            response = self._action("action_bulk_edit", pks, apply="yes", field=field, value=value)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("value", response.context["form"].errors)
+        self.assertEqual(Equipment.objects.filter(room_category="LAB", purchase_date=None).count(), 5)
+        self.assertFalse(EquipmentChange.objects.exists())
+
+    def test_valid_value_is_applied_with_history(self):
+        pks = [c.pk for c in self.cards[:3]]
+        response = self._action("action_bulk_edit", pks, apply="yes", field="purchase_date", value="2024-05-06")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Equipment.objects.filter(purchase_date=date(2024, 5, 6)).count(), 3)
+        self.assertEqual(
+            sorted(EquipmentChange.objects.values_list("inventory_number", "new_value")),
+            [("T-0", "2024-05-06"), ("T-1", "2024-05-06"), ("T-2", "2024-05-06")],
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RoomGridTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("jan", password="x")
+        self.client.force_login(self.user)
+        self.card = Equipment.objects.create(
+            inventory_number="T-1", room_category="LAB", building="40", room="033"
+        )
+        self.url = reverse("equipment:room_grid_edit", args=["LAB", "40", "033"])
+
+    def _post(self, changes, version=None):
+        row = {"id": self.card.pk, "version": version or str(self.card.version), "changes": changes}
+        return self.client.post(self.url, json.dumps({"rows": [row]}), content_type="application/json")
+
+    def test_invalid_ip_is_rejected_per_cell(self):
+        response = self._post({"ip_address": "10.0.3.300", "hostname": "lab-01"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()["errors"][str(self.card.pk)]), ["ip_address"])
+        self.card.refresh_from_db()
+        self.assertEqual((self.card.ip_address, self.card.hostname), ("", ""))
+
+    def test_valid_addresses_are_saved(self):
+        response = self._post({"ip_address": "10.0.3. 5", "mac_address": "aa-bb-cc-dd-ee-ff"})
+        self.assertEqual(response.status_code, 200)
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.ip_normalized, "10.0.3.5")
+        self.assertEqual(self.card.mac_normalized, "AABBCCDDEEFF")
+        self.assertEqual(response.json()["versions"], {str(self.card.pk): str(self.card.version)})
+
+    def test_stale_version_is_rejected(self):
+        stale = str(self.card.version)
+        Equipment.objects.filter(pk=self.card.pk).update(hostname="inny", version=self.card.version + 1)
+
+        response = self._post({"hostname": "lab-01"}, version=stale)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["conflicts"], [self.card.pk])
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.hostname, "inny")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class EquipmentEditVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("jan", password="x")
+        self.client.force_login(self.user)
+        self.card = Equipment.objects.create(inventory_number="T-1")
+        self.url = reverse("equipment:equipment_edit", args=[self.card.pk])
+
+    def _data(self, **changes):
+        form = EquipmentEditForm(instance=self.card)
+        data = {name: form[name].value() for name in form.fields}
+        data.update(changes)
+        return {name: "" if value is None else value for name, value in data.items()}
+
+    def test_save_bumps_version(self):
+        response = self.client.post(self.url, self._data(notes="nowe"))
+        self.assertEqual(response.status_code, 302)
+        self.card.refresh_from_db()
+        self.assertEqual((self.card.notes, self.card.version), ("nowe", 2))
+
+    def test_stale_version_returns_409(self):
+        data = self._data(notes="moje")
+        Equipment.objects.filter(pk=self.card.pk).update(notes="cudze", version=2)
+
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 409)
+        self.card.refresh_from_db()
+        self.assertEqual((self.card.notes, self.card.version), ("cudze", 2))
+
+    def test_bulk_update_makes_open_form_stale(self):
+        data = self._data(notes="moje")
+        update_with_history(Equipment.objects.filter(pk=self.card.pk), {"room": "100"})
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.version, 2)
+
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 409)
+        self.card.refresh_from_db()
+        self.assertEqual((self.card.room, self.card.notes), ("100", ""))
@@ -0,0 +1,203 @@
+"""
+Dwupoziomowy cache wyliczanych agregatów (statystyki, raporty, liczniki).
+
+L1 – słownik w pamięci procesu, krótki czas życia (TIERED_CACHE_L1_SECONDS),
+     ograniczona liczba wpisów (TIERED_CACHE_L1_MAX_ENTRIES, najstarsze wylatują),
+L2 – wspólny cache Django (settings.CACHES: pliki w var/cache albo Redis),
+     widoczny dla wszystkich workerów gunicorna.
+
+Ochrona przed „stampede” (wiele żądań naraz liczy ten sam wynik):
+- w obrębie procesu – blokada per klucz (pula blokad), wątki jednego
+  workera nie liczą tego samego równolegle,
+- między procesami – w L2 trzymamy (świeże_do, wartość) dłużej niż `timeout`;
+  po czasie świeżości liczy od nowa tylko ten, kto zdobędzie blokadę,
+  reszta dostaje dotychczasową wartość,
+- zimny start (brak wartości) – pozostali chwilę czekają na wynik zwycięzcy,
+  a gdy się nie doczekają, liczą sami.
+
+Blokada między procesami:
+- Redis (django.core.cache.backends.redis.RedisCache) – cache.add, czyli
+  SET NX: atomowe także między serwerami,
+- każdy inny backend (FileBasedCache, LocMemCache) – plik blokady tworzony
+  z O_CREAT | O_EXCL w TIERED_CACHE_LOCK_DIR (jak w export_cache.py).
+  cache.add() FileBasedCache to „sprawdź, potem zapisz” – dwa procesy mogą
+  oba uznać, że zdobyły blokadę. Plik działa tylko w obrębie jednego serwera,
+  ale cache plikowy i tak nie jest współdzielony między serwerami.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+
+
+KEY_PREFIX = "tiered:"
+
+# Jak długo po czasie świeżości wartość może być jeszcze podana (w trakcie przeliczania)
+STALE_SECONDS = 300
+# Blokada przeliczania w L2 (gdyby proces liczący padł – wygasa sama)
+LOCK_SECONDS = 60
+# Zimny start: ile czekamy na wynik innego procesu
+WAIT_SECONDS = 10
+POLL_SECONDS = 0.1
+
+_LOCK_STRIPES = 64
+
+_l1 = OrderedDict()
+_l1_lock = threading.Lock()
+_key_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+
+def _l1_seconds() -> float:
+    return getattr(settings, "TIERED_CACHE_L1_SECONDS", 5)
+
+
+def _l1_max_entries() -> int:
+    return getattr(settings, "TIERED_CACHE_L1_MAX_ENTRIES", 500)
+
+
+def _default_timeout() -> int:
+    return getattr(settings, "TIERED_CACHE_DEFAULT_SECONDS", 3600)
+
+
+def _l1_get(key):
+    with _l1_lock:
+        entry = _l1.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _l1[key]
+            return None
+        _l1.move_to_end(key)
+        return entry
+
+
+def _l1_set(key, value):
+    with _l1_lock:
+        _l1[key] = (time.monotonic() + _l1_seconds(), value)
+        _l1.move_to_end(key)
+        while len(_l1) > _l1_max_entries():
+            _l1.popitem(last=False)
+
+
+def _lock_dir() -> Path:
+    path = Path(
+        getattr(
+            settings,
+            "TIERED_CACHE_LOCK_DIR",
+            Path(settings.BASE_DIR) / "var" / "locks",
+        )
+    )
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _lock_path(lock_key) -> Path:
+    return _lock_dir() / (hashlib.sha1(lock_key.encode("utf-8")).hexdigest() + ".lock")
+
+
+def _atomic_add() -> bool:
+    return isinstance(caches["default"], RedisCache)
+
+
+def _acquire(lock_key) -> bool:
+    """
+    Blokada przeliczania klucza między procesami; wygasa po LOCK_SECONDS
+    (gdyby proces liczący padł).
+    """
+    if _atomic_add():
+        return cache.add(lock_key, 1, LOCK_SECONDS)
+
+    path = _lock_path(lock_key)
+    try:
+        if time.time() - path.stat().st_mtime > LOCK_SECONDS:
+            path.unlink(missing_ok=True)
+    except OSError:
+        pass
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    os.close(fd)
+    return True
+
+
+def _release(lock_key):
+    if _atomic_add():
+        cache.delete(lock_key)
+    else:
+        _lock_path(lock_key).unlink(missing_ok=True)
+
+
+def _l2_store(key, value, timeout):
+    cache.set(key, (time.time() + timeout, value), timeout + STALE_SECONDS)
+    return value
+
+
+def _l2_build(key, build, timeout):
+    lock_key = f"{key}:lock"
+    entry = cache.get(key)
+
+    if entry is not None:
+        fresh_until, value = entry
+        if fresh_until > time.time():
+            return value
+        # nieświeża: liczy jeden proces, pozostali dostają starą wartość
+        if not _acquire(lock_key):
+            return value
+        try:
+            return _l2_store(key, build(), timeout)
+        finally:
+            _release(lock_key)
+
+    if _acquire(lock_key):
+        try:
+            return _l2_store(key, build(), timeout)
+        finally:
+            _release(lock_key)
+
+    deadline = time.monotonic() + WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(POLL_SECONDS)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[1]
+    return _l2_store(key, build(), timeout)
+
+
+def get_or_compute(key: str, build, timeout=None):
+    """
+    Wartość spod `key` (L1, potem L2), a gdy jej brak – wynik build().
+    `timeout` – czas świeżości w sekundach (domyślnie TIERED_CACHE_DEFAULT_SECONDS).
+    Wynik może być dowolnym obiektem dającym się zapisać w cache (także None).
+    """
+    key = KEY_PREFIX + key
+    entry = _l1_get(key)
+    if entry is not None:
+        return entry[1]
+
+    with _key_locks[hash(key) % _LOCK_STRIPES]:
+        entry = _l1_get(key)
+        if entry is not None:
+            return entry[1]
+        value = _l2_build(key, build, timeout or _default_timeout())
+        _l1_set(key, value)
+    return value
+
+
+def invalidate(key: str):
+    """
+    Usuwa wartość z L2 i z L1 tego procesu (L1 innych procesów wygaśnie sama).
+    """
+    key = KEY_PREFIX + key
+    cache.delete(key)
+    with _l1_lock:
+        _l1.pop(key, None)
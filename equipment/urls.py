@@ -9,7 +9,13 @@ from .views import (
     attachment_upload_view,
     attachment_delete_view,
 )
+from . import views_analytics
+from . import views_conflicts
+from . import views_network
+from . import views_reports
 from . import views_rooms
+from . import views_snapshots
+from . import views_warranty
 from . import views_workers
 
 app_name = "equipment"
@@ -67,6 +73,60 @@ urlpatterns = [
         name="room_equipment_list",
     ),
 
+    # /baza/pomieszczenia/<category_code>/<building>/<room>/edycja/
+    path(
+        "pomieszczenia/<str:category_code>/<str:building>/<str:room>/edycja/",
+        views_rooms.room_grid_edit,
+        name="room_grid_edit",
+    ),
+
+    # ====== SIEĆ (IP / CIDR / MAC / hostname) ======
+    # /baza/siec/
+    path(
+        "siec/",
+        views_network.network_lookup_view,
+        name="network_lookup",
+    ),
+
+    # /baza/konflikty/ – duplikaty IP / MAC / nr seryjnego
+    path(
+        "konflikty/",
+        views_conflicts.conflicts_report_view,
+        name="conflicts_report",
+    ),
+
+    # ====== GWARANCJE ======
+    # /baza/gwarancje/?days=90&building=30
+    path(
+        "gwarancje/",
+        views_warranty.warranty_dashboard_view,
+        name="warranty_dashboard",
+    ),
+
+    # ====== RAPORTY (tabele przestawne) ======
+    # /baza/raporty/?rows=os&cols=building
+    path(
+        "raporty/",
+        views_reports.pivot_report_view,
+        name="pivot_report",
+    ),
+
+    # ====== WIEK SPRZĘTU ======
+    # /baza/analityka/?group=building&years=5
+    path(
+        "analityka/",
+        views_analytics.age_analytics_view,
+        name="age_analytics",
+    ),
+
+    # ====== STAN NA DZIEŃ (migawki) ======
+    # /baza/stan-na-dzien/?date=2026-10-01&building=30&room=033
+    path(
+        "stan-na-dzien/",
+        views_snapshots.inventory_at_date_view,
+        name="inventory_at_date",
+    ),
+
     # ====== PRACOWNICY ======
     # /baza/pracownicy/
     path(
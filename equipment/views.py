@@ -1,17 +1,26 @@
 from datetime import date
 
 from .decorators import login_required_no_next
+from django import forms
 from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import NON_FIELD_ERRORS
+from django.db import transaction
 from django.db.models import Q
-from django.http import HttpResponse, HttpResponseForbidden
+from django.http import FileResponse, HttpResponseForbidden
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse_lazy
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.generic import ListView, DetailView, UpdateView
 
-from openpyxl import load_workbook, Workbook
+from educational_software.linking import laboratories_for_equipment, software_for_equipment
 
+from . import importing
+from .conflicts import conflict_count, conflicts_for_equipment, conflicts_for_inventory_numbers
+from .concurrency import EditConflict, save_changed_fields
+from .export_cache import built_at, export_status, get_export_artifact
+from .forms import EquipmentEditForm
+from .history import form_changes, save_changes
 from .models import Equipment, EquipmentAttachment
 
 
@@ -63,7 +72,7 @@ class EquipmentListView(ListView):
 class EquipmentDetailView(DetailView):
     """
     Szczegóły sprzętu /baza/magazyn/<pk>/
-    Pokazuje też listę załączników.
+    Pokazuje też listę załączników i konflikty (ten sam IP / MAC / nr seryjny).
     """
 
     model = Equipment
@@ -76,6 +85,13 @@ class EquipmentDetailView(DetailView):
         context["attachments"] = EquipmentAttachment.objects.filter(
             equipment=self.object
         ).order_by("uploaded_at")
+        # Inne karty z tym samym IP / MAC / nr seryjnym
+        context["conflicts"] = conflicts_for_equipment(self.object)
+        # Niezgodności z ostatniego skanowania sieci (komenda network_sweep)
+        context["network_mismatches"] = self.object.network_mismatches.all()
+        # Laboratoria / oprogramowanie sali tej karty (educational_software.LaboratoryRoom)
+        context["laboratories"] = laboratories_for_equipment(self.object)
+        context["software"] = software_for_equipment(self.object)
         return context
 
 
@@ -94,47 +110,37 @@ class EquipmentUpdateView(UpdateView):
     template_name = "equipment/equipment_form.html"
     context_object_name = "equipment"
 
-    # Pola edytowane w formularzu
-    fields = [
-        "inventory_number",
-        "equipment_name",
-        "equipment_type",
-        "status",
-        "hostname",
-        "user_full_name",
-        "borrowed_to",
-        "building",
-        "room",
-        "room_category",  # wybór kategorii pomieszczenia
-        "ip_address",
-        "mac_address",
-        "unit_serial_number",
-        "monitor_serial_number",
-        "os_name",
-        "os_version",
-        "os_serial_key",
-        "office_name",
-        "office_version",
-        "office_serial_key",
-        "supplier",
-        "purchase_date",
-        "warranty_until",
-        "notes",
-    ]
+    # Pola edytowane w formularzu: EDITABLE_FIELDS + ukryta wersja karty
+    form_class = EquipmentEditForm
 
     success_url = reverse_lazy("equipment:equipment_list")
 
     def form_valid(self, form):
         """
-        Ustawiamy last_modified_by i last_modified_at automatycznie.
+        Ustawiamy last_modified_by i last_modified_at automatycznie,
+        zapisujemy tylko zmienione pola (warunkowo – wersja karty,
+        equipment.concurrency) i dopisujemy je do historii.
         """
         obj = form.save(commit=False)
         user = self.request.user if self.request.user.is_authenticated else None
         obj.last_modified_by = user
         obj.last_modified_at = timezone.now()
-        obj.save()
+        try:
+            with transaction.atomic():
+                if save_changed_fields(obj, form.cleaned_data["expected_version"], form.changed_data):
+                    save_changes(form_changes(obj, form, user, source="edit"))
+        except EditConflict as exc:
+            form.add_error(None, forms.ValidationError(str(exc), code="conflict"))
+            return self.form_invalid(form)
         return redirect(self.get_success_url())
 
+    def form_invalid(self, form):
+        response = super().form_invalid(form)
+        if form.has_error(NON_FIELD_ERRORS, code="conflict"):
+            # 409 – karta zmieniona przez kogoś innego od otwarcia formularza
+            response.status_code = 409
+        return response
+
 
 # ============================================================
 # IMPORT Z EXCELA – WERSJA DLA ADMINA
@@ -149,150 +155,93 @@ def admin_equipment_import_view(request):
     Adres (zgodnie z urls.py):
     /baza/admin-import/ lub /baza/import/
 
+    Tryby (POST):
+    - plik + mode=preview  -> podgląd zmian (dry-run), plan zapisany pod tokenem,
+    - apply_token=<token>  -> zapis wcześniej przygotowanego planu (bez ponownego
+                              czytania pliku),
+    - sam plik             -> import od razu (ten sam plan, zapisany natychmiast).
+
     Szablon:
     templates/admin/equipment/equipment/import_excel.html
     """
 
+    template_name = "admin/equipment/equipment/import_excel.html"
     context = {}
 
+    if request.method == "POST" and request.POST.get("apply_token"):
+        token = request.POST["apply_token"]
+        plan = importing.load_plan(token)
+        if plan is None:
+            context["error"] = "Podgląd importu wygasł albo nie istnieje – wczytaj plik ponownie."
+            return render(request, template_name, context)
+
+        result = importing.apply_plan(plan, user=request.user)
+        importing.discard_plan(token)
+        context.update(_import_result_context(plan, result))
+        context.update(_import_conflicts_context(result))
+        return render(request, template_name, context)
+
     if request.method == "POST" and request.FILES.get("file"):
         file_obj = request.FILES["file"]
 
         try:
-            wb = load_workbook(file_obj, data_only=True)
-        except Exception as exc:
-            context["error"] = f"Nie udało się odczytać pliku XLSX: {exc}"
-            return render(
-                request,
-                "admin/equipment/equipment/import_excel.html",
-                context,
+            plan = importing.build_import_plan(file_obj, filename=file_obj.name)
+        except importing.ImportFileError as exc:
+            context["error"] = str(exc)
+            return render(request, template_name, context)
+
+        if request.POST.get("mode") == "preview":
+            context.update(
+                {
+                    "preview": True,
+                    "preview_token": importing.save_plan(plan),
+                    "preview_stats": plan["stats"],
+                    "preview_filename": plan["filename"],
+                    "preview_sample": importing.plan_sample(plan),
+                }
             )
+            return render(request, template_name, context)
 
-        ws = wb.active
-        rows = list(ws.iter_rows(values_only=True))
+        result = importing.apply_plan(plan, user=request.user)
+        context.update(_import_result_context(plan, result))
+        context.update(_import_conflicts_context(result))
+        return render(request, template_name, context)
 
-        if not rows:
-            context["error"] = "Plik jest pusty."
-            return render(
-                request,
-                "admin/equipment/equipment/import_excel.html",
-                context,
-            )
+    # GET lub brak pliku – pokazujemy pusty formularz (+ stan gotowego eksportu)
+    context["export_status"] = export_status()
+    return render(request, template_name, context)
 
-        # Pierwszy wiersz = nagłówki
-        header_row = rows[0]
-        headers = []
-        for cell in header_row:
-            if cell is None:
-                headers.append("")
-            else:
-                headers.append(str(cell).strip())
-
-        # Dostępne pola modelu (bez relacji)
-        model_fields = {
-            f.name
-            for f in Equipment._meta.get_fields()
-            if f.concrete and not f.many_to_many and not f.auto_created
-        }
-
-        created_count = 0
-        updated_count = 0
-        processed_rows = 0
-
-        # NOWE LICZNIKI
-        skipped_empty_rows = 0
-        skipped_no_inventory = 0
-        duplicate_inventory_in_file = 0
-        seen_inventory_numbers = set()
-
-        # Wiersze danych (od drugiego wiersza)
-        for row in rows[1:]:
-            # Pomijamy całkowicie puste wiersze
-            if all(cell is None for cell in row):
-                skipped_empty_rows += 1
-                continue
-
-            processed_rows += 1
-            data = {}
-
-            for idx, value in enumerate(row):
-                if idx >= len(headers):
-                    continue
-
-                original_header = headers[idx]
-                if not original_header:
-                    continue
-
-                # Mapowanie specjalne: DATA_ZAKUP -> purchase_date
-                if original_header.upper() == "DATA_ZAKUP":
-                    field_name = "purchase_date"
-                else:
-                    field_name = original_header
-
-                # Jeżeli po mapowaniu nazwa pola nie istnieje w modelu – pomijamy
-                if field_name not in model_fields:
-                    continue
-
-                data[field_name] = value
-
-            inv_raw = data.get("inventory_number")
-            inventory_number = str(inv_raw).strip() if inv_raw is not None else ""
-
-            if not inventory_number:
-                # Bez numeru inwentarzowego nie zapisujemy wiersza
-                skipped_no_inventory += 1
-                continue
-
-            # Duplikaty NR_INWENTARZOWY w samym pliku (liczymy kolejne wystąpienia)
-            if inventory_number in seen_inventory_numbers:
-                duplicate_inventory_in_file += 1
-            else:
-                seen_inventory_numbers.add(inventory_number)
-
-            # Czyszczenie stringów
-            clean_data = {}
-            for key, value in data.items():
-                if isinstance(value, str):
-                    clean_data[key] = value.strip()
-                else:
-                    clean_data[key] = value
-
-            # Tworzymy lub aktualizujemy rekord po inventory_number
-            obj, created = Equipment.objects.update_or_create(
-                inventory_number=inventory_number,
-                defaults=clean_data,
-            )
 
-            if created:
-                created_count += 1
-            else:
-                updated_count += 1
-
-        context.update(
-            {
-                "import_done": True,
-                "processed_rows": processed_rows,
-                "created_count": created_count,
-                "updated_count": updated_count,
-                # NOWE POLA DO WYŚWIETLENIA (jutro dopniemy w template)
-                "skipped_empty_rows": skipped_empty_rows,
-                "skipped_no_inventory": skipped_no_inventory,
-                "duplicate_inventory_in_file": duplicate_inventory_in_file,
-            }
-        )
+def _import_conflicts_context(result):
+    """
+    Konflikty IP / MAC / nr seryjnego dotyczące kart zapisanych w tym imporcie
+    (sprawdzamy tylko ich wartości, nie całą tabelę).
+    """
+    report = conflicts_for_inventory_numbers(result["touched_inventory_numbers"])
+    return {
+        "import_conflicts": report,
+        "import_conflict_count": conflict_count(report),
+    }
 
-        return render(
-            request,
-            "admin/equipment/equipment/import_excel.html",
-            context,
-        )
 
-    # GET lub brak pliku – pokazujemy pusty formularz
-    return render(
-        request,
-        "admin/equipment/equipment/import_excel.html",
-        context,
-    )
+def _import_result_context(plan, result):
+    """
+    Liczniki do wyświetlenia po zapisie importu.
+    """
+    stats = plan["stats"]
+    return {
+        "import_done": True,
+        "processed_rows": stats["processed_rows"],
+        "created_count": result["created_count"],
+        "updated_count": result["updated_count"],
+        "unchanged_count": stats["unchanged"],
+        "invalid_count": stats["invalid"],
+        "stale_count": result["stale_count"],
+        "skipped_empty_rows": stats["skipped_empty_rows"],
+        "skipped_no_inventory": stats["skipped_no_inventory"],
+        "duplicate_inventory_in_file": stats["duplicate_inventory_in_file"],
+        "invalid_rows": plan["invalid"][:importing.PREVIEW_SAMPLE_ROWS],
+    }
 
 
 @login_required_no_next(login_url="/baza/")
@@ -313,69 +262,29 @@ def equipment_import_view(request):
 def admin_equipment_export_view(request):
     """
     Eksport danych do pliku XLSX w formacie zgodnym z używanym Excelem.
+    Kolumny i konwersje pochodzą z rejestru equipment.columns (ten sam
+    rejestr czyta import), więc plik można zaimportować z powrotem.
+
+    Plik jest brany z cache na dysku (equipment.export_cache); ?fresh=1
+    wymusza zbudowanie go od nowa. Nazwa pliku zawiera datę jego zbudowania –
+    nieaktualny plik widać po dacie, a stronę importu (link do eksportu)
+    ostrzega export_status().
     """
 
-    # Tworzymy nowy skoroszyt
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Sprzet"
-
-    headers = [
-        "NR_INWENTARZOWY",
-        "BUDYNEK",
-        "POMIESZCZENIE",
-        "TYP_SPRZETU",
-        "NAZWA",
-        "NAZWISKO",
-        "NR_FABR",
-        "NR_SERYJNY_MONITORA",
-        "DATA_ZAKUP",
-        "UWAGI",
-        "KLUCZ_WINDOWS",
-        "KLUCZ_OFFICE",
-        "MAC_JEDNOSTKI",
-        "NAZWA_DOMENOWA",
-        "ADRES_IP",
-    ]
-    ws.append(headers)
-
-    queryset = Equipment.objects.all().order_by("inventory_number")
-
-    for eq in queryset:
-        row = [
-            eq.inventory_number or "",
-            eq.building or "",
-            eq.room or "",
-            eq.equipment_type or "",
-            eq.equipment_name or "",
-            eq.user_full_name or "",
-            eq.unit_serial_number or "",
-            eq.monitor_serial_number or "",
-            eq.purchase_date.strftime("%Y-%m-%d") if eq.purchase_date else "",
-            eq.notes or "",
-            eq.os_serial_key or "",
-            eq.office_serial_key or "",
-            eq.mac_address or "",
-            eq.hostname or "",
-            eq.ip_address or "",
-        ]
-        ws.append(row)
-
-    from io import BytesIO
-
-    response = HttpResponse(
+    export_file, is_current = get_export_artifact(force=request.GET.get("fresh") == "1")
+    stamp = timezone.localtime(built_at(export_file))
+
+    response = FileResponse(
+        export_file,
+        as_attachment=True,
+        filename=f"karty_sprzetu_{stamp:%Y-%m-%d_%H%M}.xlsx",
         content_type=(
             "application/vnd."
             "openxmlformats-officedocument."
             "spreadsheetml.sheet"
-        )
+        ),
     )
-    response["Content-Disposition"] = 'attachment; filename="karty_sprzetu.xlsx"'
-
-    output = BytesIO()
-    wb.save(output)
-    response.write(output.getvalue())
-
+    response["X-Export-Current"] = "1" if is_current else "0"
     return response
 
 
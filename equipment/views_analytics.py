@@ -0,0 +1,42 @@
+from .decorators import login_required_no_next
+from django.shortcuts import render
+
+from .analytics import (
+    DEFAULT_REPLACEMENT_YEARS,
+    GROUP_FIELDS,
+    age_distribution,
+    replacement_forecast,
+)
+
+
+REPLACEMENT_YEARS_CHOICES = (3, 4, 5, 6, 7, 8)
+
+
+@login_required_no_next(login_url="/baza/")
+def age_analytics_view(request):
+    """
+    Wiek sprzętu – /baza/analityka/?group=building&years=5
+
+    - rozkład wg roku zakupu per budynek / kategoria pomieszczenia,
+    - prognoza: ile kart osiągnie `years` lat w kolejnych kwartałach.
+    """
+    group = request.GET.get("group", "building")
+    if group not in GROUP_FIELDS:
+        group = "building"
+    try:
+        years = int(request.GET.get("years", DEFAULT_REPLACEMENT_YEARS))
+    except ValueError:
+        years = DEFAULT_REPLACEMENT_YEARS
+    if years not in REPLACEMENT_YEARS_CHOICES:
+        years = DEFAULT_REPLACEMENT_YEARS
+
+    context = {
+        "group": group,
+        "group_choices": list(GROUP_FIELDS.items()),
+        "group_label": GROUP_FIELDS[group],
+        "years": years,
+        "years_choices": REPLACEMENT_YEARS_CHOICES,
+        "distribution": age_distribution(group),
+        "forecast": replacement_forecast(years),
+    }
+    return render(request, "equipment/age_analytics.html", context)
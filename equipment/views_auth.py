@@ -2,12 +2,15 @@ from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.shortcuts import render, redirect
 
+from .guest import clear_guest_cookie, set_guest_cookie
+
 
 def login_view(request):
     """
     Logowanie użytkownika:
     - normalne logowanie (username + password)
-    - logowanie jako gość (bez hasła, z flagą w sesji)
+    - logowanie jako gość (bez hasła, znacznik w podpisanym ciasteczku –
+      bez zapisu sesji, zob. equipment/guest.py)
 
     Po zalogowaniu ZAWSZE przechodzimy do:
     /baza/oprogramowanie/ (educational_software)
@@ -20,8 +23,9 @@ def login_view(request):
         # 1. LOGOWANIE JAKO GOŚĆ
         # -----------------------------
         if action == "guest":
-            request.session["guest"] = True
-            return redirect("educational_software:software_list")
+            if request.user.is_authenticated:
+                logout(request)
+            return set_guest_cookie(redirect("educational_software:software_list"))
 
         # -----------------------------
         # 2. NORMALNE LOGOWANIE
@@ -36,8 +40,7 @@ def login_view(request):
             return render(request, "sprzet/login.html")
 
         login(request, user)
-        request.session["guest"] = False
-        return redirect("educational_software:software_list")
+        return clear_guest_cookie(redirect("educational_software:software_list"))
 
     # -----------------------------
     # 3. METODA GET – formularz logowania
@@ -49,9 +52,9 @@ def logout_view(request):
     """
     Wylogowanie użytkownika:
     - czyści sesję
-    - usuwa flagę guest
+    - usuwa ciasteczko gościa
     - wraca do strony logowania
     """
-    logout(request)
-    request.session.pop("guest", None)
-    return redirect("login-root")
\ No newline at end of file
+    if request.user.is_authenticated:
+        logout(request)
+    return clear_guest_cookie(redirect("login-root"))
\ No newline at end of file
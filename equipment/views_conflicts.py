@@ -0,0 +1,17 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import render
+
+from .conflicts import conflict_count, find_conflicts
+
+
+@staff_member_required(login_url="/admin/login/")
+def conflicts_report_view(request):
+    """
+    Raport konfliktów IP / MAC / nr seryjnego – /baza/konflikty/
+    """
+    report = find_conflicts()
+    context = {
+        "report": report,
+        "total": conflict_count(report),
+    }
+    return render(request, "equipment/conflicts_report.html", context)
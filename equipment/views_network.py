@@ -0,0 +1,48 @@
+from .decorators import login_required_no_next
+from django.shortcuts import render
+
+from .network import LOOKUP_KINDS, lookup_equipment
+
+
+# Więcej wyników nie ma sensu pokazywać na jednej stronie
+MAX_RESULTS = 500
+
+
+@login_required_no_next(login_url="/baza/")
+def network_lookup_view(request):
+    """
+    Wyszukiwanie sprzętu po sieci – /baza/siec/?q=...&kind=...
+
+    Obsługuje: dokładny adres IP, zakres CIDR (10.0.3.0/24),
+    prefiks MAC / OUI (00:1A:2B) oraz nazwę hosta (prefiks).
+    """
+    q = request.GET.get("q", "").strip()
+    kind = request.GET.get("kind", "auto")
+    if kind not in dict(LOOKUP_KINDS):
+        kind = "auto"
+
+    detected_kind, qs, error = lookup_equipment(q, kind)
+    results = list(
+        qs.order_by("ip_normalized", "inventory_number").only(
+            "pk",
+            "inventory_number",
+            "equipment_name",
+            "building",
+            "room",
+            "hostname",
+            "ip_address",
+            "mac_address",
+        )[:MAX_RESULTS + 1]
+    )
+
+    context = {
+        "q": q,
+        "kind": kind,
+        "kinds": LOOKUP_KINDS,
+        "detected_kind": dict(LOOKUP_KINDS).get(detected_kind, ""),
+        "error": error,
+        "results": results[:MAX_RESULTS],
+        "truncated": len(results) > MAX_RESULTS,
+        "max_results": MAX_RESULTS,
+    }
+    return render(request, "equipment/network_lookup.html", context)
@@ -0,0 +1,70 @@
+from .decorators import login_required_no_next
+from django.http import HttpResponse
+from django.shortcuts import render
+
+from .reports import (
+    DIMENSIONS,
+    FILTER_FIELDS,
+    ReportError,
+    clean_filters,
+    get_pivot,
+    pivot_csv,
+    pivot_xlsx,
+)
+
+
+XLSX_CONTENT_TYPE = (
+    "application/vnd."
+    "openxmlformats-officedocument."
+    "spreadsheetml.sheet"
+)
+
+
+@login_required_no_next(login_url="/baza/")
+def pivot_report_view(request):
+    """
+    Raport przestawny – /baza/raporty/?rows=os&cols=building&building=30
+
+    Dowolne dwa wymiary z reports.DIMENSIONS + filtry po polach karty.
+    ?format=csv / ?format=xlsx – pobranie tej samej tabeli jako pliku.
+    """
+    rows_dim = request.GET.get("rows", "os")
+    cols_dim = request.GET.get("cols", "building")
+    filters = clean_filters(request.GET)
+
+    pivot = None
+    error = ""
+    try:
+        pivot = get_pivot(rows_dim, cols_dim, filters)
+    except ReportError as exc:
+        error = str(exc)
+
+    export_format = request.GET.get("format")
+    if pivot is not None and export_format in ("csv", "xlsx"):
+        filename = f"raport_{rows_dim}_{cols_dim}.{export_format}"
+        if export_format == "csv":
+            # BOM – żeby Excel poprawnie rozpoznał polskie znaki
+            response = HttpResponse("\ufeff" + pivot_csv(pivot), content_type="text/csv; charset=utf-8")
+        else:
+            response = HttpResponse(pivot_xlsx(pivot), content_type=XLSX_CONTENT_TYPE)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    query = request.GET.copy()
+    query.pop("format", None)
+
+    context = {
+        "dimensions": [(code, label) for code, (label, _) in DIMENSIONS.items()],
+        "filter_fields": [
+            (field, label, filters.get(field, "")) for field, label in FILTER_FIELDS.items()
+        ],
+        "rows_dim": rows_dim,
+        "cols_dim": cols_dim,
+        "pivot": pivot,
+        "table": (
+            list(zip(pivot["rows"], pivot["matrix"], pivot["row_totals"])) if pivot else []
+        ),
+        "error": error,
+        "querystring": query.urlencode(),
+    }
+    return render(request, "equipment/pivot_report.html", context)
@@ -1,9 +1,13 @@
+import json
+
 from .decorators import login_required_no_next
 from django.db.models import Count
-from django.http import Http404
+from django.http import Http404, JsonResponse
 from django.shortcuts import render
 
+from .data_version import cached_until_change
 from .models import Equipment, ROOM_CATEGORY_CHOICES
+from .room_grid import GRID_FIELDS, apply_grid_changes, grid_version, parse_grid_payload
 
 
 # ============================================
@@ -11,21 +15,7 @@ from .models import Equipment, ROOM_CATEGORY_CHOICES
 # /baza/pomieszczenia/
 # ============================================
 
-@login_required_no_next(login_url="/baza/")
-def rooms_dashboard(request):
-    """
-    Widok POZIOM 1:
-    Pomieszczenia / Sale – przegląd kategorii:
-      - Lab. komputerowe
-      - Sala wykładowa
-      - Pokój
-      - Inne
-
-    Dla każdej kategorii liczymy:
-      - ile jest unikalnych pomieszczeń (building + room),
-      - ile jest kart sprzętu w tej kategorii.
-    """
-
+def _room_categories():
     categories = []
 
     # ROOM_CATEGORY_CHOICES zawiera też 'MAGAZYN' – pomijamy go tutaj
@@ -52,6 +42,26 @@ def rooms_dashboard(request):
                 "equipment_count": equipment_count,
             }
         )
+    return categories
+
+
+@login_required_no_next(login_url="/baza/")
+def rooms_dashboard(request):
+    """
+    Widok POZIOM 1:
+    Pomieszczenia / Sale – przegląd kategorii:
+      - Lab. komputerowe
+      - Sala wykładowa
+      - Pokój
+      - Inne
+
+    Dla każdej kategorii liczymy:
+      - ile jest unikalnych pomieszczeń (building + room),
+      - ile jest kart sprzętu w tej kategorii.
+    """
+
+    # liczniki w cache do następnej zmiany danych (wspólny dla workerów)
+    categories = cached_until_change("rooms_dashboard", [], _room_categories)
 
     context = {
         "categories": categories,
@@ -140,4 +150,69 @@ def room_equipment_list(request, category_code, building, room):
         "room": room,
         "equipments": equipments,
     }
-    return render(request, "equipment/room_equipment_list.html", context)
\ No newline at end of file
+    return render(request, "equipment/room_equipment_list.html", context)
+
+
+# ============================================
+# POZIOM 3 – EDYCJA TABELARYCZNA SALI
+# /baza/pomieszczenia/<category_code>/<building>/<room>/edycja/
+# ============================================
+
+@login_required_no_next(login_url="/baza/")
+def room_grid_edit(request, category_code, building, room):
+    """
+    Hostname / IP / MAC wszystkich kart sali w jednej tabeli.
+
+    GET  – tabela z polami do edycji,
+    POST – paczka JSON ze zmienionymi komórkami (equipment.room_grid):
+           200 {"ok": true, "versions": {...}},
+           400 {"ok": false, "errors": {...}} – błędne wartości,
+           409 {"ok": false, "conflicts": [...]} – karty zmienione w międzyczasie.
+    """
+
+    code_to_label = dict(ROOM_CATEGORY_CHOICES)
+
+    if category_code not in code_to_label or category_code == "MAGAZYN":
+        raise Http404("Nieprawidłowa kategoria pomieszczenia.")
+
+    equipments = Equipment.objects.filter(
+        room_category=category_code,
+        building=building,
+        room=room,
+    )
+
+    if request.method == "POST":
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({"ok": False, "errors": {0: {"rows": "Nieprawidłowy JSON."}}}, status=400)
+
+        rows, errors = parse_grid_payload(payload)
+        if errors:
+            return JsonResponse({"ok": False, "errors": errors}, status=400)
+
+        versions, conflicts = apply_grid_changes(equipments, rows, request.user)
+        if conflicts:
+            return JsonResponse({"ok": False, "conflicts": conflicts}, status=409)
+        return JsonResponse({"ok": True, "versions": versions})
+
+    rows = [
+        {
+            "equipment": eq,
+            "version": grid_version(eq),
+            "cells": [(name, getattr(eq, name)) for name in GRID_FIELDS],
+        }
+        for eq in equipments.only(
+            "pk", "inventory_number", "equipment_name", "version", *GRID_FIELDS
+        ).order_by("inventory_number")
+    ]
+
+    context = {
+        "category_code": category_code,
+        "category_label": code_to_label[category_code],
+        "building": building,
+        "room": room,
+        "columns": [Equipment._meta.get_field(name).verbose_name for name in GRID_FIELDS],
+        "rows": rows,
+    }
+    return render(request, "equipment/room_grid_edit.html", context)
@@ -0,0 +1,60 @@
+from datetime import date
+
+from .decorators import login_required_no_next
+from django.shortcuts import render
+from django.utils import timezone
+
+from .models import Equipment, InventorySnapshot
+from .snapshots import equipment_at
+
+
+@login_required_no_next(login_url="/baza/")
+def inventory_at_date_view(request):
+    """
+    Stan na dzień – /baza/stan-na-dzien/?date=2026-10-01&building=30&room=033
+    albo ...?date=2026-10-01&worker=KOWALSKI JAN
+
+    Odtwarzane z migawek (komenda inventory_snapshot).
+    """
+    building = request.GET.get("building", "").strip()
+    room = request.GET.get("room", "").strip()
+    worker = request.GET.get("worker", "").strip()
+
+    error = ""
+    day = timezone.localdate()
+    if request.GET.get("date"):
+        try:
+            day = date.fromisoformat(request.GET["date"])
+        except ValueError:
+            error = "Nieprawidłowa data (format RRRR-MM-DD)."
+
+    snapshot = None
+    items = []
+    searched = bool(worker or (building and room))
+    if searched and not error:
+        if worker:
+            snapshot, items = equipment_at(day, user_full_name=worker)
+        else:
+            snapshot, items = equipment_at(day, building=building, room=room)
+
+        # które karty nadal istnieją (link do aktualnej karty)
+        existing = set(
+            Equipment.objects.filter(pk__in=[i["equipment_id"] for i in items]).values_list("pk", flat=True)
+        )
+        for item in items:
+            item["exists"] = item["equipment_id"] in existing
+
+    oldest = InventorySnapshot.objects.order_by("taken_at").values_list("taken_at", flat=True).first()
+
+    context = {
+        "day": day,
+        "building": building,
+        "room": room,
+        "worker": worker,
+        "searched": searched,
+        "snapshot": snapshot,
+        "items": items,
+        "oldest": oldest,
+        "error": error,
+    }
+    return render(request, "equipment/inventory_at_date.html", context)
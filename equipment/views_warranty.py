@@ -0,0 +1,72 @@
+from .decorators import login_required_no_next
+from django.shortcuts import render
+from django.utils import timezone
+
+from .models import Equipment, WARRANTY_BUCKETS
+
+
+# Dostępne horyzonty listy "wygasa wkrótce" (dni)
+EXPIRING_DAYS_CHOICES = (30, 90)
+
+# Więcej wyników nie ma sensu pokazywać na jednej stronie
+MAX_RESULTS = 1000
+
+
+@login_required_no_next(login_url="/baza/")
+def warranty_dashboard_view(request):
+    """
+    Gwarancje – /baza/gwarancje/?days=90&building=30
+
+    - tabela: liczba kart w każdym przedziale gwarancji per budynek
+      (jedno zapytanie GROUP BY building z COUNT(...) FILTER),
+    - lista kart, którym gwarancja kończy się w ciągu `days` dni
+      (zakres po indeksie warranty_until), pogrupowana po budynku.
+    """
+    today = timezone.localdate()
+
+    try:
+        days = int(request.GET.get("days", 90))
+    except ValueError:
+        days = 90
+    if days not in EXPIRING_DAYS_CHOICES:
+        days = 90
+    building = request.GET.get("building", "").strip()
+
+    counts = Equipment.objects.warranty_bucket_counts(today)
+    summary = list(
+        Equipment.objects.values("building")
+        .annotate(**counts)
+        .order_by("building")
+    )
+    codes = [code for code, _, _ in WARRANTY_BUCKETS]
+    for row in summary:
+        row["cells"] = [row[code] for code in codes]
+
+    expiring = Equipment.objects.expiring_within(days, today)
+    if building:
+        expiring = expiring.filter(building=building)
+    expiring = list(
+        expiring.order_by("building", "warranty_until", "inventory_number").only(
+            "pk",
+            "inventory_number",
+            "equipment_name",
+            "building",
+            "room",
+            "user_full_name",
+            "warranty_until",
+        )[: MAX_RESULTS + 1]
+    )
+    truncated = len(expiring) > MAX_RESULTS
+
+    context = {
+        "today": today,
+        "days": days,
+        "days_choices": EXPIRING_DAYS_CHOICES,
+        "building": building,
+        "buckets": [(code, label) for code, label, _ in WARRANTY_BUCKETS],
+        "summary": summary,
+        "expiring": expiring[:MAX_RESULTS],
+        "truncated": truncated,
+        "max_results": MAX_RESULTS,
+    }
+    return render(request, "equipment/warranty_dashboard.html", context)
@@ -1,5 +1,6 @@
 from .decorators import login_required_no_next
 from django.shortcuts import render
+from .data_version import lazy
 from .models import Equipment
 
 
@@ -22,25 +23,17 @@ def _normalize_worker_name(name: str) -> str:
     return " ".join(parts)
 
 
-@login_required_no_next(login_url="/baza/")
-def workers_list_view(request):
-    """
-    Lista unikalnych pracowników:
-    - grupowanie po _normalize_worker_name(user_full_name),
-    - pomijamy puste i techniczne wpisy ('', '-', '—'),
-    - sortujemy alfabetycznie po kluczu,
-    - liczymy ilość kart sprzętu w każdej grupie.
-    """
-
+def _workers():
     # pobieramy wszystkie niepuste user_full_name
-    qs = Equipment.objects.exclude(user_full_name__isnull=True).exclude(
-        user_full_name=""
+    names = (
+        Equipment.objects.exclude(user_full_name__isnull=True)
+        .exclude(user_full_name="")
+        .values_list("user_full_name", flat=True)
     )
 
     groups = {}
 
-    for eq in qs:
-        raw_name = eq.user_full_name
+    for raw_name in names:
         if not raw_name:
             continue
 
@@ -62,10 +55,22 @@ def workers_list_view(request):
         groups[key]["item_count"] += 1
 
     # zamiana na listę + sortowanie alfabetyczne po kluczu
-    workers = sorted(groups.values(), key=lambda x: x["key"])
+    return sorted(groups.values(), key=lambda x: x["key"])
+
+
+@login_required_no_next(login_url="/baza/")
+def workers_list_view(request):
+    """
+    Lista unikalnych pracowników:
+    - grupowanie po _normalize_worker_name(user_full_name),
+    - pomijamy puste i techniczne wpisy ('', '-', '—'),
+    - sortujemy alfabetycznie po kluczu,
+    - liczymy ilość kart sprzętu w każdej grupie.
+    """
 
     context = {
-        "workers": workers,
+        # liczone dopiero w szablonie – przy trafieniu w cache fragmentu wcale
+        "workers": lazy(_workers),
     }
     return render(request, "equipment/workers_list.html", context)
 